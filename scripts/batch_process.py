@@ -0,0 +1,138 @@
+import argparse
+import glob
+import os
+import re
+import time
+from multiprocessing import Pool
+
+import cv2
+
+import config
+from domain.camera.camerafactory import CameraFactory
+from infrastructure.applicationfactory import ApplicationFactory
+from infrastructure.persistance.columnarworldstatelog import ColumnarWorldStateLog
+from infrastructure.persistance.jsoncameramodelrepository import JSONCameraModelRepository
+from infrastructure.persistance.pixelworldmaprepository import PixelWorldMapRepository
+from service.image.imagepreprocessing import preprocess_image
+from service.image.imagestranslationservice import ImageToWorldTranslator
+
+IMAGE_EXTENSIONS = ('*.jpg', '*.jpeg', '*.png')
+
+_camera_model = None
+_pixel_world_map_repository = None
+
+
+def atoi(text):
+    return int(text) if text.isdigit() else text
+
+
+def natural_keys(text):
+    return [atoi(c) for c in re.split(r'(\d+)', text)]
+
+
+def list_frame_files(directory):
+    filenames = []
+    for extension in IMAGE_EXTENSIONS:
+        filenames.extend(glob.glob(os.path.join(directory, extension)))
+    filenames.sort(key=natural_keys)
+    return filenames
+
+
+def list_chunks(source, chunk_size):
+    if os.path.isdir(source):
+        frame_count = len(list_frame_files(source))
+    else:
+        cap = cv2.VideoCapture(source)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+    return [(source, start, min(start + chunk_size, frame_count)) for start in range(0, frame_count, chunk_size)]
+
+
+def read_frames(source, start, stop):
+    if os.path.isdir(source):
+        filenames = list_frame_files(source)
+
+        for frame_index in range(start, stop):
+            yield frame_index, cv2.imread(filenames[frame_index])
+    else:
+        cap = cv2.VideoCapture(source)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+        for frame_index in range(start, stop):
+            has_image, image = cap.read()
+            if not has_image:
+                break
+            yield frame_index, image
+
+        cap.release()
+
+
+def init_worker(camera_models_file, camera_model_id):
+    global _camera_model, _pixel_world_map_repository
+    camera_model_repository = JSONCameraModelRepository(camera_models_file, CameraFactory())
+    _camera_model = camera_model_repository.find_by_id(camera_model_id)
+
+    if config.USE_PIXEL_WORLD_MAP:
+        _pixel_world_map_repository = PixelWorldMapRepository(config.PIXEL_WORLD_MAP_DIRECTORY,
+                                                              (config.CAP_HEIGHT, config.CAP_WIDTH),
+                                                              config.TARGET_SIDE_LENGTH,
+                                                              config.PIXEL_WORLD_MAP_CACHE_SIZE,
+                                                              config.PIXEL_WORLD_MAP_STALE_DELAY)
+
+
+def process_chunk(chunk):
+    source, start, stop = chunk
+    detection_service = ApplicationFactory().create_vision_detection_service()
+    image_to_world_translator = ImageToWorldTranslator(_camera_model, _pixel_world_map_repository)
+    world_state_log = ColumnarWorldStateLog()
+
+    for frame_index, image in read_frames(source, start, stop):
+        if image is None:
+            continue
+
+        image = preprocess_image(image, _camera_model)
+        image_elements = detection_service.detect_all_world_elements(image)
+        world_state = image_to_world_translator.translate_image_elements_to_world(image_elements)
+        world_state_log.append(source, frame_index, world_state, image_to_world_translator.get_obstacles())
+
+    return world_state_log
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Process recorded sessions without rendering.')
+    parser.add_argument('sources', nargs='+', help='recorded videos or directories of frames')
+    parser.add_argument('-o', '--output', default='world_states.npz', help='columnar output file (.npz)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=300,
+                        help='frames per task; table, drawing area and obstacles are detected once per chunk')
+    parser.add_argument('--camera-models', default=config.CAMERA_MODELS_FILE_PATH)
+    parser.add_argument('--camera-model-id', type=int, default=config.TABLE_CAMERA_MODEL_ID)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+
+    chunks = []
+    for source in arguments.sources:
+        chunks.extend(list_chunks(source, arguments.chunk_size))
+
+    total_frames = sum(stop - start for source, start, stop in chunks)
+    print("Processing {} frames from {} sources on {} workers...".format(total_frames, len(arguments.sources),
+                                                                         arguments.workers))
+
+    world_state_log = ColumnarWorldStateLog()
+    start_time = time.perf_counter()
+
+    with Pool(arguments.workers, initializer=init_worker,
+              initargs=(arguments.camera_models, arguments.camera_model_id)) as pool:
+        for chunk_log in pool.imap(process_chunk, chunks):
+            world_state_log.merge(chunk_log)
+
+    elapsed = time.perf_counter() - start_time
+    world_state_log.save(arguments.output)
+
+    print("Processed {} frames in {:.2f} s ({:.1f} frames/s)".format(len(world_state_log), elapsed,
+                                                                    len(world_state_log) / elapsed))
+    print("World states written to {}".format(arguments.output))
@@ -0,0 +1,47 @@
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from service.image.imagesegmentation import segment_image, NoSegmentsFound
+
+
+def time_segmentation(image, repeat, annotate):
+    durations = []
+    found = True
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            segment_image(image, annotate=annotate)
+        except NoSegmentsFound:
+            found = False
+        durations.append(time.perf_counter() - start)
+
+    return np.array(durations) * 1000, found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure segment_image latency on figure photographs")
+    parser.add_argument('directory', nargs='?', default='../data/images/figures')
+    parser.add_argument('-r', '--repeat', type=int, default=20)
+    parser.add_argument('--no-annotate', action='store_true')
+    args = parser.parse_args()
+
+    all_durations = []
+
+    for filename in sorted(glob.glob(os.path.join(args.directory, '*.jpg'))):
+        image = cv2.imread(filename)
+        durations, found = time_segmentation(image, args.repeat, not args.no_annotate)
+        all_durations.append(durations)
+        print("{:<16} {:>9}x{:<5} median={:7.2f}ms p99={:7.2f}ms {}".format(
+            os.path.basename(filename), image.shape[1], image.shape[0], np.median(durations),
+            np.percentile(durations, 99), "found" if found else "no segments"))
+
+    if len(all_durations) > 0:
+        all_durations = np.concatenate(all_durations)
+        print("{:<32} median={:7.2f}ms p99={:7.2f}ms".format("all", np.median(all_durations),
+                                                             np.percentile(all_durations, 99)))
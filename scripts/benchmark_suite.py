@@ -0,0 +1,192 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+import config
+from domain.camera.camerafactory import CameraFactory
+from domain.detector.worldelement.drawingareadetector import DrawingAreaDetector
+from domain.detector.worldelement.obstaclepositiondetector import ObstacleDetector, ShapeDetector
+from domain.detector.worldelement.robotdetector import RobotDetector
+from domain.detector.worldelement.shapefactory import ShapeFactory
+from domain.detector.worldelement.tabledetector import TableDetector
+from infrastructure.messageassembler import MessageAssembler
+from infrastructure.persistance.jsoncameramodelrepository import JSONCameraModelRepository
+from service.image.imagepreprocessing import preprocess_image
+from service.image.imagesegmentation import segment_image
+
+IMAGE_DIRECTORY = '../data/images'
+BASELINE_FILE_PATH = '../data/benchmarks/baseline.json'
+SCENE_DIRECTORIES = ('full_scene', 'robot_images')
+FIGURE_DIRECTORIES = ('figures',)
+PROJECTED_POINT_COUNT = 10000
+OBSTACLE_HEIGHT = 4.1
+
+
+class Benchmark:
+    def __init__(self, name, function, inputs):
+        self.name = name
+        self.function = function
+        self.inputs = inputs
+
+
+def load_images(directories, max_image_count):
+    filenames = []
+    for directory in directories:
+        filenames.extend(sorted(glob.glob(os.path.join(IMAGE_DIRECTORY, directory, '*.jpg'))))
+
+    if max_image_count is not None and len(filenames) > max_image_count:
+        filenames = [filenames[i] for i in np.linspace(0, len(filenames) - 1, max_image_count).astype(int)]
+
+    return [cv2.imread(filename) for filename in filenames]
+
+
+def create_benchmarks(camera_model, max_image_count):
+    scenes = load_images(SCENE_DIRECTORIES, max_image_count)
+    figures = load_images(FIGURE_DIRECTORIES, max_image_count)
+    preprocessed_scenes = [preprocess_image(scene, camera_model) for scene in scenes]
+
+    height, width = scenes[0].shape[0:2]
+    image_points = np.column_stack((np.random.RandomState(0).uniform(0, width, PROJECTED_POINT_COUNT),
+                                    np.random.RandomState(1).uniform(0, height, PROJECTED_POINT_COUNT)))
+    target_points = camera_model.image_to_target_coordinates_array(image_points, 0)[:, 0:2]
+
+    shape_factory = ShapeFactory()
+    message_assembler = MessageAssembler()
+
+    return [
+        Benchmark("preprocess_image", lambda image: preprocess_image(image, camera_model), scenes),
+        Benchmark("detector.robot", RobotDetector(shape_factory).detect, preprocessed_scenes),
+        Benchmark("detector.table", TableDetector(shape_factory).detect, preprocessed_scenes),
+        Benchmark("detector.drawing_area", DrawingAreaDetector(shape_factory).detect, preprocessed_scenes),
+        Benchmark("detector.obstacles", ObstacleDetector(ShapeDetector()).detect, preprocessed_scenes),
+        Benchmark("segment_image", segment_image, figures),
+        Benchmark("camera.image_to_target_{}_points".format(PROJECTED_POINT_COUNT),
+                  lambda points: camera_model.image_to_target_coordinates_array(points, OBSTACLE_HEIGHT),
+                  [image_points]),
+        Benchmark("camera.target_to_image_{}_points".format(PROJECTED_POINT_COUNT),
+                  lambda points: camera_model.target_to_image_coordinates_array(points, OBSTACLE_HEIGHT),
+                  [target_points]),
+        Benchmark("message_assembler.prepare_image", message_assembler.prepare_image, scenes)
+    ]
+
+
+def run_benchmark(benchmark, repeat):
+    exception_count = 0
+
+    for benchmark_input in benchmark.inputs:
+        try:
+            benchmark.function(benchmark_input)
+        except Exception:
+            pass
+
+    durations = []
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        for benchmark_input in benchmark.inputs:
+            start = time.perf_counter()
+            try:
+                benchmark.function(benchmark_input)
+            except Exception:
+                exception_count += 1
+            durations.append(time.perf_counter() - start)
+
+    elapsed = time.perf_counter() - started
+    durations = np.array(durations) * 1000
+
+    return OrderedDict([
+        ("calls", len(durations)),
+        ("exceptions", exception_count),
+        ("mean_ms", float(durations.mean())),
+        ("p50_ms", float(np.percentile(durations, 50))),
+        ("p90_ms", float(np.percentile(durations, 90))),
+        ("p99_ms", float(np.percentile(durations, 99))),
+        ("max_ms", float(durations.max())),
+        ("calls_per_second", len(durations) / elapsed)
+    ])
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = []
+
+    for name, result in results.items():
+        reference = baseline.get("benchmarks", {}).get(name)
+        if reference is None:
+            continue
+
+        ratio = result["p50_ms"] / reference["p50_ms"] if reference["p50_ms"] > 0 else 1.
+        if ratio > 1 + threshold:
+            regressions.append((name, reference["p50_ms"], result["p50_ms"], ratio))
+
+    return regressions
+
+
+def print_result(name, result, reference=None):
+    comparison = ""
+    if reference is not None and reference["p50_ms"] > 0:
+        comparison = "  {:+6.1f}% vs baseline".format((result["p50_ms"] / reference["p50_ms"] - 1) * 100)
+
+    print("{:<38} p50={:8.2f}ms p90={:8.2f}ms p99={:8.2f}ms {:8.1f}/s  exceptions={}/{}{}".format(
+        name, result["p50_ms"], result["p90_ms"], result["p99_ms"], result["calls_per_second"],
+        result["exceptions"], result["calls"], comparison))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vision hot paths over the image corpus")
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('-n', '--max-images', type=int, default=None, help="images per corpus, evenly sampled")
+    parser.add_argument('-k', '--filter', default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument('-b', '--baseline', default=BASELINE_FILE_PATH)
+    parser.add_argument('-t', '--threshold', type=float, default=0.2,
+                        help="allowed p50 slowdown against the baseline before failing, 0.2 is 20%%")
+    parser.add_argument('-o', '--output', default=None, help="write the results to this JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    camera_model_repository = JSONCameraModelRepository(config.CAMERA_MODELS_FILE_PATH, CameraFactory())
+    camera_model = camera_model_repository.find_by_id(config.TABLE_CAMERA_MODEL_ID)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print("Comparing against the baseline recorded on {} at {}".format(baseline.get("machine"),
+                                                                          baseline.get("created")))
+
+    results = OrderedDict()
+    for benchmark in create_benchmarks(camera_model, args.max_images):
+        if args.filter is not None and args.filter not in benchmark.name:
+            continue
+
+        results[benchmark.name] = run_benchmark(benchmark, args.repeat)
+        print_result(benchmark.name, results[benchmark.name], baseline.get("benchmarks", {}).get(benchmark.name))
+
+    report = OrderedDict([
+        ("machine", platform.node()),
+        ("created", time.strftime('%Y-%m-%dT%H:%M:%S')),
+        ("opencv", cv2.__version__),
+        ("repeat", args.repeat),
+        ("benchmarks", results)
+    ])
+
+    for path in [args.output, args.baseline if args.save_baseline else None]:
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+            print("Results written to {}".format(path))
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    for name, reference_p50, p50, ratio in regressions:
+        print("REGRESSION {}: p50 {:.2f}ms -> {:.2f}ms ({:.0f}% slower, threshold {:.0f}%)".format(
+            name, reference_p50, p50, (ratio - 1) * 100, args.threshold * 100))
+
+    sys.exit(1 if len(regressions) > 0 else 0)
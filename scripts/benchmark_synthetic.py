@@ -0,0 +1,202 @@
+import argparse
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+import config
+from domain.camera.camerafactory import CameraFactory
+from domain.detector.worldelement.drawingareadetector import DrawingAreaDetector
+from domain.detector.worldelement.obstaclepositiondetector import ObstacleDetector, ShapeDetector
+from domain.detector.worldelement.robotdetector import RobotDetector
+from domain.detector.worldelement.shapefactory import ShapeFactory
+from domain.detector.worldelement.tabledetector import TableDetector
+from infrastructure.persistance.jsoncameramodelrepository import JSONCameraModelRepository
+from service.image.imagepreprocessing import preprocess_image
+from service.image.syntheticscene import SyntheticSceneRenderer
+
+
+def parse_resolutions(text):
+    return [tuple(int(value) for value in resolution.split('x')) for resolution in text.split(',')]
+
+
+def measure(function, image):
+    start = time.perf_counter()
+    try:
+        result = function(image)
+    except Exception:
+        result = None
+    return result, (time.perf_counter() - start) * 1000
+
+
+# Distance in mm between image points lying on the plane at height d
+def plane_distance(camera_model, first_points, second_points, d):
+    first_points = camera_model.image_to_target_coordinates_array(first_points, d)[:, 0:2]
+    second_points = camera_model.image_to_target_coordinates_array(second_points, d)[:, 0:2]
+    return np.linalg.norm(first_points - second_points, axis=1) * config.TARGET_SIDE_LENGTH
+
+
+def corner_error(camera_model, detected_corners, expected_corners):
+    detected_corners = np.array(detected_corners, dtype=float).reshape(-1, 2)
+    closest = [detected_corners[np.argmin(np.linalg.norm(detected_corners - corner, axis=1))]
+               for corner in expected_corners]
+    return float(plane_distance(camera_model, closest, expected_corners, 0).mean())
+
+
+def evaluate_robot(camera_model, robot, ground_truth):
+    position_error = plane_distance(camera_model, [robot._position], [ground_truth.robot.image_position],
+                                    config.ROBOT_HEIGHT_IN_TARGET_UNIT)[0]
+    angle_error = abs((robot._angle - ground_truth.robot.image_angle + 180) % 360 - 180)
+    return {"position_error_mm": float(position_error), "angle_error_deg": float(angle_error)}
+
+
+def evaluate_table(camera_model, table, ground_truth):
+    return {"corner_error_mm": corner_error(camera_model, table._rectangle.as_contour_points(),
+                                            ground_truth.table.image_corners)}
+
+
+def evaluate_drawing_area(camera_model, drawing_area, ground_truth):
+    return {
+        "inner_corner_error_mm": corner_error(camera_model, drawing_area._inner_square.as_contour_points(),
+                                              ground_truth.drawing_area_inner.image_corners),
+        "outer_corner_error_mm": corner_error(camera_model, drawing_area._outer_square.as_contour_points(),
+                                              ground_truth.drawing_area_outer.image_corners)
+    }
+
+
+def evaluate_obstacles(camera_model, obstacles, ground_truth):
+    detected_positions = np.array([obstacle._position for obstacle in obstacles], dtype=float)
+    matched = set()
+    position_errors = []
+    correct_shape_count = 0
+
+    for expected in ground_truth.obstacles:
+        distances = np.linalg.norm(detected_positions - expected.image_position, axis=1)
+        index = int(np.argmin(distances))
+        if distances[index] > expected.image_radius or index in matched:
+            continue
+
+        matched.add(index)
+        obstacle = obstacles[index]
+        position_errors.append(plane_distance(camera_model, [obstacle._position], [expected.image_position],
+                                              config.OBSTACLE_HEIGHT_IN_TARGET_UNIT)[0])
+
+        shape = None if obstacle._shape is None else 'Triangle' if len(obstacle._shape) == 3 else 'Circle'
+        if shape == expected.shape and (shape != 'Triangle' or obstacle._orientation == expected.orientation):
+            correct_shape_count += 1
+
+    return {
+        "recall": len(matched) / float(len(ground_truth.obstacles)),
+        "false_positives": len(obstacles) - len(matched),
+        "position_error_mm": float(np.mean(position_errors)) if len(position_errors) > 0 else float('nan'),
+        "shape_accuracy": correct_shape_count / float(len(ground_truth.obstacles))
+    }
+
+
+def create_detectors():
+    shape_factory = ShapeFactory()
+    return OrderedDict([
+        ("robot", (RobotDetector(shape_factory).detect, evaluate_robot)),
+        ("table", (TableDetector(shape_factory).detect, evaluate_table)),
+        ("drawing_area", (DrawingAreaDetector(shape_factory).detect, evaluate_drawing_area)),
+        ("obstacles", (ObstacleDetector(ShapeDetector()).detect, evaluate_obstacles))
+    ])
+
+
+def run_cell(renderer, clutter, scene_count, obstacle_count, seed, detectors):
+    camera_model = renderer.get_camera_model()
+    durations = OrderedDict([(name, []) for name in ["preprocess_image"] + list(detectors)])
+    evaluations = OrderedDict([(name, []) for name in detectors])
+
+    for index in range(scene_count):
+        random_state = np.random.RandomState(seed + index)
+        scene = renderer.render(renderer.create_random_layout(random_state, obstacle_count), clutter, random_state)
+
+        image, duration = measure(lambda image: preprocess_image(image, camera_model), scene.image)
+        durations["preprocess_image"].append(duration)
+
+        for name, (detect, evaluate) in detectors.items():
+            detection, duration = measure(detect, image)
+            durations[name].append(duration)
+            evaluations[name].append(None if detection is None else evaluate(camera_model, detection,
+                                                                              scene.ground_truth))
+
+    results = OrderedDict()
+    for name, name_durations in durations.items():
+        result = OrderedDict([("p50_ms", float(np.percentile(name_durations, 50))),
+                              ("mean_ms", float(np.mean(name_durations)))])
+
+        if name in evaluations:
+            detected = [evaluation for evaluation in evaluations[name] if evaluation is not None]
+            result["detection_rate"] = len(detected) / float(scene_count)
+            for key in (detected[0] if len(detected) > 0 else {}):
+                result[key] = float(np.nanmean([evaluation[key] for evaluation in detected]))
+
+        results[name] = result
+
+    return results
+
+
+def format_result(result):
+    return ' '.join('{}={:.2f}'.format(key, value) for key, value in result.items()
+                    if not (isinstance(value, float) and math.isnan(value)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark how the detectors scale with resolution and clutter "
+                                                 "over rendered scenes with known ground truth")
+    parser.add_argument('--resolutions', type=parse_resolutions,
+                        default=[(config.CAP_WIDTH, config.CAP_HEIGHT)],
+                        help="WIDTHxHEIGHT, comma separated, defaults to the capture resolution the detector "
+                             "pixel limits are tuned for")
+    parser.add_argument('--clutter', default='0,10,30', help="distractor blob counts, comma separated")
+    parser.add_argument('-n', '--scenes', type=int, default=10, help="scenes rendered per resolution and clutter")
+    parser.add_argument('--obstacles', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--noise', type=float, default=3., help="standard deviation of the sensor noise")
+    parser.add_argument('--no-distortion', action='store_true', help="render through an ideal pinhole camera")
+    parser.add_argument('-k', '--filter', default=None, help="only run detectors whose name contains this")
+    parser.add_argument('-s', '--save-scenes', default=None, help="write the first scene of every cell here")
+    parser.add_argument('-o', '--output', default=None, help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    camera_model_repository = JSONCameraModelRepository(config.CAMERA_MODELS_FILE_PATH, CameraFactory())
+    camera_model = camera_model_repository.find_by_id(config.TABLE_CAMERA_MODEL_ID)
+
+    detectors = OrderedDict((name, detector) for name, detector in create_detectors().items()
+                            if args.filter is None or args.filter in name)
+
+    report = OrderedDict()
+    for width, height in args.resolutions:
+        # The detectors filter on pixel areas and sizes tuned at the capture resolution, other resolutions only
+        # measure where those limits stop holding
+        if (width, height) != (config.CAP_WIDTH, config.CAP_HEIGHT):
+            print("Warning: {}x{} is not the {}x{} capture resolution, the detector pixel limits do not scale"
+                  .format(width, height, config.CAP_WIDTH, config.CAP_HEIGHT))
+
+        renderer = SyntheticSceneRenderer(camera_model, (width, height), not args.no_distortion, args.noise)
+
+        for clutter in [int(value) for value in args.clutter.split(',')]:
+            cell = '{}x{} clutter={}'.format(width, height, clutter)
+            report[cell] = run_cell(renderer, clutter, args.scenes, args.obstacles, args.seed, detectors)
+
+            print(cell)
+            for name, result in report[cell].items():
+                print("  {:<18} {}".format(name, format_result(result)))
+
+            if args.save_scenes is not None:
+                os.makedirs(args.save_scenes, exist_ok=True)
+                random_state = np.random.RandomState(args.seed)
+                scene = renderer.render(renderer.create_random_layout(random_state, args.obstacles), clutter,
+                                        random_state)
+                cv2.imwrite(os.path.join(args.save_scenes, '{}x{}-clutter{}.png'.format(width, height, clutter)),
+                            scene.image)
+
+    if args.output is not None:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        print("Results written to {}".format(args.output))
@@ -0,0 +1,178 @@
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from multiprocessing import Pool
+
+import numpy as np
+
+import batch_process
+import config
+from domain.detector.worldelement import drawingareadetector, robotdetector
+from infrastructure.persistance.columnarworldstatelog import ColumnarWorldStateLog
+from infrastructure.persistance.worldstatecomparison import AccuracyBudget, compare_world_state_logs, \
+    find_budget_violations
+from service.image import imagesegmentation
+
+ROBOT_POSITION_P95_BUDGET_IN_MM = 5.
+ROBOT_ANGLE_P95_BUDGET_IN_DEGREES = 2.
+ROBOT_DETECTION_RATIO_BUDGET = 0.98
+OBSTACLE_POSITION_P95_BUDGET_IN_MM = 10.
+OBSTACLE_MATCH_RATIO_BUDGET = 0.98
+TABLE_SIZE_MAX_BUDGET_IN_MM = 10.
+# Modules binding config settings at import, the others read them through the config module
+CONFIG_CONSUMERS = (drawingareadetector, imagesegmentation, robotdetector)
+
+
+def parse_override(text):
+    name, separator, value = text.partition('=')
+    if separator != '=' or not hasattr(config, name):
+        raise argparse.ArgumentTypeError("expected NAME=VALUE with NAME a setting of config.py, got {}".format(text))
+
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+
+    if isinstance(getattr(config, name), np.ndarray):
+        value = np.array(value, dtype=getattr(config, name).dtype)
+    return name, value
+
+
+# Rebinds the setting in config and in the consumers that copied it, so a worker replays with the override
+def apply_overrides(overrides):
+    for name, value in overrides:
+        setattr(config, name, value)
+        for module in CONFIG_CONSUMERS:
+            if hasattr(module, name):
+                setattr(module, name, value)
+
+
+def init_worker(camera_models_file, camera_model_id, overrides):
+    apply_overrides(overrides)
+    batch_process.init_worker(camera_models_file, camera_model_id)
+
+
+def replay(chunks, workers, camera_models_file, camera_model_id, overrides):
+    world_state_log = ColumnarWorldStateLog()
+
+    with Pool(workers, initializer=init_worker, initargs=(camera_models_file, camera_model_id, overrides)) as pool:
+        start_time = time.perf_counter()
+        for chunk_log in pool.imap(batch_process.process_chunk, chunks):
+            world_state_log.merge(chunk_log)
+        elapsed = time.perf_counter() - start_time
+
+    return world_state_log, elapsed
+
+
+def describe(overrides):
+    return ' '.join('{}={!r}'.format(name, value) for name, value in overrides) or 'config.py defaults'
+
+
+def print_statistics(name, statistics):
+    if statistics["count"] == 0:
+        print("  {:<24} no pair compared".format(name))
+    else:
+        print("  {:<24} mean={mean:.2f} p50={p50:.2f} p95={p95:.2f} max={max:.2f} over {count}".format(name,
+                                                                                                 **statistics))
+
+
+def print_comparison(comparison):
+    robot = comparison["robot"]
+    print("Robot: kept {kept}/{reference_detections} detections, lost {lost}, gained {gained}".format(**robot))
+    print_statistics("position error (mm)", robot["position_error_mm"])
+    print_statistics("angle error (deg)", robot["angle_error_deg"])
+
+    obstacles = comparison["obstacles"]
+    print("Obstacles: matched {matched}/{reference_obstacles}, {count_mismatch_frames} frames with another count, "
+          "{tag_mismatches} tag mismatches".format(**obstacles))
+    print_statistics("position error (mm)", obstacles["position_error_mm"])
+
+    table = comparison["table"]
+    print("Table: kept {kept}/{reference_detections} detections, lost {lost}, gained {gained}".format(**table))
+    print_statistics("width error (mm)", table["width_error_mm"])
+    print_statistics("length error (mm)", table["length_error_mm"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded sessions in a reference and a candidate "
+                                                 "configuration, compare their world states frame by frame and "
+                                                 "fail when the candidate leaves the accuracy budget")
+    parser.add_argument('sources', nargs='+', help='recorded videos or directories of frames')
+    parser.add_argument('-r', '--reference', action='append', type=parse_override, default=[], metavar='NAME=VALUE',
+                        help="config.py setting for the reference run, repeatable")
+    parser.add_argument('-c', '--candidate', action='append', type=parse_override, default=[], metavar='NAME=VALUE',
+                        help="config.py setting for the candidate run, repeatable")
+    parser.add_argument('-w', '--workers', type=int, default=1, help='number of worker processes for each run')
+    parser.add_argument('--chunk-size', type=int, default=300,
+                        help='frames per task; table, drawing area and obstacles are detected once per chunk')
+    parser.add_argument('--camera-models', default=config.CAMERA_MODELS_FILE_PATH)
+    parser.add_argument('--camera-model-id', type=int, default=config.TABLE_CAMERA_MODEL_ID)
+    parser.add_argument('--robot-position', type=float, default=ROBOT_POSITION_P95_BUDGET_IN_MM,
+                        help="allowed 95th percentile of the robot position error, in mm")
+    parser.add_argument('--robot-angle', type=float, default=ROBOT_ANGLE_P95_BUDGET_IN_DEGREES,
+                        help="allowed 95th percentile of the robot heading error, in degrees")
+    parser.add_argument('--robot-detections', type=float, default=ROBOT_DETECTION_RATIO_BUDGET,
+                        help="share of the reference robot detections the candidate must keep")
+    parser.add_argument('--obstacle-position', type=float, default=OBSTACLE_POSITION_P95_BUDGET_IN_MM,
+                        help="allowed 95th percentile of the obstacle position error, in mm")
+    parser.add_argument('--obstacle-matches', type=float, default=OBSTACLE_MATCH_RATIO_BUDGET,
+                        help="share of the reference obstacles the candidate must find")
+    parser.add_argument('--table-size', type=float, default=TABLE_SIZE_MAX_BUDGET_IN_MM,
+                        help="allowed table width and length error, in mm")
+    parser.add_argument('--save-logs', default=None, help="write both world state logs (.npz) in this directory")
+    parser.add_argument('-o', '--output', default=None, help="write the comparison to this JSON file")
+    args = parser.parse_args()
+
+    chunks = []
+    for source in args.sources:
+        chunks.extend(batch_process.list_chunks(source, args.chunk_size))
+    total_frames = sum(stop - start for source, start, stop in chunks)
+
+    runs = OrderedDict()
+    for name, overrides in (("reference", args.reference), ("candidate", args.candidate)):
+        print("Replaying {} frames with the {} configuration: {}".format(total_frames, name, describe(overrides)))
+        runs[name] = replay(chunks, args.workers, args.camera_models, args.camera_model_id, overrides)
+
+        world_state_log, elapsed = runs[name]
+        print("  {} frames in {:.2f} s ({:.1f} frames/s)".format(len(world_state_log), elapsed,
+                                                                len(world_state_log) / elapsed))
+
+        if args.save_logs is not None:
+            os.makedirs(args.save_logs, exist_ok=True)
+            world_state_log.save(os.path.join(args.save_logs, '{}.npz'.format(name)))
+
+    (reference_log, reference_elapsed), (candidate_log, candidate_elapsed) = runs.values()
+    speedup = reference_elapsed / candidate_elapsed
+    comparison = compare_world_state_logs(reference_log.as_columns(), candidate_log.as_columns())
+
+    print("Speedup: {:.2f}x ({:.2f} s -> {:.2f} s)".format(speedup, reference_elapsed, candidate_elapsed))
+    print_comparison(comparison)
+
+    budget = AccuracyBudget(args.robot_position, args.robot_angle, args.robot_detections, args.obstacle_position,
+                            args.obstacle_matches, args.table_size)
+    violations = find_budget_violations(comparison, budget)
+    for name, value, limit in violations:
+        print("OVER BUDGET {}: {:.3f} against {:.3f}".format(name, value, limit))
+
+    if args.output is not None:
+        report = OrderedDict([
+            ("created", time.strftime('%Y-%m-%dT%H:%M:%S')),
+            ("sources", args.sources),
+            ("reference", describe(args.reference)),
+            ("candidate", describe(args.candidate)),
+            ("reference_seconds", reference_elapsed),
+            ("candidate_seconds", candidate_elapsed),
+            ("speedup", speedup),
+            ("budget", budget._asdict()),
+            ("violations", [name for name, value, limit in violations]),
+            ("comparison", comparison)
+        ])
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        print("Report written to {}".format(args.output))
+
+    sys.exit(1 if len(violations) > 0 else 0)
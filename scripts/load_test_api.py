@@ -0,0 +1,73 @@
+import argparse
+import http.client
+import time
+from threading import Thread
+from urllib.parse import urlparse
+
+import numpy as np
+
+DEFAULT_ENDPOINTS = ['/world-dimensions', '/obstacles', '/drawzone-corners', '/vision/pipeline']
+
+
+def run_client(host, port, endpoints, request_count, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+
+    for index in range(request_count):
+        endpoint = endpoints[index % len(endpoints)]
+        start = time.perf_counter()
+
+        try:
+            connection.request('GET', endpoint)
+            response = connection.getresponse()
+            response.read()
+            latencies[endpoint].append(time.perf_counter() - start)
+            if response.status >= 500:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+
+    connection.close()
+
+
+def print_latencies(name, latencies):
+    if len(latencies) == 0:
+        print("{:<24} no successful requests".format(name))
+        return
+
+    latencies = np.array(latencies) * 1000
+    print("{:<24} n={:<6d} p50={:7.2f}ms p99={:7.2f}ms max={:7.2f}ms".format(
+        name, len(latencies), np.percentile(latencies, 50), np.percentile(latencies, 99), latencies.max()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the vision REST API while the vision loop is running")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('-c', '--concurrency', type=int, default=8)
+    parser.add_argument('-n', '--requests', type=int, default=200, help="Requests per client")
+    parser.add_argument('-e', '--endpoint', action='append', dest='endpoints')
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    endpoints = args.endpoints or DEFAULT_ENDPOINTS
+    latencies = {endpoint: [] for endpoint in endpoints}
+    errors = []
+
+    clients = [Thread(target=run_client, args=(url.hostname, url.port or 80, endpoints, args.requests, latencies,
+                                               errors))
+               for _ in range(args.concurrency)]
+
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    for endpoint in endpoints:
+        print_latencies(endpoint, latencies[endpoint])
+    print_latencies('all', [latency for values in latencies.values() for latency in values])
+
+    total = sum(len(values) for values in latencies.values())
+    print("{} requests in {:.2f}s ({:.1f} requests/s), {} errors".format(total, elapsed, total / elapsed, len(errors)))
@@ -1,9 +1,16 @@
+import os
+
 import numpy as np
 
 BASESTATION_WEBSOCKET_URL = 'ws://localhost:3000'
 CAMERA_MODELS_FILE_PATH = '../data/camera_models/camera_models.json'
+PIXEL_WORLD_MAP_DIRECTORY = os.path.dirname(CAMERA_MODELS_FILE_PATH)
+USE_PIXEL_WORLD_MAP = False
+PIXEL_WORLD_MAP_CACHE_SIZE = 4
+PIXEL_WORLD_MAP_STALE_DELAY = 60.
 TABLE_CAMERA_MODEL_ID = 2
 CAMERA_ID = 1
+VIDEO_FILE_PATH = None  # replays this recorded video instead of the camera when set
 CAP_WIDTH = 1280
 CAP_HEIGHT = 800
 
@@ -32,3 +39,49 @@ TARGET_SIDE_LENGTH = 44  # in mm
 ROBOT_HEIGHT_IN_MM = 270
 ROBOT_HEIGHT_IN_TARGET_UNIT = ROBOT_HEIGHT_IN_MM / TARGET_SIDE_LENGTH
 OBSTACLE_HEIGHT_IN_TARGET_UNIT = 10
+
+# POLYLINES
+POLYLINE_TOLERANCE_IN_MM = 2
+POLYLINE_MAX_VERTICES = 200
+
+# PIPELINE
+PIPELINE_QUEUE_SIZE = 1
+PIPELINE_BACKEND = 'thread'  # 'thread' or 'process'
+PIPELINE_DETECTION_WORKERS = 3
+PIPELINE_SHARED_FRAME_SLOTS = 2 * PIPELINE_DETECTION_WORKERS + 6
+
+# FRAME PUBLISHER
+FRAME_PUBLISHER_JPEG_QUALITY = 80
+FRAME_PUBLISHER_IMAGE_SCALE = 0.5
+FRAME_PUBLISHER_KEYFRAME_INTERVAL = 30  # in frames
+WEBSOCKET_RECONNECT_DELAY = 0.5  # in seconds, doubled after each failed attempt
+WEBSOCKET_MAX_RECONNECT_DELAY = 10  # in seconds
+
+# DEBUG STREAM
+DEBUG_STREAM_JPEG_QUALITY = 70
+DEBUG_STREAM_IMAGE_SCALE = 1
+DEBUG_STREAM_MAX_CLIENTS = 4  # each viewer holds an API server thread
+
+# SUBSCRIPTION SERVER
+SUBSCRIPTION_SERVER_HOST = '0.0.0.0'
+SUBSCRIPTION_SERVER_PORT = 5001
+SUBSCRIPTION_DEFAULT_MAX_RATE = 10  # in messages per second per topic
+
+# TRACING
+TRACE_ENABLED = False  # can also be toggled with POST /vision/trace/start and /vision/trace/stop
+TRACE_BUFFER_SIZE = 200000  # in events, the oldest are overwritten
+TRACE_DIRECTORY = '../data/traces'
+
+# API SERVER
+API_HOST = '0.0.0.0'
+API_PORT = 5000
+API_SERVER_BACKEND = 'waitress'  # 'waitress' or 'werkzeug', falls back to 'werkzeug' when waitress is missing
+API_SERVER_THREADS = 8
+API_KEEP_ALIVE_TIMEOUT = 5
+API_OUTPUT_BUFFER_SIZE_IN_BYTES = 1024 * 1024  # per connection, bounds how far a slow stream viewer can lag
+API_MAX_PENDING_CONNECTIONS = 32  # connections beyond this are closed on accept
+API_OFFLOAD_WORKERS = 2
+API_OFFLOAD_MAX_PENDING = 4
+API_OFFLOAD_TIMEOUT = 10  # in seconds
+API_LONG_POLL_MAX_WAIT = 30  # in seconds, each waiting request holds an API server thread
+SEGMENTATION_CACHE_SIZE_IN_BYTES = 32 * 1024 * 1024
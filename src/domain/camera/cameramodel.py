@@ -1,6 +1,7 @@
 import cv2
 
-from numpy import cross, dot, array
+from numpy import dot, array, asarray, column_stack, diag, full, hstack, ones
+from numpy.linalg import inv
 
 
 class CameraModel:
@@ -14,6 +15,8 @@ class CameraModel:
         self._rotation_matrix = array(rotation_matrix)
         self._translation_vector = array(translation_vector)
         self._target_origin = array(origin)
+        self._plane_homographies = {}
+        self._image_to_world_homographies = {}
 
     def target_to_image_coordinates(self, u, v, d):
         homogeneous_coordinates = dot(self._camera_matrix, array([u, v, d, 1]))
@@ -23,21 +26,44 @@ class CameraModel:
         ]).astype('int').tolist()
 
     def image_to_target_coordinates(self, u, v, d):
-        m = self._camera_matrix
-        A = array(m[0] - (u * m[2]))
-        B = array(m[1] - (v * m[2]))
+        return self.image_to_target_coordinates_array([[u, v]], d)[0].tolist()
 
-        u_1 = A[:3]
-        d_1 = A[3]
-        u_2 = B[:3]
-        d_2 = B[3]
-        u_3 = array([0, 0, 1])
-        d_3 = d
+    def target_to_image_coordinates_array(self, points, d):
+        points = asarray(points, dtype=float).reshape(-1, 2)
+        heights = full((len(points), 1), d, dtype=float)
+        homogeneous_coordinates = dot(hstack((points, heights, ones((len(points), 1)))), self._camera_matrix.T)
+        return homogeneous_coordinates[:, 0:2] / homogeneous_coordinates[:, 2:3]
 
-        P = ((-d_1 * cross(u_2, u_3)) + (-d_2 * cross(u_3, u_1)) + (-d_3 * cross(u_1, u_2))) / \
-            dot(u_1.T, cross(u_2, u_3))
+    def image_to_target_coordinates_array(self, points, d):
+        target_coordinates = self.transform_coordinates_array(self.get_plane_homography(d)[1], points)
+        return hstack((target_coordinates, full((len(target_coordinates), 1), -d, dtype=float)))
 
-        return array(P, dtype=float).tolist()
+    # Homographies of the plane reached by image_to_target_coordinates(u, v, d), as (target to image, image to target)
+    def get_plane_homography(self, d):
+        homographies = self._plane_homographies.get(d)
+
+        if homographies is None:
+            m = self._camera_matrix
+            target_to_image = column_stack((m[:, 0], m[:, 1], m[:, 3] - d * m[:, 2]))
+            homographies = (target_to_image, inv(target_to_image))
+            self._plane_homographies[d] = homographies
+
+        return homographies
+
+    def get_image_to_floor_image_homography(self, d):
+        floor_target_to_image = self.get_plane_homography(0)[0]
+        return dot(floor_target_to_image, self.get_plane_homography(d)[1])
+
+    def get_image_to_world_homography(self, d, target_to_world, scale=1.):
+        target_to_world = asarray(target_to_world, dtype=float)
+        key = (target_to_world.tobytes(), scale)
+        cached_key, homography = self._image_to_world_homographies.get(d, (None, None))
+
+        if cached_key != key:
+            homography = dot(diag([scale, scale, 1.]), dot(target_to_world, self.get_plane_homography(d)[1]))
+            self._image_to_world_homographies[d] = (key, homography)
+
+        return homography
 
     def transform_coordinates(self, transform_matrix, coordinate):
         homogeneous_coordinate = array([
@@ -48,9 +74,27 @@ class CameraModel:
 
         return self._homogeneous_to_cart(dot(transform_matrix, homogeneous_coordinate))
 
+    def transform_coordinates_array(self, transform_matrix, coordinates):
+        coordinates = asarray(coordinates, dtype=float).reshape(-1, 2)
+        homogeneous_coordinates = dot(hstack((coordinates, ones((len(coordinates), 1)))), asarray(transform_matrix).T)
+        return homogeneous_coordinates[:, 0:2] / homogeneous_coordinates[:, 2:3]
+
     def undistort_image(self, image):
         return cv2.undistort(image, self._intrinsic_parameters, self._distortion_coefficients, None, None)
 
+    # Same camera at another capture resolution, the pixel axes stretched by scale around the image origin
+    def scale(self, scale):
+        scale_matrix = diag([scale, scale, 1.])
+        return CameraModel(self._id, dot(scale_matrix, self._intrinsic_parameters), self._extrinsic_parameters,
+                           dot(scale_matrix, self._camera_matrix), self._distortion_coefficients,
+                           self._rotation_matrix, self._translation_vector, self._target_origin)
+
+    def get_intrinsic_parameters(self):
+        return self._intrinsic_parameters
+
+    def get_distortion_coefficients(self):
+        return self._distortion_coefficients
+
     def get_id(self):
         return self._id
 
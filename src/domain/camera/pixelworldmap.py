@@ -0,0 +1,52 @@
+import numpy as np
+
+GENERATION_ROWS_PER_BLOCK = 64
+
+
+class PixelWorldMap:
+    def __init__(self, map_data):
+        self._map = map_data
+        self._height, self._width = map_data.shape[0:2]
+
+    def get_shape(self):
+        return self._height, self._width
+
+    def contains(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return (points[:, 0] >= 0) & (points[:, 0] <= self._width - 1) & \
+               (points[:, 1] >= 0) & (points[:, 1] <= self._height - 1)
+
+    def lookup(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        x = np.clip(points[:, 0], 0, self._width - 1)
+        y = np.clip(points[:, 1], 0, self._height - 1)
+
+        x_0 = np.minimum(np.floor(x).astype(int), self._width - 2)
+        y_0 = np.minimum(np.floor(y).astype(int), self._height - 2)
+        x_weight = (x - x_0)[:, None]
+        y_weight = (y - y_0)[:, None]
+
+        top = self._map[y_0, x_0] * (1 - x_weight) + self._map[y_0, x_0 + 1] * x_weight
+        bottom = self._map[y_0 + 1, x_0] * (1 - x_weight) + self._map[y_0 + 1, x_0 + 1] * x_weight
+
+        return top * (1 - y_weight) + bottom * y_weight
+
+
+def generate_pixel_world_map(camera_model, plane_height, target_to_world, image_shape, scale, out=None):
+    height, width = image_shape[0:2]
+    image_to_world = camera_model.get_image_to_world_homography(plane_height, target_to_world, scale)
+
+    if out is None:
+        out = np.empty((height, width, 2), dtype=np.float32)
+
+    columns = np.arange(width, dtype=float)
+
+    for first_row in range(0, height, GENERATION_ROWS_PER_BLOCK):
+        rows = np.arange(first_row, min(first_row + GENERATION_ROWS_PER_BLOCK, height), dtype=float)
+        grid_x, grid_y = np.meshgrid(columns, rows)
+        pixels = np.stack((grid_x.ravel(), grid_y.ravel()), axis=1)
+
+        world_points = camera_model.transform_coordinates_array(image_to_world, pixels)
+        out[first_row:first_row + len(rows)] = world_points.reshape(len(rows), width, 2)
+
+    return PixelWorldMap(out)
@@ -10,7 +10,7 @@ class RectangleDetector(ShapeDetector):
 
     def detect(self, image):
         rectangles = []
-        binary_image, contours, hierarchy = cv2.findContours(image.copy(), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        contours = cv2.findContours(image.copy(), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)[-2]
 
         for contour_points in contours:
             polygon_points = self._approximate_polygon(contour_points)
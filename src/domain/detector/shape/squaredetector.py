@@ -17,7 +17,7 @@ class SquareDetector(ShapeDetector):
             else:
                 return_value, binary_image = cv2.threshold(image, threshold_value, 255, cv2.THRESH_BINARY)
 
-            binary_image, contours, hierarchy = cv2.findContours(binary_image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+            contours = cv2.findContours(binary_image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)[-2]
 
             for contour_points in contours:
                 polygon_points = self._approximate_polygon(contour_points)
@@ -1,3 +1,5 @@
+import math
+
 import cv2
 import numpy as np
 
@@ -32,7 +34,7 @@ class ShapeDetector:
         cimage = cv2.Canny(image.copy(), 150, 150)
         kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
         cimage = cv2.dilate(cimage, kernel)
-        (_, cnts, _) = cv2.findContours(cimage, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        cnts = cv2.findContours(cimage, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)[-2]
 
         for contour in cnts:
             approx = cv2.approxPolyDP(contour, 0.1 * cv2.arcLength(contour, True), True)
@@ -62,9 +64,9 @@ class ShapeDetector:
         point1 = (array[0][0][0], array[0][0][1])
         point2 = (array[1][0][0], array[1][0][1])
         point3 = (array[2][0][0], array[2][0][1])
-        distanceP1P2 = np.math.hypot(point2[0] - point1[0], point2[1] - point1[1])
-        distanceP1P3 = np.math.hypot(point3[0] - point1[0], point3[1] - point1[1])
-        distanceP2P3 = np.math.hypot(point3[0] - point2[0], point3[1] - point2[1])
+        distanceP1P2 = math.hypot(point2[0] - point1[0], point2[1] - point1[1])
+        distanceP1P3 = math.hypot(point3[0] - point1[0], point3[1] - point1[1])
+        distanceP2P3 = math.hypot(point3[0] - point2[0], point3[1] - point2[1])
         if min(distanceP1P2, distanceP1P3, distanceP2P3) == distanceP1P2:
             tip = point3
             base1 = point1
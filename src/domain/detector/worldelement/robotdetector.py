@@ -21,7 +21,6 @@ class RobotDetector(IWorldElementDetector):
 
     def detect(self, image):
         threshold = self._threshold_robot_makers(image)
-        cv2.imshow('threshold', threshold)
         contours = self._detect_robot_markers_contours(threshold)
 
         robot_markers = np.array([self._find_center_of_mass(contour) for contour in contours])
@@ -45,10 +44,10 @@ class RobotDetector(IWorldElementDetector):
         return mask
 
     def _detect_robot_markers_contours(self, threshold):
-        contours = cv2.findContours(threshold, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[1]
+        contours = cv2.findContours(threshold, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
         contours = [contour for contour in contours if
                     cv2.contourArea(contour) > 300 and cv2.contourArea(contour) < 800]
-        return np.array(contours)
+        return contours
 
     def _get_robot_position(self, targets_center):
         (r_x, r_y), r_r = cv2.minEnclosingCircle(targets_center)
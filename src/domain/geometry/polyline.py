@@ -0,0 +1,55 @@
+import heapq
+
+import numpy as np
+
+
+def simplify_polyline(points, tolerance, max_vertex_count=None, closed=False):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    point_count = len(points)
+
+    if point_count <= 2:
+        return np.arange(point_count)
+
+    if closed:
+        points = np.vstack((points, points[0:1]))
+
+    last = len(points) - 1
+    vertex_budget = max_vertex_count + int(closed) if max_vertex_count is not None else len(points)
+
+    kept_indices = [0, last]
+    candidates = []
+    _push_farthest_point(candidates, points, 0, last)
+
+    while len(candidates) > 0 and len(kept_indices) < vertex_budget:
+        negative_distance, index, first, last = heapq.heappop(candidates)
+        if -negative_distance <= tolerance:
+            break
+
+        kept_indices.append(index)
+        _push_farthest_point(candidates, points, first, index)
+        _push_farthest_point(candidates, points, index, last)
+
+    kept_indices = np.sort(kept_indices)
+
+    if closed:
+        kept_indices = kept_indices[kept_indices < point_count]
+
+    return kept_indices
+
+
+def _push_farthest_point(candidates, points, first, last):
+    if last - first < 2:
+        return
+
+    start = points[first]
+    inner_points = points[first + 1:last] - start
+    direction = points[last] - start
+    length = np.hypot(direction[0], direction[1])
+
+    if length == 0:
+        distances = np.hypot(inner_points[:, 0], inner_points[:, 1])
+    else:
+        distances = np.abs(direction[0] * inner_points[:, 1] - direction[1] * inner_points[:, 0]) / length
+
+    farthest = int(np.argmax(distances))
+    heapq.heappush(candidates, (-distances[farthest], first + 1 + farthest, first, last))
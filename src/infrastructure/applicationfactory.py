@@ -1,15 +1,27 @@
 import base64
 import glob
 import random
-import cv2
-import numpy as np
-from PIL import Image
-from flask import Flask, make_response, jsonify, request, json
-from io import BytesIO
+from concurrent import futures
+from flask import Flask, Response, make_response, jsonify, request, json
 
 import config
+
+from domain.detector.worldelement.drawingareadetector import DrawingAreaDetector
+from domain.detector.worldelement.obstaclepositiondetector import ObstacleDetector, ShapeDetector
+from domain.detector.worldelement.robotdetector import RobotDetector
+from domain.detector.worldelement.shapefactory import ShapeFactory
+from domain.detector.worldelement.tabledetector import TableDetector
+from infrastructure.metrics import EXPOSITION_CONTENT_TYPE
+from infrastructure.mjpegbroadcaster import MJPEG_MIMETYPE, TooManyViewers
+from infrastructure.processoffloader import OffloaderSaturated
+from infrastructure.responsecache import ResponseCache
+from infrastructure.tracer import NULL_TRACER
+from infrastructure.webserver import RequestTimer, install_request_timing
+from service.image.detectonceproxy import DetectOnceProxy
 from service.image.imagedetectionservice import ImageDetectionService
-from service.image.imagesegmentation import segment_image, NoSegmentsFound
+from service.image.imagesegmentation import segment_encoded_image, NoSegmentsFound, InvalidImage
+from service.image.segmentationcache import SegmentationCache, SegmentationResult, create_segmentation_key
+from service.image.worldsnapshot import get_target_to_world
 
 ORIENTATION = {
     "SOUTH": 0,
@@ -18,6 +30,8 @@ ORIENTATION = {
     "WEST": 90
 }
 
+BINARY_IMAGE_MIMETYPES = ('image/jpeg', 'image/png', 'application/octet-stream')
+
 
 class ApplicationFactory:
     def create_detection_service(self, detectors):
@@ -26,8 +40,132 @@ class ApplicationFactory:
             detection_service.register_detector(detector)
         return detection_service
 
-    def create_rest_api(self, data_logger, detection_service, image_to_world_translation, message_assembler):
+    def create_vision_detection_service(self):
+        shape_factory = ShapeFactory()
+        shape_detector = ShapeDetector()
+        robot_detector = RobotDetector(shape_factory)
+        table_detector = TableDetector(shape_factory)
+        drawing_area_detector = DrawingAreaDetector(shape_factory)
+        obstacles_detector = ObstacleDetector(shape_detector)
+
+        return self.create_detection_service([
+            robot_detector,
+            DetectOnceProxy(table_detector),
+            DetectOnceProxy(drawing_area_detector),
+            DetectOnceProxy(obstacles_detector)
+        ])
+
+    def create_rest_api(self, data_logger, detection_service, image_to_world_translation, message_assembler,
+                        world_snapshot_store, pipeline=None, segmentation_offloader=None,
+                        world_state_encoder=None, frame_publisher=None, mjpeg_broadcaster=None,
+                        subscription_server=None, metrics_registry=None, tracer=None):
         api = Flask(__name__)
+        request_timer = RequestTimer()
+        segmentation_cache = SegmentationCache(config.SEGMENTATION_CACHE_SIZE_IN_BYTES)
+        response_cache = ResponseCache()
+        install_request_timing(api, request_timer, tracer or NULL_TRACER)
+
+        def serve_versioned_resource(resource, get_version, create_body):
+            snapshot = world_snapshot_store.get_latest()
+            wait = request.args.get('wait', type=float)
+
+            if wait and request.if_none_match.contains(response_cache.create_etag(resource, get_version(snapshot))):
+                snapshot = world_snapshot_store.wait_for_change(get_version, get_version(snapshot),
+                                                                min(wait, config.API_LONG_POLL_MAX_WAIT))
+
+            cached_response = response_cache.get(resource, get_version(snapshot),
+                                                 lambda: api.json.dumps(create_body(snapshot)))
+
+            if request.if_none_match.contains(cached_response.etag):
+                response = make_response('', 304)
+            else:
+                response = api.response_class(cached_response.body, mimetype='application/json')
+            response.set_etag(cached_response.etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        @api.route('/vision/api-timings', methods=['GET'])
+        def get_api_timings():
+            return make_response(jsonify({"data": request_timer.get_summary()}))
+
+        @api.route('/metrics', methods=['GET'])
+        def get_metrics():
+            if metrics_registry is None:
+                return make_response(jsonify({"error": "No metrics registry"}), 404)
+            return api.response_class(metrics_registry.render(), content_type=EXPOSITION_CONTENT_TYPE)
+
+        @api.route('/vision/trace', methods=['GET'])
+        def get_trace():
+            if tracer is None:
+                return make_response(jsonify({"error": "No tracer"}), 404)
+            return make_response(jsonify(tracer.to_chrome_trace()))
+
+        @api.route('/vision/trace/<action>', methods=['POST'])
+        def control_trace(action):
+            if tracer is None:
+                return make_response(jsonify({"error": "No tracer"}), 404)
+
+            if action == 'start':
+                tracer.enable()
+            elif action == 'stop':
+                tracer.disable()
+            elif action == 'clear':
+                tracer.clear()
+            elif action == 'dump':
+                return make_response(jsonify({"message": "ok", "path": tracer.dump(config.TRACE_DIRECTORY),
+                                              "events": tracer.get_event_count()}))
+            else:
+                return make_response(jsonify({"error": "Unknown trace action {}".format(action)}), 404)
+
+            return make_response(jsonify({"message": "ok", "enabled": tracer.is_enabled(),
+                                          "events": tracer.get_event_count()}))
+
+        @api.route('/vision/response-cache', methods=['GET'])
+        def get_response_cache_statistics():
+            return make_response(jsonify({"data": response_cache.get_statistics()}))
+
+        @api.route('/vision/pipeline', methods=['GET'])
+        def get_pipeline_occupancy():
+            if pipeline is None:
+                return make_response(jsonify({"error": "No pipeline running"}), 404)
+            return make_response(jsonify({"data": pipeline.get_occupancy()}))
+
+        @api.route('/vision/stream', methods=['GET'])
+        def get_stream_statistics():
+            if frame_publisher is None:
+                return make_response(jsonify({"error": "No world state stream"}), 404)
+            return make_response(jsonify({"data": frame_publisher.get_statistics()}))
+
+        @api.route('/vision/debug-stream', methods=['GET'])
+        def get_debug_stream():
+            if mjpeg_broadcaster is None:
+                return make_response(jsonify({"error": "No debug stream"}), 404)
+            try:
+                stream = mjpeg_broadcaster.open_stream()
+            except TooManyViewers as e:
+                return make_response(jsonify({"error": type(e).__name__}), 503)
+            response = Response(stream, mimetype=MJPEG_MIMETYPE, direct_passthrough=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        @api.route('/vision/debug-stream/statistics', methods=['GET'])
+        def get_debug_stream_statistics():
+            if mjpeg_broadcaster is None:
+                return make_response(jsonify({"error": "No debug stream"}), 404)
+            return make_response(jsonify({"data": mjpeg_broadcaster.get_statistics()}))
+
+        @api.route('/vision/subscriptions', methods=['GET'])
+        def get_subscription_statistics():
+            if subscription_server is None:
+                return make_response(jsonify({"error": "No subscription server"}), 404)
+            return make_response(jsonify({"data": subscription_server.get_statistics()}))
+
+        @api.route('/vision/keyframe', methods=['POST'])
+        def request_keyframe():
+            if world_state_encoder is None:
+                return make_response(jsonify({"error": "No world state stream"}), 404)
+            world_state_encoder.request_keyframe()
+            return make_response(jsonify({"message": "ok", "sequence": world_state_encoder.get_sequence()}))
 
         @api.route('/vision/reset-rendering', methods=['POST'])
         def reset_rendering():
@@ -48,10 +186,9 @@ class ApplicationFactory:
 
         @api.route('/world-dimensions')
         def get_world_dimension():
-            world = image_to_world_translation.get_world()
-            world_dimension_body = message_assembler.get_world_dimension(world)
-            response_body = {"world_dimensions": world_dimension_body}
-            return make_response(jsonify(response_body))
+            return serve_versioned_resource('world-dimensions', lambda snapshot: snapshot.versions.world,
+                                            lambda snapshot: {"world_dimensions":
+                                                              message_assembler.get_world_dimension(snapshot.world)})
 
         @api.route('/path', methods=["POST"])
         def create_path():
@@ -62,85 +199,96 @@ class ApplicationFactory:
 
             path = data['data']['path']
             data_logger.reset_robot_positions()
-            data_logger.set_path(image_to_world_translation.translate_path(path))
+            target_to_world = get_target_to_world(world_snapshot_store.get_latest())
+            data_logger.set_path(image_to_world_translation.translate_path(path, target_to_world))
             return make_response(jsonify({"message": "ok"}))
 
         @api.route('/obstacles', methods=["GET"])
         def get_obstacles():
-            obstacles = image_to_world_translation.get_obstacles()
-            obstacles_body = message_assembler.get_obstacles(obstacles)
-            response_body = {"data": {"obstacles": obstacles_body}}
-            return make_response(jsonify(response_body))
+            return serve_versioned_resource('obstacles', lambda snapshot: snapshot.versions.obstacles,
+                                            lambda snapshot: {"data": {"obstacles": message_assembler.get_obstacles(
+                                                snapshot.obstacles)}})
 
         @api.route('/drawzone-corners')
         def get_drawzone_corners():
-            top_right = image_to_world_translation._drawing_area._top_right
-            return make_response(jsonify({
-                "data": {
-                    "top_right": {
-                        "x": str(top_right[0] * config.TARGET_SIDE_LENGTH),
-                        "y": str(top_right[1] * config.TARGET_SIDE_LENGTH)
-                    }
-                }
-            }))
+            return serve_versioned_resource('drawzone-corners', lambda snapshot: snapshot.versions.drawing_area,
+                                            lambda snapshot: {"data": message_assembler.get_drawzone_corners(
+                                                snapshot.drawing_area)})
 
         @api.route('/image/segmentation', methods=["POST"])
         def receive_image():
-            if request.args.get('fake'):
-                images = glob.glob('../data/images/figures/*.jpg')
-                image = cv2.imread(random.choice(images))
-                data = request.json
-                scaling_factor = float(data['scaling'])
-                orientation = float(ORIENTATION[data['orientation']])
+            if request.mimetype in BINARY_IMAGE_MIMETYPES:
+                parameters = request.args
+                image_data = request.get_data()
+                if len(image_data) == 0:
+                    return make_response(jsonify({"error": "No image in request"}), 404)
+                thresholded_image = base64.b64encode(image_data).decode('utf-8')
+            else:
+                parameters = request.get_json(silent=True) or {}
+                if request.args.get('fake'):
+                    with open(random.choice(glob.glob('../data/images/figures/*.jpg')), 'rb') as image_file:
+                        image_data = image_file.read()
+                    thresholded_image = None
+                elif 'image' in parameters:
+                    thresholded_image = parameters['image']
+                    image_data = base64.b64decode(thresholded_image)
+                else:
+                    return make_response(jsonify({"error": "No image in request"}), 404)
 
-                try:
-                    segments, segmented_image, center_of_mass, mask = segment_image(image)
-                    segments, world_segments = image_to_world_translation.transform_segments(segmented_image, segments,
-                                                                                             scaling_factor,
-                                                                                             orientation)
-                    data_logger.set_figure_drawing(segments)
-
-                    success, segmented_image_encoded = cv2.imencode('.jpg', segmented_image)
-                    ret, mask_encoded = cv2.imencode('.jpg', mask)
-
-                    body = {
-                        "image": base64.b64encode(segmented_image_encoded).decode('utf-8'),
-                        "thresholded_image": base64.b64encode(mask_encoded).decode('utf-8'),
-                        "segments": world_segments
-                    }
-                except NoSegmentsFound as e:
-                    body = {
-                        "error": type(e).__name__
-                    }
+            try:
+                scaling_factor = float(parameters['scaling'])
+                orientation = float(ORIENTATION[parameters['orientation']])
+            except (KeyError, ValueError):
+                return make_response(jsonify({"error": "Invalid scaling or orientation"}), 400)
 
-                return make_response(jsonify(body))
-            else:
-                data = request.json
+            snapshot = world_snapshot_store.get_latest()
+            target_to_world = get_target_to_world(snapshot)
+            if target_to_world is None:
+                return make_response(jsonify({"error": "No world detected"}), 503)
+            if snapshot.drawing_area is None:
+                return make_response(jsonify({"error": "Drawing area not detected"}), 409)
 
-                scaling_factor = float(data['scaling'])
-                orientation = float(ORIENTATION[data['orientation']])
+            cache_key = create_segmentation_key(image_data, scaling_factor, orientation, snapshot)
+            result = segmentation_cache.get(cache_key)
+            cache_status = 'HIT'
 
+            if result is None:
+                cache_status = 'MISS'
                 try:
-                    image = base64.b64decode(data['image'])
-                    img = Image.open(BytesIO(image)).convert('RGB')
-                    opencv_image = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-                    segments, segmented_image, center_of_mass, mask = segment_image(opencv_image)
-                    success, segmented_image_encoded = cv2.imencode('.jpg', segmented_image)
-                    success, mask_encoded = cv2.imencode('.jpg', opencv_image)
-                    segments, world_segments = image_to_world_translation.transform_segments(segmented_image, segments,
-                                                                                             scaling_factor,
-                                                                                             orientation)
-                    data_logger.set_figure_drawing(segments)
-                    body = {
-                        "image": base64.b64encode(segmented_image_encoded).decode('utf-8'),
-                        "thresholded_image": base64.b64encode(mask_encoded).decode('utf-8'),
-                        "segments": world_segments
-                    }
-                    return make_response(jsonify(body))
-                except KeyError:
-                    error_message = "No image in request"
-                    return make_response(jsonify({"error": error_message}), 404)
+                    if segmentation_offloader is not None:
+                        segmentation = segmentation_offloader.run(segment_encoded_image, image_data,
+                                                                  timeout=config.API_OFFLOAD_TIMEOUT)
+                    else:
+                        segmentation = segment_encoded_image(image_data)
+                    segments, segmented_image_shape, segmented_image_encoded, mask_encoded = segmentation
+                except (OffloaderSaturated, futures.TimeoutError) as e:
+                    return make_response(jsonify({"error": type(e).__name__}), 503)
+                except InvalidImage as e:
+                    return make_response(jsonify({"error": type(e).__name__}), 400)
                 except NoSegmentsFound as e:
+                    if request.args.get('fake'):
+                        return make_response(jsonify({"error": type(e).__name__}))
                     return make_response(jsonify({"error": type(e).__name__}), 404)
 
+                segments, world_segments = image_to_world_translation.transform_segments(segmented_image_shape,
+                                                                                         segments, scaling_factor,
+                                                                                         orientation, target_to_world,
+                                                                                         snapshot.drawing_area)
+                result = SegmentationResult(segments, world_segments,
+                                            base64.b64encode(segmented_image_encoded).decode('utf-8'),
+                                            thresholded_image or base64.b64encode(mask_encoded).decode('utf-8'))
+                segmentation_cache.put(cache_key, result)
+
+            data_logger.set_figure_drawing(result.segments)
+
+            body = {
+                "image": result.image,
+                "thresholded_image": result.thresholded_image,
+                "segments": result.world_segments.tolist()
+            }
+            response = make_response(jsonify(body))
+            response.headers['X-Cache'] = cache_status
+            response.headers['X-Cache-Hit-Rate'] = '{:.3f}'.format(segmentation_cache.get_hit_rate())
+            return response
+
         return api
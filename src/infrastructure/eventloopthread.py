@@ -0,0 +1,44 @@
+import asyncio
+from threading import Thread, Event
+
+
+class EventLoopThread:
+    def __init__(self, name="event-loop"):
+        self._name = name
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        started = Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._run, args=(started,), name=self._name, daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+
+    def get_loop(self):
+        return self._loop
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def call_soon(self, callback, *args):
+        self._loop.call_soon_threadsafe(callback, *args)
+
+    def _run(self, started):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(started.set)
+        self._loop.run_forever()
+
+        pending_tasks = asyncio.all_tasks(self._loop)
+        for task in pending_tasks:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*pending_tasks, return_exceptions=True))
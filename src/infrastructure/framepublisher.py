@@ -0,0 +1,102 @@
+import json
+import time
+from threading import Condition, Thread
+
+import numpy as np
+
+from infrastructure.jpegencoder import JpegEncoder
+from infrastructure.tracer import NULL_TRACER
+
+POLL_TIMEOUT = 0.1
+
+
+class FramePublisher:
+    def __init__(self, websocket_publisher, world_state_encoder, jpeg_quality, image_scale):
+        self._websocket_publisher = websocket_publisher
+        self._world_state_encoder = world_state_encoder
+        self._jpeg_encoder = JpegEncoder(jpeg_quality, image_scale)
+        self._condition = Condition()
+        self._pending_image = None
+        self._pending_world_snapshot = None
+        self._has_pending_frame = False
+        self._working_image = None
+        self._published_count = 0
+        self._dropped_count = 0
+        self._last_encode_time = 0.
+        self._running = False
+        self._thread = None
+        self._encode_histograms = None
+        self._tracer = NULL_TRACER
+
+    def start(self):
+        self._running = True
+        self._thread = Thread(target=self._run, name="frame-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def publish(self, image, world_snapshot):
+        with self._condition:
+            if self._has_pending_frame:
+                self._dropped_count += 1
+
+            if self._pending_image is None or self._pending_image.shape != image.shape:
+                self._pending_image = np.empty_like(image)
+            np.copyto(self._pending_image, image)
+
+            self._pending_world_snapshot = world_snapshot
+            self._has_pending_frame = True
+            self._condition.notify()
+
+    def instrument(self, metrics_registry, tracer=NULL_TRACER):
+        self._tracer = tracer
+        self._encode_histograms = metrics_registry.histogram('vision_frame_encode_seconds',
+                                                             'Time spent preparing a frame for the base station.')
+        self._websocket_publisher.instrument(metrics_registry)
+
+    def get_statistics(self):
+        return {
+            "published": self._published_count,
+            "dropped": self._dropped_count,
+            "last_encode_ms": self._last_encode_time * 1000,
+            "websocket": self._websocket_publisher.get_statistics()
+        }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._has_pending_frame:
+                    self._condition.wait(POLL_TIMEOUT)
+                if not self._running:
+                    break
+
+                self._working_image, self._pending_image = self._pending_image, self._working_image
+                world_snapshot = self._pending_world_snapshot
+                self._has_pending_frame = False
+
+            self._send(self._working_image, world_snapshot)
+
+    def _send(self, image, world_snapshot):
+        start = time.perf_counter()
+        image_data = self._jpeg_encoder.encode(image)
+        image_encoded = time.perf_counter()
+        metadata = json.dumps(self._world_state_encoder.encode(world_snapshot, image.shape,
+                                                               self._jpeg_encoder.get_scaled_shape(),
+                                                               self._jpeg_encoder.get_image_scale()))
+        end = time.perf_counter()
+        self._last_encode_time = end - start
+
+        if self._encode_histograms is not None:
+            self._encode_histograms.labels(step='jpeg').observe(image_encoded - start)
+            self._encode_histograms.labels(step='world_state').observe(end - image_encoded)
+        self._tracer.add_complete_event("jpeg", 'publish', start, image_encoded - start)
+        self._tracer.add_complete_event("world_state", 'publish', image_encoded, end - image_encoded)
+
+        self._websocket_publisher.publish([metadata, image_data])
+        self._published_count += 1
@@ -0,0 +1,29 @@
+import cv2
+import numpy as np
+
+
+class JpegEncoder:
+    def __init__(self, jpeg_quality, image_scale=1):
+        self._encode_parameters = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self._image_scale = image_scale
+        self._scaled_image = None
+        self._scaled_shape = None
+
+    def encode(self, image):
+        if self._image_scale != 1:
+            height, width = image.shape[0:2]
+            scaled_size = (int(width * self._image_scale), int(height * self._image_scale))
+            if self._scaled_image is None or self._scaled_image.shape[1::-1] != scaled_size:
+                self._scaled_image = np.empty((scaled_size[1], scaled_size[0]) + image.shape[2:], dtype=image.dtype)
+            cv2.resize(image, scaled_size, dst=self._scaled_image, interpolation=cv2.INTER_AREA)
+            image = self._scaled_image
+
+        self._scaled_shape = image.shape
+        success, image_data = cv2.imencode('.jpg', image, self._encode_parameters)
+        return image_data.tobytes()
+
+    def get_image_scale(self):
+        return self._image_scale
+
+    def get_scaled_shape(self):
+        return self._scaled_shape
@@ -3,57 +3,72 @@ import base64
 import cv2
 import numpy as np
 
-from domain.world.drawingarea import DrawingArea
 
-IMAGE_DIMINUTION_RATIO = 2
+class MessageAssembler:
+    def create_world_state_delta_dto(self, sequence, keyframe, world_snapshot, changed_components, original_shape,
+                                     sent_shape, image_scale):
+        world = {}
+        if 'robot' in changed_components:
+            world["robot"] = self.serialize_robot(world_snapshot.robot)
+        if 'world' in changed_components:
+            world["base_table"] = self.serialize_table(world_snapshot.world, image_scale)
+        if 'obstacles' in changed_components:
+            world["obstacles"] = self.serialize_obstacles(world_snapshot.obstacles)
+        if 'drawing_area' in changed_components:
+            world["drawing_area"] = self.serialize_drawing_area(world_snapshot.drawing_area)
+
+        data = {"world": world}
+        if keyframe:
+            data["image"] = {
+                "encoding": "jpeg",
+                "ratio": 0.378,
+                "original_dimension": {"width": original_shape[1], "height": original_shape[0]},
+                "sent_dimension": {"width": sent_shape[1], "height": sent_shape[0]}
+            }
+            world["unit"] = "mm"
 
+        return {
+            "headers": "push_vision_keyframe" if keyframe else "push_vision_delta",
+            "sequence": sequence,
+            "data": data
+        }
 
-class MessageAssembler:
-    def create_world_state_dto(self, image, world_state):
-        world_elements = world_state._image_elements
-        robot = world_state._robot
-        world = world_state._world
+    def serialize_robot(self, robot):
+        if robot is None:
+            return None
+        return {
+            "position": {"x": robot.x, "y": robot.y},
+            "orientation": float(np.deg2rad(robot.angle))
+        }
 
-        drawing_area = self.extract_drawing_area(world_elements)
-        obstacles = self.extract_obstacles(world_elements)
+    def serialize_table(self, world, image_scale):
+        if world is None:
+            return None
         return {
-            "headers": "push_vision_data",
-            "data": {
-                "image": {
-                    "ratio": "0.378",
-                    "origin": self.get_world_origin(world),
+            "dimension": {"width": world.width, "height": world.length},
+            "origin": {"x": world.origin_x * image_scale, "y": world.origin_y * image_scale}
+        }
 
-                    "data": self.prepare_image(image),
-                    "original_dimension": {
-                        "width": "1280",
-                        "height": "800"
-                    },
-                    "sent_dimension": {
-                        "width": "1280",
-                        "height": "800"
-                    }
-                },
-                "world": {
-                    "unit": "mm",
-                    "base_table": {
-                        "dimension": self.get_world_dimension(world)
-                    },
-                    "robot": {
-                        "position": self.get_robot_position(robot),
-                        "orientation": self.get_robot_orientation(robot)
-                    },
-                    "obstacles": self.get_obstacles(obstacles),
-                    "drawing_area": self.get_drawing_area(drawing_area)
-                },
+    def serialize_obstacles(self, obstacles):
+        return [{"position": {"x": obstacle.x, "y": obstacle.y},
+                 "tag": obstacle.tag,
+                 "dimension": {"width": 200, "length": 200}}
+                for obstacle in obstacles]
 
-            }
+    def serialize_drawing_area(self, drawing_area):
+        if drawing_area is None:
+            return None
+        return {
+            "dimension": {"width": drawing_area.width, "length": drawing_area.length},
+            "top_right": {"x": drawing_area.top_right_x, "y": drawing_area.top_right_y}
+            if drawing_area.top_right_x is not None else None
         }
 
     def get_world_dimension(self, world):
         if world is not None:
             return {
-                "width": str(world._width * 10),
-                "height": str(world._length * 10)
+                "width": str(world.width),
+                "height": str(world.length)
             }
         else:
             return {
@@ -61,76 +76,35 @@ class MessageAssembler:
                 "height": ""
             }
 
-    def get_world_origin(self, world):
-        if world is not None:
-            return {
-                "x": str(world._image_origin._x / IMAGE_DIMINUTION_RATIO),
-                "y": str(world._image_origin._y / IMAGE_DIMINUTION_RATIO)
-            }
-        else:
-            return {
-                "x": "",
-                "y": ""
-            }
-
-    def get_robot_position(self, robot):
-        if robot is not None:
-            robot_position = {
-                "x": str((robot._world_position[0])),
-                "y": str((robot._world_position[1]))
-            }
-            return robot_position
-        else:
-            return {
-                "x": "",
-                "y": ""
-            }
-
-    def get_robot_orientation(self, robot):
-        if robot is not None:
-            return str(np.deg2rad(robot._angle))
-        else:
-            return ""
-
     def get_obstacles(self, obstacles):
 
         if obstacles is not None:
-            return [{"position": {"x": obstacle._world_position[0], "y": obstacle._world_position[1]},
-                     "tag": obstacle._orientation.upper(),
+            return [{"position": {"x": obstacle.x, "y": obstacle.y},
+                     "tag": obstacle.tag,
                      "dimension": {"width": "200", "length": "200"}}
                     for obstacle in obstacles]
         else:
             return []
 
+    def get_drawzone_corners(self, drawing_area):
+        if drawing_area is not None and drawing_area.top_right_x is not None:
+            return {
+                "top_right": {
+                    "x": str(drawing_area.top_right_x),
+                    "y": str(drawing_area.top_right_y)
+                }
+            }
+        else:
+            return {
+                "top_right": {
+                    "x": "",
+                    "y": ""
+                }
+            }
+
     def prepare_image(self, image):
         image = cv2.resize(image, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_CUBIC)
         cnt = cv2.imencode('.jpeg', image)[1]
         image_data = base64.b64encode(cnt)
         image_data = image_data.decode('utf-8')
         return image_data
-
-    def get_drawing_area(self, drawing_area):
-        if drawing_area is not None:
-            return {
-                "dimension": {
-                    "width": drawing_area._inner_square_dimension['width'] * 10,
-                    "length": drawing_area._inner_square_dimension['length'] * 10
-                }
-
-            }
-        else:
-            return ""
-
-    def extract_obstacles(self, world_elements):
-        obstacles = []
-        for element in world_elements:
-            if isinstance(element, list):
-                obstacles = element
-        return obstacles
-
-    def extract_drawing_area(self, world_elements):
-        drawing_areas = [element for element in world_elements if isinstance(element, DrawingArea)]
-        if len(drawing_areas) > 0:
-            return drawing_areas[0]
-        else:
-            return None
@@ -0,0 +1,154 @@
+import time
+from bisect import bisect_left
+from collections import deque
+from threading import Lock
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5)
+RATE_WINDOW = 64
+RATE_STALE_AFTER = 1.  # in seconds without a mark before the rate drops to zero
+EXPOSITION_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+        self._function = None
+        self._lock = Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def set_function(self, function):
+        self._function = function
+
+    def get(self):
+        return self._function() if self._function is not None else self._value
+
+    def render(self, name, labels):
+        return ['{}{} {}'.format(name, _format_labels(labels), _format_value(self.get()))]
+
+
+class Gauge(Counter):
+    def set(self, value):
+        self._value = value
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._bounds = tuple(buckets)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.
+        self._lock = Lock()
+
+    def observe(self, value):
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def get_count(self):
+        return sum(self._counts)
+
+    def render(self, name, labels):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        lines = []
+        cumulative_count = 0
+        for bound, count in zip(self._bounds + (float('inf'),), counts):
+            cumulative_count += count
+            bucket_labels = labels + (('le', _format_value(bound)),)
+            lines.append('{}_bucket{} {}'.format(name, _format_labels(bucket_labels), cumulative_count))
+        lines.append('{}_sum{} {}'.format(name, _format_labels(labels), _format_value(total)))
+        lines.append('{}_count{} {}'.format(name, _format_labels(labels), cumulative_count))
+        return lines
+
+
+class MetricFamily:
+    def __init__(self, name, help_text, metric_type, create_metric):
+        self._name = name
+        self._help_text = help_text
+        self._metric_type = metric_type
+        self._create_metric = create_metric
+        self._metrics = {}
+        self._lock = Lock()
+
+    def labels(self, **labels):
+        key = tuple(sorted(labels.items()))
+        metric = self._metrics.get(key)
+
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, self._create_metric())
+        return metric
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self._name, self._help_text),
+                 '# TYPE {} {}'.format(self._name, self._metric_type)]
+        for labels, metric in sorted(list(self._metrics.items()), key=lambda item: item[0]):
+            lines.extend(metric.render(self._name, labels))
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families = {}
+        self._lock = Lock()
+
+    def counter(self, name, help_text):
+        return self._get_family(name, help_text, 'counter', Counter)
+
+    def gauge(self, name, help_text):
+        return self._get_family(name, help_text, 'gauge', Gauge)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self._get_family(name, help_text, 'histogram', lambda: Histogram(buckets))
+
+    def render(self):
+        with self._lock:
+            families = [self._families[name] for name in sorted(self._families)]
+
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+    def _get_family(self, name, help_text, metric_type, create_metric):
+        with self._lock:
+            if name not in self._families:
+                self._families[name] = MetricFamily(name, help_text, metric_type, create_metric)
+            return self._families[name]
+
+
+class RateMeter:
+    def __init__(self, window=RATE_WINDOW):
+        self._timestamps = deque(maxlen=window)
+
+    def mark(self):
+        self._timestamps.append(time.perf_counter())
+
+    def get_rate(self):
+        timestamps = list(self._timestamps)
+        if len(timestamps) < 2 or time.perf_counter() - timestamps[-1] > RATE_STALE_AFTER:
+            return 0.
+        return (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+
+def _format_labels(labels):
+    if len(labels) == 0:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, _escape_label_value(value)) for name, value in labels) + '}'
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return str(int(value))
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
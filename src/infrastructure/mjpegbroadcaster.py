@@ -0,0 +1,145 @@
+import time
+from threading import Condition, Thread
+
+import numpy as np
+
+from infrastructure.jpegencoder import JpegEncoder
+
+POLL_TIMEOUT = 0.1
+MJPEG_BOUNDARY = 'frame'
+MJPEG_MIMETYPE = 'multipart/x-mixed-replace; boundary={}'.format(MJPEG_BOUNDARY)
+
+
+class TooManyViewers(Exception):
+    pass
+
+
+class MjpegBroadcaster:
+    def __init__(self, jpeg_quality, image_scale, max_client_count):
+        self._jpeg_encoder = JpegEncoder(jpeg_quality, image_scale)
+        self._max_client_count = max_client_count
+        self._condition = Condition()
+        self._frame_condition = Condition()
+        self._pending_image = None
+        self._has_pending_image = False
+        self._working_image = None
+        self._frame = None
+        self._sequence = 0
+        self._client_count = 0
+        self._skipped_count = 0
+        self._last_encode_time = 0.
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = Thread(target=self._run, name="mjpeg-broadcaster", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        with self._frame_condition:
+            self._frame_condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def publish(self, image):
+        if self._client_count == 0:
+            return
+
+        with self._condition:
+            if self._pending_image is None or self._pending_image.shape != image.shape:
+                self._pending_image = np.empty_like(image)
+            np.copyto(self._pending_image, image)
+
+            self._has_pending_image = True
+            self._condition.notify()
+
+    def open_stream(self):
+        with self._frame_condition:
+            if self._client_count >= self._max_client_count:
+                raise TooManyViewers()
+            self._client_count += 1
+        return MjpegStream(self)
+
+    def get_statistics(self):
+        return {
+            "clients": self._client_count,
+            "encoded": self._sequence,
+            "skipped": self._skipped_count,
+            "last_encode_ms": self._last_encode_time * 1000
+        }
+
+    def _close_stream(self):
+        with self._frame_condition:
+            self._client_count -= 1
+            if self._client_count == 0:
+                self._frame = None
+
+    def _wait_for_frame(self, last_sequence):
+        with self._frame_condition:
+            while self._running and (self._frame is None or self._frame[0] <= last_sequence):
+                self._frame_condition.wait(POLL_TIMEOUT)
+            if not self._running:
+                return None
+
+            sequence, part = self._frame
+            if last_sequence > 0:
+                self._skipped_count += sequence - last_sequence - 1
+            return sequence, part
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._has_pending_image:
+                    self._condition.wait(POLL_TIMEOUT)
+                if not self._running:
+                    break
+
+                self._working_image, self._pending_image = self._pending_image, self._working_image
+                self._has_pending_image = False
+
+            part = self._encode(self._working_image)
+
+            with self._frame_condition:
+                self._sequence += 1
+                self._frame = (self._sequence, part)
+                self._frame_condition.notify_all()
+
+    def _encode(self, image):
+        start = time.perf_counter()
+
+        image_data = self._jpeg_encoder.encode(image)
+        header = '--{}\r\nContent-Type: image/jpeg\r\nContent-Length: {}\r\n\r\n'.format(MJPEG_BOUNDARY,
+                                                                                         len(image_data))
+        part = header.encode('ascii') + image_data + b'\r\n'
+
+        self._last_encode_time = time.perf_counter() - start
+        return part
+
+
+class MjpegStream:
+    def __init__(self, broadcaster):
+        self._broadcaster = broadcaster
+        self._last_sequence = 0
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        frame = self._broadcaster._wait_for_frame(self._last_sequence)
+        if frame is None:
+            self.close()
+            raise StopIteration
+
+        self._last_sequence, part = frame
+        return part
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._broadcaster._close_stream()
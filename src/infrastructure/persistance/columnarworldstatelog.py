@@ -0,0 +1,78 @@
+import numpy as np
+
+from domain.world.robot import Robot
+
+FRAME_COLUMNS = ['source', 'frame', 'robot_detected', 'robot_x', 'robot_y', 'robot_angle', 'table_detected',
+                 'table_width', 'table_length', 'obstacle_count']
+OBSTACLE_COLUMNS = ['obstacle_row', 'obstacle_x', 'obstacle_y', 'obstacle_tag']
+
+
+class ColumnarWorldStateLog:
+    def __init__(self):
+        self._frames = {column: [] for column in FRAME_COLUMNS}
+        self._obstacles = {column: [] for column in OBSTACLE_COLUMNS}
+
+    def append(self, source, frame_index, world_state, obstacles):
+        row = len(self._frames['frame'])
+        world = world_state._world
+        robot = world_state.get_robot()
+        robot_detected = robot is not None and world is not None and \
+            any(isinstance(element, Robot) for element in world_state.get_image_elements())
+
+        self._frames['source'].append(source)
+        self._frames['frame'].append(frame_index)
+        self._frames['robot_detected'].append(robot_detected)
+        self._frames['robot_x'].append(robot._world_position[0] if robot_detected else np.nan)
+        self._frames['robot_y'].append(robot._world_position[1] if robot_detected else np.nan)
+        self._frames['robot_angle'].append(robot._angle if robot_detected else np.nan)
+        self._frames['table_detected'].append(world is not None)
+        self._frames['table_width'].append(world._width * 10 if world is not None else np.nan)
+        self._frames['table_length'].append(world._length * 10 if world is not None else np.nan)
+
+        obstacles = obstacles if obstacles is not None and world is not None else []
+        self._frames['obstacle_count'].append(len(obstacles))
+
+        for obstacle in obstacles:
+            self._obstacles['obstacle_row'].append(row)
+            self._obstacles['obstacle_x'].append(obstacle._world_position[0])
+            self._obstacles['obstacle_y'].append(obstacle._world_position[1])
+            self._obstacles['obstacle_tag'].append(obstacle._orientation.upper())
+
+    def merge(self, other):
+        row_offset = len(self)
+
+        for column in FRAME_COLUMNS:
+            self._frames[column].extend(other._frames[column])
+
+        self._obstacles['obstacle_row'].extend([row + row_offset for row in other._obstacles['obstacle_row']])
+        for column in OBSTACLE_COLUMNS[1:]:
+            self._obstacles[column].extend(other._obstacles[column])
+
+    def as_columns(self):
+        return {
+            'source': np.array(self._frames['source'], dtype=str),
+            'frame': np.array(self._frames['frame'], dtype=np.int64),
+            'robot_detected': np.array(self._frames['robot_detected'], dtype=bool),
+            'robot_x': np.array(self._frames['robot_x'], dtype=np.float64),
+            'robot_y': np.array(self._frames['robot_y'], dtype=np.float64),
+            'robot_angle': np.array(self._frames['robot_angle'], dtype=np.float64),
+            'table_detected': np.array(self._frames['table_detected'], dtype=bool),
+            'table_width': np.array(self._frames['table_width'], dtype=np.float64),
+            'table_length': np.array(self._frames['table_length'], dtype=np.float64),
+            'obstacle_count': np.array(self._frames['obstacle_count'], dtype=np.int64),
+            'obstacle_row': np.array(self._obstacles['obstacle_row'], dtype=np.int64),
+            'obstacle_x': np.array(self._obstacles['obstacle_x'], dtype=np.float64),
+            'obstacle_y': np.array(self._obstacles['obstacle_y'], dtype=np.float64),
+            'obstacle_tag': np.array(self._obstacles['obstacle_tag'], dtype=str)
+        }
+
+    def save(self, filename):
+        np.savez_compressed(filename, **self.as_columns())
+
+    def __len__(self):
+        return len(self._frames['frame'])
+
+
+def load_world_state_columns(filename):
+    with np.load(filename) as columns:
+        return {column: columns[column] for column in columns.files}
@@ -0,0 +1,76 @@
+import glob
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from domain.camera.pixelworldmap import PixelWorldMap, generate_pixel_world_map
+
+
+class PixelWorldMapRepository:
+    def __init__(self, directory, image_shape, scale, cache_size, stale_delay):
+        self._directory = directory
+        self._image_shape = tuple(image_shape[0:2])
+        self._scale = scale
+        self._cache_size = cache_size
+        self._stale_delay = stale_delay
+        self._loaded_maps = {}
+        self._last_misses = {}
+
+    # A few maps per height are kept so the world going back and forth between transforms does not regenerate them
+    def find_or_create(self, camera_model, plane_height, target_to_world):
+        target_to_world = np.asarray(target_to_world, dtype=float)
+        signature = (camera_model, target_to_world.tobytes())
+        loaded_maps = self._loaded_maps.setdefault(plane_height, OrderedDict())
+
+        if signature in loaded_maps:
+            loaded_maps.move_to_end(signature)
+        else:
+            key = self._create_key(camera_model, plane_height, target_to_world)
+            loaded_maps[signature] = (key, self._load_or_generate(key, camera_model, plane_height, target_to_world))
+            if len(loaded_maps) > self._cache_size:
+                loaded_maps.popitem(last=False)
+            self._last_misses[plane_height] = time.monotonic()
+
+        self._prune_stale_maps(camera_model, plane_height)
+        return loaded_maps[signature][1]
+
+    def _load_or_generate(self, key, camera_model, plane_height, target_to_world):
+        filename = '{}{}.npy'.format(self._get_prefix(camera_model, plane_height), key)
+
+        if not os.path.exists(filename):
+            temporary_filename = '{}.{}.tmp'.format(filename, os.getpid())
+            map_data = np.lib.format.open_memmap(temporary_filename, mode='w+', dtype=np.float32,
+                                                 shape=self._image_shape + (2,))
+            generate_pixel_world_map(camera_model, plane_height, target_to_world, self._image_shape, self._scale,
+                                     out=map_data)
+            map_data.flush()
+            del map_data
+            os.replace(temporary_filename, filename)
+
+        return PixelWorldMap(np.load(filename, mmap_mode='r'))
+
+    # Files of other transforms are only deleted once the transforms in use have stayed put for the stale delay
+    def _prune_stale_maps(self, camera_model, plane_height):
+        last_miss = self._last_misses.get(plane_height)
+        if last_miss is None or time.monotonic() - last_miss < self._stale_delay:
+            return
+
+        del self._last_misses[plane_height]
+        prefix = self._get_prefix(camera_model, plane_height)
+        kept_filenames = {'{}{}.npy'.format(prefix, key) for key, _ in self._loaded_maps[plane_height].values()}
+        for filename in glob.glob('{}*.npy'.format(prefix)):
+            if filename not in kept_filenames:
+                os.remove(filename)
+
+    def _get_prefix(self, camera_model, plane_height):
+        return os.path.join(self._directory, 'pixel_world_map_{}_{:g}_'.format(camera_model.get_id(), plane_height))
+
+    def _create_key(self, camera_model, plane_height, target_to_world):
+        key = hashlib.sha1()
+        key.update(np.asarray(camera_model._camera_matrix, dtype=float).tobytes())
+        key.update(np.asarray([plane_height, self._scale] + list(self._image_shape), dtype=float).tobytes())
+        key.update(target_to_world.tobytes())
+        return key.hexdigest()[0:16]
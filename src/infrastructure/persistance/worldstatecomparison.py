@@ -0,0 +1,156 @@
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+AccuracyBudget = namedtuple('AccuracyBudget', ['robot_position_p95_mm', 'robot_angle_p95_deg', 'robot_detection_ratio',
+                                               'obstacle_position_p95_mm', 'obstacle_match_ratio', 'table_size_max_mm'])
+
+
+def summarize_errors(errors):
+    errors = np.asarray(errors, dtype=float)
+    if len(errors) == 0:
+        return OrderedDict([("count", 0), ("mean", None), ("p50", None), ("p95", None), ("max", None)])
+
+    return OrderedDict([
+        ("count", len(errors)),
+        ("mean", float(errors.mean())),
+        ("p50", float(np.percentile(errors, 50))),
+        ("p95", float(np.percentile(errors, 95))),
+        ("max", float(errors.max()))
+    ])
+
+
+def compare_world_state_logs(reference, candidate):
+    reference_rows, candidate_rows = _align_frames(reference, candidate)
+
+    return OrderedDict([
+        ("frames", OrderedDict([("reference", len(reference['frame'])), ("candidate", len(candidate['frame'])),
+                                ("compared", len(reference_rows))])),
+        ("robot", _compare_robot(reference, candidate, reference_rows, candidate_rows)),
+        ("table", _compare_table(reference, candidate, reference_rows, candidate_rows)),
+        ("obstacles", _compare_obstacles(reference, candidate, reference_rows, candidate_rows))
+    ])
+
+
+def find_budget_violations(comparison, budget):
+    robot = comparison["robot"]
+    obstacles = comparison["obstacles"]
+    table = comparison["table"]
+
+    checks = [
+        ("robot position p95 (mm)", robot["position_error_mm"]["p95"], budget.robot_position_p95_mm, False),
+        ("robot angle p95 (deg)", robot["angle_error_deg"]["p95"], budget.robot_angle_p95_deg, False),
+        ("robot detections kept", robot["detection_ratio"], budget.robot_detection_ratio, True),
+        ("obstacle position p95 (mm)", obstacles["position_error_mm"]["p95"], budget.obstacle_position_p95_mm, False),
+        ("obstacles matched", obstacles["match_ratio"], budget.obstacle_match_ratio, True),
+        ("table width max (mm)", table["width_error_mm"]["max"], budget.table_size_max_mm, False),
+        ("table length max (mm)", table["length_error_mm"]["max"], budget.table_size_max_mm, False)
+    ]
+
+    return [(name, value, limit) for name, value, limit, is_minimum in checks
+            if value is not None and limit is not None and (value < limit if is_minimum else value > limit)]
+
+
+def _align_frames(reference, candidate):
+    candidate_rows = {(source, frame): row
+                      for row, (source, frame) in enumerate(zip(candidate['source'], candidate['frame']))}
+
+    pairs = [(row, candidate_rows[(source, frame)])
+             for row, (source, frame) in enumerate(zip(reference['source'], reference['frame']))
+             if (source, frame) in candidate_rows]
+
+    if len(pairs) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return tuple(np.array(rows, dtype=np.int64) for rows in zip(*pairs))
+
+
+def _compare_detections(reference_detected, candidate_detected):
+    both = reference_detected & candidate_detected
+    reference_count = int(reference_detected.sum())
+
+    return both, OrderedDict([
+        ("reference_detections", reference_count),
+        ("kept", int(both.sum())),
+        ("lost", int((reference_detected & ~candidate_detected).sum())),
+        ("gained", int((~reference_detected & candidate_detected).sum())),
+        ("detection_ratio", both.sum() / float(reference_count) if reference_count > 0 else 1.)
+    ])
+
+
+def _compare_robot(reference, candidate, reference_rows, candidate_rows):
+    both, result = _compare_detections(reference['robot_detected'][reference_rows],
+                                       candidate['robot_detected'][candidate_rows])
+    reference_rows = reference_rows[both]
+    candidate_rows = candidate_rows[both]
+
+    position_errors = np.hypot(reference['robot_x'][reference_rows] - candidate['robot_x'][candidate_rows],
+                               reference['robot_y'][reference_rows] - candidate['robot_y'][candidate_rows])
+    angle_errors = np.abs((reference['robot_angle'][reference_rows] - candidate['robot_angle'][candidate_rows] + 180)
+                          % 360 - 180)
+
+    result["position_error_mm"] = summarize_errors(position_errors)
+    result["angle_error_deg"] = summarize_errors(angle_errors)
+    return result
+
+
+def _compare_table(reference, candidate, reference_rows, candidate_rows):
+    both, result = _compare_detections(reference['table_detected'][reference_rows],
+                                       candidate['table_detected'][candidate_rows])
+    reference_rows = reference_rows[both]
+    candidate_rows = candidate_rows[both]
+
+    result["width_error_mm"] = summarize_errors(np.abs(reference['table_width'][reference_rows] -
+                                                       candidate['table_width'][candidate_rows]))
+    result["length_error_mm"] = summarize_errors(np.abs(reference['table_length'][reference_rows] -
+                                                        candidate['table_length'][candidate_rows]))
+    return result
+
+
+# Obstacles are paired greedily within a frame, closest first, so a swapped detection order is not an error
+def _compare_obstacles(reference, candidate, reference_rows, candidate_rows):
+    reference_obstacles = _group_obstacles(reference)
+    candidate_obstacles = _group_obstacles(candidate)
+    position_errors = []
+    tag_mismatch_count = 0
+    count_mismatch_frame_count = 0
+    reference_count = 0
+
+    for reference_row, candidate_row in zip(reference_rows, candidate_rows):
+        reference_positions, reference_tags = reference_obstacles.get(reference_row, (np.zeros((0, 2)), []))
+        candidate_positions, candidate_tags = candidate_obstacles.get(candidate_row, (np.zeros((0, 2)), []))
+        reference_count += len(reference_positions)
+
+        if len(reference_positions) != len(candidate_positions):
+            count_mismatch_frame_count += 1
+        if len(reference_positions) == 0 or len(candidate_positions) == 0:
+            continue
+
+        distances = np.linalg.norm(reference_positions[:, np.newaxis] - candidate_positions[np.newaxis], axis=2)
+        for _ in range(min(distances.shape)):
+            reference_index, candidate_index = np.unravel_index(np.argmin(distances), distances.shape)
+            position_errors.append(distances[reference_index, candidate_index])
+            if reference_tags[reference_index] != candidate_tags[candidate_index]:
+                tag_mismatch_count += 1
+            distances[reference_index, :] = np.inf
+            distances[:, candidate_index] = np.inf
+
+    return OrderedDict([
+        ("reference_obstacles", reference_count),
+        ("matched", len(position_errors)),
+        ("match_ratio", len(position_errors) / float(reference_count) if reference_count > 0 else 1.),
+        ("count_mismatch_frames", count_mismatch_frame_count),
+        ("tag_mismatches", tag_mismatch_count),
+        ("position_error_mm", summarize_errors(position_errors))
+    ])
+
+
+def _group_obstacles(columns):
+    order = np.argsort(columns['obstacle_row'], kind='stable')
+    rows = columns['obstacle_row'][order]
+    positions = np.column_stack((columns['obstacle_x'], columns['obstacle_y']))[order]
+    tags = columns['obstacle_tag'][order]
+    unique_rows, starts = np.unique(rows, return_index=True)
+    stops = np.append(starts[1:], len(rows))
+
+    return {row: (positions[start:stop], tags[start:stop].tolist())
+            for row, start, stop in zip(unique_rows, starts, stops)}
@@ -0,0 +1,43 @@
+from service.image.detectionversion import get_detection_version
+from service.image.imagepreprocessing import preprocess_image
+
+
+# Runs in the worker processes, only the per frame detectors, the elements detected once come from the parent
+class DetectionWorker:
+    def __init__(self, camera_model, detection_service_factory):
+        self._camera_model = camera_model
+        self._detection_service_factory = detection_service_factory
+        self._detection_service = None
+        self._shared_elements = []
+
+    def __call__(self, image):
+        if self._detection_service is None:
+            self._detection_service = self._detection_service_factory()
+
+        image = preprocess_image(image, self._camera_model)
+        image_elements = self._detection_service.detect_per_frame_elements(image)
+        return image, image_elements + self._shared_elements
+
+    def share_detected_elements(self, elements):
+        self._shared_elements = list(elements)
+
+
+# Runs in the parent ahead of the process pool so every worker translates the same table, drawing area and obstacles
+class SharedElementDetection:
+    def __init__(self, camera_model, detection_service, process_pool_stage):
+        self._camera_model = camera_model
+        self._detection_service = detection_service
+        self._process_pool_stage = process_pool_stage
+        self._shared_versions = None
+
+    def __call__(self, frame):
+        if not self._detection_service.has_detected_once_elements() or self._shared_versions is None:
+            image = preprocess_image(frame.get_image(), self._camera_model)
+            elements = self._detection_service.detect_once_elements(image)
+            versions = [get_detection_version(element) for element in elements]
+
+            if versions != self._shared_versions:
+                self._process_pool_stage.broadcast('share_detected_elements', elements)
+                self._shared_versions = versions
+
+        return frame
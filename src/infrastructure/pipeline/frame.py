@@ -0,0 +1,45 @@
+class Frame:
+    def __init__(self, sequence, image):
+        self._sequence = sequence
+        self._image = image
+        self._image_elements = []
+        self._world_state = None
+        self._world_snapshot = None
+        self._release_callbacks = []
+        self._released = False
+
+    def get_sequence(self):
+        return self._sequence
+
+    def get_image(self):
+        return self._image
+
+    def set_image(self, image):
+        self._image = image
+
+    def get_image_elements(self):
+        return self._image_elements
+
+    def set_image_elements(self, image_elements):
+        self._image_elements = image_elements
+
+    def get_world_state(self):
+        return self._world_state
+
+    def set_world_state(self, world_state):
+        self._world_state = world_state
+
+    def get_world_snapshot(self):
+        return self._world_snapshot
+
+    def set_world_snapshot(self, world_snapshot):
+        self._world_snapshot = world_snapshot
+
+    def on_release(self, callback):
+        self._release_callbacks.append(callback)
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            for callback in self._release_callbacks:
+                callback(self)
@@ -0,0 +1,53 @@
+from collections import deque
+from threading import Condition
+
+
+class LatestFrameQueue:
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self._capacity = capacity
+        self._frames = deque()
+        self._condition = Condition()
+        self._dropped = 0
+
+    def put(self, frame):
+        dropped_frame = None
+
+        with self._condition:
+            if len(self._frames) >= self._capacity:
+                dropped_frame = self._frames.popleft()
+                self._dropped += 1
+            self._frames.append(frame)
+            self._condition.notify()
+
+        if dropped_frame is not None:
+            dropped_frame.release()
+
+    def get(self, timeout=None):
+        with self._condition:
+            if not self._frames:
+                self._condition.wait(timeout)
+
+            if self._frames:
+                return self._frames.popleft()
+            else:
+                return None
+
+    def clear(self):
+        with self._condition:
+            frames = list(self._frames)
+            self._frames.clear()
+
+        for frame in frames:
+            frame.release()
+
+    def size(self):
+        return len(self._frames)
+
+    def capacity(self):
+        return self._capacity
+
+    def dropped_count(self):
+        return self._dropped
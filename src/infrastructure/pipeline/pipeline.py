@@ -0,0 +1,105 @@
+import time
+from threading import Thread
+
+from infrastructure.pipeline.frame import Frame
+from infrastructure.pipeline.latestframequeue import LatestFrameQueue
+from infrastructure.pipeline.stage import Stage
+from infrastructure.tracer import NULL_TRACER
+
+IDLE_CAPTURE_DELAY = 0.001
+
+
+class Pipeline:
+    def __init__(self, image_source, queue_size=1):
+        self._image_source = image_source
+        self._queue_size = queue_size
+        self._stages = []
+        self._output = LatestFrameQueue(1)
+        self._running = False
+        self._capture_thread = None
+        self._captured = 0
+        self._capture_wait_histogram = None
+        self._tracer = NULL_TRACER
+
+    def add_stage(self, name, function, queue_size=None):
+        if queue_size is None:
+            queue_size = self._queue_size
+
+        return self.add(Stage(name, function, queue_size))
+
+    def add(self, stage):
+        if len(self._stages) > 0:
+            self._stages[-1].connect_to(stage.get_input())
+        stage.connect_to(self._output)
+
+        self._stages.append(stage)
+        return self
+
+    def start(self):
+        if len(self._stages) == 0:
+            raise ValueError("a pipeline needs at least one stage")
+
+        self._running = True
+        for stage in self._stages:
+            stage.start()
+
+        self._capture_thread = Thread(target=self._capture, name="stage-capture", daemon=True)
+        self._capture_thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._capture_thread is not None:
+            self._capture_thread.join()
+
+        for stage in self._stages:
+            stage.stop()
+        self._output.clear()
+
+    def is_running(self):
+        return self._running
+
+    def next_output(self, timeout=None):
+        return self._output.get(timeout)
+
+    def instrument(self, metrics_registry, tracer=NULL_TRACER):
+        self._tracer = tracer
+        self._capture_wait_histogram = metrics_registry.histogram(
+            'vision_capture_wait_seconds', 'Time spent waiting for the image source to deliver a new image.').labels()
+        metrics_registry.counter('vision_frames_captured_total', 'Frames captured from the image source.').labels() \
+            .set_function(lambda: self._captured)
+        metrics_registry.counter('vision_stage_frames_total', 'Frames handled by a pipeline stage.').labels(
+            stage='output', outcome='dropped').set_function(self._output.dropped_count)
+
+        for stage in self._stages:
+            stage.instrument(metrics_registry, tracer)
+
+    def get_occupancy(self):
+        return {
+            "captured": self._captured,
+            "stages": [stage.get_occupancy() for stage in self._stages]
+        }
+
+    def _capture(self):
+        previous_image = None
+        first_stage_input = self._stages[0].get_input()
+
+        wait_start = time.perf_counter()
+
+        while self._running and self._image_source.has_next_image():
+            image = self._image_source.next_image()
+
+            if image is None or image is previous_image:
+                time.sleep(IDLE_CAPTURE_DELAY)
+                continue
+
+            wait_time = time.perf_counter() - wait_start
+            if self._capture_wait_histogram is not None:
+                self._capture_wait_histogram.observe(wait_time)
+            self._tracer.add_complete_event("capture", 'stage', wait_start, wait_time, self._captured)
+
+            previous_image = image
+            first_stage_input.put(Frame(self._captured, image))
+            self._captured += 1
+            wait_start = time.perf_counter()
+
+        self._running = False
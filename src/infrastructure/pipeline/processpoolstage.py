@@ -0,0 +1,256 @@
+import multiprocessing
+import os
+import queue
+import time
+from collections import Counter, OrderedDict
+from threading import Thread, Lock
+
+import numpy as np
+
+from infrastructure.pipeline.sharedframepool import SharedFramePool, SharedFrameViews
+from infrastructure.pipeline.stage import Stage, POLL_TIMEOUT
+
+
+def _run_worker(frame_processor, slot_names, shape, dtype, tasks, commands, results):
+    frames = SharedFrameViews(slot_names, shape, dtype)
+    applied_generation = 0
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            sequence, slot, generation = task
+
+            # Commands travel on their own queue, wait for every command broadcast before the task was submitted
+            while applied_generation < generation:
+                applied_generation, command, args = commands.get()
+                try:
+                    getattr(frame_processor, command)(*args)
+                except Exception as e:
+                    print("Frame processor command {} failure: {}".format(command, type(e).__name__))
+
+            image = frames.view(slot)
+            start = time.perf_counter()
+
+            try:
+                processed_image, result = frame_processor(image)
+                if processed_image is not image:
+                    np.copyto(image, processed_image)
+            except Exception as e:
+                print("Frame processor failure: {}".format(type(e).__name__))
+                result = None
+
+            results.put((sequence, result, start, time.perf_counter() - start, os.getpid()))
+    finally:
+        frames.close()
+
+
+class ProcessPoolStage(Stage):
+    def __init__(self, name, frame_processor, worker_count, slot_count, queue_size):
+        super().__init__(name, None, queue_size)
+        self._frame_processor = frame_processor
+        self._worker_count = worker_count
+        self._slot_count = slot_count
+        self._context = multiprocessing.get_context('spawn')
+        self._frame_pool = None
+        self._workers = []
+        self._tasks = []
+        self._commands = []
+        self._results = None
+        self._collector_thread = None
+        self._in_flight = {}
+        self._in_flight_lock = Lock()
+        self._assigned_workers = {}
+        self._next_submitted_sequence = 0
+        self._next_emitted_sequence = 0
+        self._pending_results = {}
+        self._generation = 0
+        self._latest_commands = OrderedDict()
+        self._restarted = 0
+
+    def start(self):
+        super().start()
+        self._collector_thread = Thread(target=self._collect, name="stage-{}-collector".format(self._name),
+                                        daemon=True)
+        self._collector_thread.start()
+
+    # The collector drains the frames in flight first, restarting dead workers, before the workers are stopped
+    def stop(self):
+        super().stop()
+
+        if self._collector_thread is not None:
+            self._collector_thread.join()
+
+        for tasks in self._tasks:
+            tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        self._tasks = []
+        self._commands = []
+
+        with self._in_flight_lock:
+            frames = list(self._in_flight.values())
+            self._in_flight.clear()
+            self._assigned_workers.clear()
+        for frame in frames:
+            frame.release()
+
+        if self._frame_pool is not None:
+            self._frame_pool.close()
+            self._frame_pool = None
+
+    # The latest arguments of every command are kept to bring workers started later up to date
+    def broadcast(self, command, *args):
+        with self._in_flight_lock:
+            self._generation += 1
+            self._latest_commands.pop(command, None)
+            self._latest_commands[command] = (self._generation, args)
+
+            for commands in self._commands:
+                commands.put((self._generation, command, args))
+
+    def get_occupancy(self):
+        occupancy = super().get_occupancy()
+        occupancy["workers"] = self._worker_count
+        occupancy["restarted"] = self._restarted
+        occupancy["in_flight"] = len(self._in_flight)
+        occupancy["free_slots"] = self._frame_pool.free_slot_count() if self._frame_pool is not None else None
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.
+        occupancy["busy"] = self._busy_time / (elapsed * self._worker_count) if elapsed > 0 else 0.
+        return occupancy
+
+    def _process(self, frame):
+        image = frame.get_image()
+
+        if self._frame_pool is None:
+            self._start_workers(image)
+
+        if not self._frame_pool.accepts(image):
+            print("Pipeline stage {} failure: frame does not match {}".format(self._name,
+                                                                              self._frame_pool.get_shape()))
+            self._failed += 1
+            frame.release()
+            return
+
+        slot = None
+        while slot is None and self._running:
+            slot = self._frame_pool.acquire(timeout=POLL_TIMEOUT)
+
+        if slot is None:
+            frame.release()
+            return
+
+        shared_image = self._frame_pool.view(slot)
+        np.copyto(shared_image, image)
+        frame.set_image(shared_image)
+        frame_pool = self._frame_pool
+        frame.on_release(lambda released_frame: frame_pool.release(slot))
+
+        # Each worker has its own task queue so the frames lost with a dead worker are known
+        with self._in_flight_lock:
+            sequence = self._next_submitted_sequence
+            self._next_submitted_sequence += 1
+            self._in_flight[sequence] = frame
+
+            worker_loads = Counter(self._assigned_workers.values())
+            worker_index = min(range(len(self._workers)), key=lambda index: worker_loads[index])
+            self._assigned_workers[sequence] = worker_index
+            self._tasks[worker_index].put((sequence, slot, self._generation))
+
+    def _start_workers(self, image):
+        with self._in_flight_lock:
+            self._frame_pool = SharedFramePool(self._slot_count, image.shape, image.dtype)
+            self._results = self._context.Queue()
+
+            for index in range(self._worker_count):
+                self._workers.append(None)
+                self._tasks.append(None)
+                self._commands.append(None)
+                self._start_worker(index)
+
+    def _start_worker(self, index):
+        tasks = self._context.Queue()
+        commands = self._context.Queue()
+        for command, (generation, args) in self._latest_commands.items():
+            commands.put((generation, command, args))
+
+        worker = self._context.Process(target=_run_worker, args=(
+            self._frame_processor,
+            self._frame_pool.get_names(),
+            self._frame_pool.get_shape(),
+            self._frame_pool.get_dtype(),
+            tasks,
+            commands,
+            self._results
+        ), daemon=True)
+        worker.start()
+
+        self._workers[index] = worker
+        self._tasks[index] = tasks
+        self._commands[index] = commands
+
+    def _collect(self):
+        while self._running or len(self._in_flight) > 0:
+            if self._results is None:
+                time.sleep(POLL_TIMEOUT)
+                continue
+
+            self._restart_dead_workers()
+
+            try:
+                sequence, result, start, duration, worker_id = self._results.get(timeout=POLL_TIMEOUT)
+            except queue.Empty:
+                continue
+
+            with self._in_flight_lock:
+                if self._assigned_workers.pop(sequence, None) is None:
+                    continue
+                frame = self._in_flight.get(sequence)
+
+            self._busy_time += duration
+            if self._duration_histogram is not None:
+                self._duration_histogram.observe(duration)
+            if self._tracer.is_enabled():
+                self._tracer.add_complete_event(self._name, 'stage', start, duration, frame.get_sequence(), worker_id,
+                                                "{}-worker-{}".format(self._name, worker_id))
+            self._pending_results[sequence] = result
+            self._emit_in_order()
+
+    # A worker killed by a crash or the OOM killer never answers, its frames fail so the ones after can be emitted
+    def _restart_dead_workers(self):
+        with self._in_flight_lock:
+            for index, worker in enumerate(self._workers):
+                if worker.is_alive():
+                    continue
+
+                print("Pipeline stage {} failure: worker {} exited with code {}".format(self._name, worker.pid,
+                                                                                      worker.exitcode))
+                lost_sequences = [sequence for sequence, worker_index in self._assigned_workers.items()
+                                  if worker_index == index]
+                for sequence in lost_sequences:
+                    del self._assigned_workers[sequence]
+                    self._pending_results[sequence] = None
+
+                self._start_worker(index)
+                self._restarted += 1
+
+        self._emit_in_order()
+
+    def _emit_in_order(self):
+        while self._next_emitted_sequence in self._pending_results:
+            result = self._pending_results.pop(self._next_emitted_sequence)
+
+            with self._in_flight_lock:
+                frame = self._in_flight.pop(self._next_emitted_sequence)
+            self._next_emitted_sequence += 1
+
+            if result is None:
+                self._failed += 1
+                frame.release()
+            else:
+                self._processed += 1
+                frame.set_image_elements(result)
+                self._output.put(frame)
@@ -0,0 +1,71 @@
+from collections import deque
+from multiprocessing import shared_memory
+from threading import Condition
+
+import numpy as np
+
+
+class SharedFramePool:
+    def __init__(self, slot_count, shape, dtype=np.uint8):
+        self._shape = tuple(shape)
+        self._dtype = np.dtype(dtype)
+        frame_size = int(np.prod(self._shape)) * self._dtype.itemsize
+
+        self._buffers = [shared_memory.SharedMemory(create=True, size=frame_size) for _ in range(slot_count)]
+        self._views = [np.ndarray(self._shape, self._dtype, buffer=buffer.buf) for buffer in self._buffers]
+        self._free_slots = deque(range(slot_count))
+        self._condition = Condition()
+
+    def get_shape(self):
+        return self._shape
+
+    def get_dtype(self):
+        return self._dtype
+
+    def get_names(self):
+        return [buffer.name for buffer in self._buffers]
+
+    def accepts(self, image):
+        return image.shape == self._shape and image.dtype == self._dtype
+
+    def acquire(self, timeout=None):
+        with self._condition:
+            if not self._free_slots:
+                self._condition.wait(timeout)
+
+            if self._free_slots:
+                return self._free_slots.popleft()
+            else:
+                return None
+
+    def release(self, slot):
+        with self._condition:
+            self._free_slots.append(slot)
+            self._condition.notify()
+
+    def view(self, slot):
+        return self._views[slot]
+
+    def free_slot_count(self):
+        return len(self._free_slots)
+
+    def close(self):
+        self._views = []
+        for buffer in self._buffers:
+            buffer.close()
+            buffer.unlink()
+        self._buffers = []
+
+
+class SharedFrameViews:
+    def __init__(self, names, shape, dtype):
+        self._buffers = [shared_memory.SharedMemory(name=name) for name in names]
+        self._views = [np.ndarray(shape, dtype, buffer=buffer.buf) for buffer in self._buffers]
+
+    def view(self, slot):
+        return self._views[slot]
+
+    def close(self):
+        self._views = []
+        for buffer in self._buffers:
+            buffer.close()
@@ -0,0 +1,98 @@
+import time
+from threading import Thread
+
+from infrastructure.pipeline.latestframequeue import LatestFrameQueue
+from infrastructure.tracer import NULL_TRACER
+
+POLL_TIMEOUT = 0.1
+
+
+class Stage:
+    def __init__(self, name, function, queue_size):
+        self._name = name
+        self._function = function
+        self._input = LatestFrameQueue(queue_size)
+        self._output = None
+        self._running = False
+        self._thread = None
+        self._processed = 0
+        self._failed = 0
+        self._busy_time = 0.
+        self._started_at = None
+        self._duration_histogram = None
+        self._tracer = NULL_TRACER
+
+    def get_name(self):
+        return self._name
+
+    def get_input(self):
+        return self._input
+
+    def connect_to(self, output_queue):
+        self._output = output_queue
+
+    def start(self):
+        self._running = True
+        self._started_at = time.perf_counter()
+        self._thread = Thread(target=self._run, name="stage-{}".format(self._name), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        self._input.clear()
+
+    def instrument(self, metrics_registry, tracer=NULL_TRACER):
+        self._tracer = tracer
+        self._duration_histogram = metrics_registry.histogram(
+            'vision_stage_duration_seconds', 'Time spent processing a frame in a pipeline stage.').labels(
+            stage=self._name)
+        frames = metrics_registry.counter('vision_stage_frames_total', 'Frames handled by a pipeline stage.')
+        frames.labels(stage=self._name, outcome='processed').set_function(lambda: self._processed)
+        frames.labels(stage=self._name, outcome='failed').set_function(lambda: self._failed)
+        frames.labels(stage=self._name, outcome='dropped').set_function(self._input.dropped_count)
+
+    def get_occupancy(self):
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.
+        return {
+            "stage": self._name,
+            "queued": self._input.size(),
+            "capacity": self._input.capacity(),
+            "dropped": self._input.dropped_count(),
+            "processed": self._processed,
+            "failed": self._failed,
+            "busy": self._busy_time / elapsed if elapsed > 0 else 0.
+        }
+
+    def _run(self):
+        while self._running:
+            frame = self._input.get(timeout=POLL_TIMEOUT)
+
+            if frame is not None:
+                self._process(frame)
+
+    def _process(self, frame):
+        start = time.perf_counter()
+
+        with self._tracer.span(self._name, 'stage', frame.get_sequence()):
+            try:
+                result = self._function(frame)
+            except Exception as e:
+                print("Pipeline stage {} failure: {}".format(self._name, type(e).__name__))
+                self._failed += 1
+                result = None
+            else:
+                self._processed += 1
+
+        duration = time.perf_counter() - start
+        self._busy_time += duration
+        if self._duration_histogram is not None:
+            self._duration_histogram.observe(duration)
+
+        if result is None:
+            frame.release()
+        elif self._output is not None:
+            self._output.put(result)
+        else:
+            result.release()
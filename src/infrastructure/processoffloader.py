@@ -0,0 +1,59 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+
+class OffloaderSaturated(Exception):
+    pass
+
+
+class ProcessOffloader:
+    def __init__(self, worker_count, max_pending):
+        self._worker_count = worker_count
+        self._max_pending = max_pending
+        self._pending = BoundedSemaphore(max_pending)
+        self._pending_count = 0
+        self._lock = Lock()
+        self._executor = None
+
+    def submit(self, function, *args):
+        if not self._pending.acquire(blocking=False):
+            raise OffloaderSaturated()
+
+        try:
+            future = self._get_executor().submit(function, *args)
+        except Exception:
+            self._pending.release()
+            raise
+
+        with self._lock:
+            self._pending_count += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def run(self, function, *args, timeout=None):
+        return self.submit(function, *args).result(timeout)
+
+    def get_pending_count(self):
+        return self._pending_count
+
+    def get_max_pending(self):
+        return self._max_pending
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._worker_count,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending_count -= 1
+        self._pending.release()
@@ -0,0 +1,35 @@
+import uuid
+from collections import namedtuple
+from threading import Lock
+
+CachedResponse = namedtuple('CachedResponse', ['version', 'etag', 'body'])
+
+
+class ResponseCache:
+    def __init__(self):
+        self._instance_id = uuid.uuid4().hex[:8]
+        self._entries = {}
+        self._lock = Lock()
+        self._hit_count = 0
+        self._miss_count = 0
+
+    def get(self, resource, version, serialize):
+        entry = self._entries.get(resource)
+        if entry is not None and entry.version == version:
+            self._hit_count += 1
+            return entry
+
+        entry = CachedResponse(version, self.create_etag(resource, version), serialize())
+        with self._lock:
+            self._miss_count += 1
+            self._entries[resource] = entry
+        return entry
+
+    def create_etag(self, resource, version):
+        return '{}-{}-{}'.format(resource, self._instance_id, version)
+
+    def get_statistics(self):
+        return {
+            "hits": self._hit_count,
+            "misses": self._miss_count
+        }
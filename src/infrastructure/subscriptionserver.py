@@ -0,0 +1,280 @@
+import asyncio
+import json
+from threading import Lock
+
+import numpy as np
+
+from infrastructure.jpegencoder import JpegEncoder
+from service.image.worldsnapshot import EMPTY_WORLD_SNAPSHOT
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+ROBOT_TOPIC = 'robot'
+OBSTACLES_TOPIC = 'obstacles'
+WORLD_TOPIC = 'world'
+DEBUG_IMAGE_TOPIC = 'debug_image'
+
+
+class Topic:
+    def __init__(self, name, get_version, serialize):
+        self.name = name
+        self.subscribers = set()
+        self.version = None
+        self.message = None
+        self.serialization_count = 0
+        self._get_version = get_version
+        self._serialize = serialize
+
+    def update(self, world_snapshot):
+        version = self._get_version(world_snapshot)
+        if version == self.version:
+            return False
+
+        self.version = version
+        self.message = json.dumps({"topic": self.name, "version": world_snapshot.version,
+                                   "data": self._serialize(world_snapshot)})
+        self.serialization_count += 1
+        return True
+
+
+class Subscriber:
+    def __init__(self, connection):
+        self.connection = connection
+        self.min_intervals = {}
+        self.pending_messages = {}
+        self.last_sent_times = {}
+        self.wakeup = asyncio.Event()
+        self.sent_count = 0
+        self.coalesced_count = 0
+
+    def offer(self, topic_name, message):
+        if topic_name in self.pending_messages:
+            self.coalesced_count += 1
+        self.pending_messages[topic_name] = message
+        self.wakeup.set()
+
+    async def send_pending_messages(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+
+            while len(self.pending_messages) > 0:
+                now = loop.time()
+                next_send_delay = None
+
+                for topic_name in list(self.pending_messages):
+                    if topic_name not in self.pending_messages:
+                        continue
+                    delay = self.last_sent_times.get(topic_name, -np.inf) + self.min_intervals[topic_name] - now
+                    if delay > 0:
+                        next_send_delay = delay if next_send_delay is None else min(next_send_delay, delay)
+                        continue
+
+                    message = self.pending_messages.pop(topic_name)
+                    try:
+                        await self.connection.send(message)
+                    except websockets.exceptions.ConnectionClosed:
+                        return
+                    self.last_sent_times[topic_name] = loop.time()
+                    self.sent_count += 1
+
+                if next_send_delay is not None:
+                    await asyncio.sleep(next_send_delay)
+
+
+class SubscriptionServer:
+    def __init__(self, message_assembler, event_loop_thread, host, port, default_max_rate, jpeg_quality,
+                 image_scale):
+        self._event_loop_thread = event_loop_thread
+        self._host = host
+        self._port = port
+        self._default_max_rate = default_max_rate
+        self._jpeg_encoder = JpegEncoder(jpeg_quality, image_scale)
+        self._topics = {topic.name: topic for topic in [
+            Topic(ROBOT_TOPIC, lambda snapshot: snapshot.versions.robot,
+                  lambda snapshot: message_assembler.serialize_robot(snapshot.robot)),
+            Topic(OBSTACLES_TOPIC, lambda snapshot: snapshot.versions.obstacles,
+                  lambda snapshot: message_assembler.serialize_obstacles(snapshot.obstacles)),
+            Topic(WORLD_TOPIC, lambda snapshot: (snapshot.versions.world, snapshot.versions.drawing_area),
+                  lambda snapshot: {"base_table": message_assembler.serialize_table(snapshot.world, 1),
+                                    "drawing_area": message_assembler.serialize_drawing_area(snapshot.drawing_area),
+                                    "unit": "mm"})
+        ]}
+        self._image_topic = Topic(DEBUG_IMAGE_TOPIC, None, None)
+        self._all_topics = dict(self._topics, **{DEBUG_IMAGE_TOPIC: self._image_topic})
+        self._lock = Lock()
+        self._latest_snapshot = EMPTY_WORLD_SNAPSHOT
+        self._pending_image = None
+        self._working_image = None
+        self._has_pending_image = False
+        self._snapshot_update_scheduled = False
+        self._image_encoding_scheduled = False
+        self._subscribers = set()
+        self._subscription_count = 0
+        self._server = None
+
+    def start(self):
+        if websockets is None:
+            print("websockets is not installed, the subscription server is disabled")
+            return
+
+        self._server = self._event_loop_thread.submit(self._serve()).result()
+        print("Subscription server listening on port {}".format(self.get_port()))
+
+    def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._event_loop_thread.submit(self._server.wait_closed()).result()
+            self._server = None
+
+    def get_port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    def publish_snapshot(self, world_snapshot):
+        self._latest_snapshot = world_snapshot
+        if self._subscription_count == 0:
+            return
+
+        with self._lock:
+            if self._snapshot_update_scheduled:
+                return
+            self._snapshot_update_scheduled = True
+        self._event_loop_thread.call_soon(self._update_topics)
+
+    def publish_image(self, image):
+        if len(self._image_topic.subscribers) == 0:
+            return
+
+        with self._lock:
+            if self._pending_image is None or self._pending_image.shape != image.shape:
+                self._pending_image = np.empty_like(image)
+            np.copyto(self._pending_image, image)
+            self._has_pending_image = True
+
+            if self._image_encoding_scheduled:
+                return
+            self._image_encoding_scheduled = True
+        self._event_loop_thread.call_soon(self._schedule_image_encoding)
+
+    def get_statistics(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "topics": {topic.name: {"subscribers": len(topic.subscribers),
+                                    "serializations": topic.serialization_count}
+                       for topic in self._all_topics.values()},
+            "sent": sum(subscriber.sent_count for subscriber in list(self._subscribers)),
+            "coalesced": sum(subscriber.coalesced_count for subscriber in list(self._subscribers))
+        }
+
+    async def _serve(self):
+        return await websockets.serve(self._handle_connection, self._host, self._port, max_size=2 ** 16)
+
+    async def _handle_connection(self, connection, *args):
+        subscriber = Subscriber(connection)
+        self._subscribers.add(subscriber)
+        sender = asyncio.ensure_future(subscriber.send_pending_messages())
+
+        try:
+            async for request in connection:
+                await self._handle_request(subscriber, request)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            for topic_name in list(subscriber.min_intervals):
+                self._unsubscribe(subscriber, topic_name)
+            self._subscribers.discard(subscriber)
+
+    async def _handle_request(self, subscriber, request):
+        try:
+            request = json.loads(request)
+            if not isinstance(request, dict):
+                raise ValueError
+            subscriptions = request.get("subscribe", {})
+            unsubscriptions = request.get("unsubscribe", [])
+            if isinstance(subscriptions, list):
+                subscriptions = {topic_name: None for topic_name in subscriptions}
+            if not isinstance(subscriptions, dict) or not isinstance(unsubscriptions, list):
+                raise ValueError
+            if not all(isinstance(topic_name, str) for topic_name in list(subscriptions) + unsubscriptions):
+                raise ValueError
+        except (ValueError, TypeError):
+            await subscriber.connection.send(json.dumps({"error": "Invalid subscription request"}))
+            return
+
+        for topic_name in unsubscriptions:
+            self._unsubscribe(subscriber, topic_name)
+
+        for topic_name, max_rate in subscriptions.items():
+            if topic_name not in self._all_topics:
+                await subscriber.connection.send(json.dumps({"error": "Unknown topic {}".format(topic_name)}))
+                continue
+            if max_rate is not None and (not isinstance(max_rate, (int, float)) or max_rate <= 0):
+                await subscriber.connection.send(json.dumps({"error": "Invalid rate for topic {}".format(topic_name)}))
+                continue
+            self._subscribe(subscriber, topic_name, max_rate or self._default_max_rate)
+
+    def _subscribe(self, subscriber, topic_name, max_rate):
+        topic = self._all_topics[topic_name]
+        if subscriber not in topic.subscribers:
+            topic.subscribers.add(subscriber)
+            self._subscription_count += 1
+        subscriber.min_intervals[topic_name] = 1. / max_rate
+
+        if topic is not self._image_topic:
+            topic.update(self._latest_snapshot)
+        if topic.message is not None:
+            subscriber.offer(topic_name, topic.message)
+
+    def _unsubscribe(self, subscriber, topic_name):
+        topic = self._all_topics.get(topic_name)
+        if topic is not None and subscriber in topic.subscribers:
+            topic.subscribers.discard(subscriber)
+            self._subscription_count -= 1
+            if topic is self._image_topic and len(topic.subscribers) == 0:
+                topic.message = None
+        subscriber.min_intervals.pop(topic_name, None)
+        subscriber.pending_messages.pop(topic_name, None)
+
+    def _update_topics(self):
+        with self._lock:
+            self._snapshot_update_scheduled = False
+        world_snapshot = self._latest_snapshot
+
+        for topic in self._topics.values():
+            if len(topic.subscribers) > 0 and topic.update(world_snapshot):
+                for subscriber in topic.subscribers:
+                    subscriber.offer(topic.name, topic.message)
+
+    def _schedule_image_encoding(self):
+        future = asyncio.get_running_loop().run_in_executor(None, self._encode_pending_image)
+        future.add_done_callback(self._broadcast_image)
+
+    def _encode_pending_image(self):
+        with self._lock:
+            self._working_image, self._pending_image = self._pending_image, self._working_image
+            self._has_pending_image = False
+        return self._jpeg_encoder.encode(self._working_image)
+
+    # A failed encoding must not leave the scheduled flag set, publish_image would never schedule another one
+    def _broadcast_image(self, future):
+        try:
+            topic = self._image_topic
+            topic.message = future.result()
+            topic.serialization_count += 1
+            for subscriber in topic.subscribers:
+                subscriber.offer(topic.name, topic.message)
+        except Exception as e:
+            print("Debug image encoding failure: {}".format(type(e).__name__))
+        finally:
+            with self._lock:
+                self._image_encoding_scheduled = self._has_pending_image
+                encoding_scheduled = self._image_encoding_scheduled
+
+        if encoding_scheduled:
+            self._schedule_image_encoding()
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class Span:
+    def __init__(self, tracer, name, category, sequence):
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._sequence = sequence
+        self._previous_sequence = None
+        self._start = None
+
+    def __enter__(self):
+        self._previous_sequence = self._tracer.get_current_sequence()
+        if self._sequence is None:
+            self._sequence = self._previous_sequence
+        else:
+            self._tracer.set_current_sequence(self._sequence)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self._tracer.add_complete_event(self._name, self._category, self._start,
+                                        time.perf_counter() - self._start, self._sequence)
+        self._tracer.set_current_sequence(self._previous_sequence)
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    def __init__(self, capacity, enabled=False):
+        self._capacity = capacity
+        self._events = deque(maxlen=max(capacity, 1))
+        self._thread_names = {}
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._enabled = enabled and capacity > 0
+
+    def enable(self):
+        self._enabled = self._capacity > 0
+
+    def disable(self):
+        self._enabled = False
+
+    def is_enabled(self):
+        return self._enabled
+
+    def span(self, name, category='vision', sequence=None):
+        if not self._enabled:
+            return NULL_SPAN
+        return Span(self, name, category, sequence)
+
+    def add_complete_event(self, name, category, start, duration, sequence=None, thread_id=None,
+                           thread_name=None):
+        if not self._enabled:
+            return
+
+        if thread_id is None:
+            thread_id = threading.get_ident()
+            thread_name = threading.current_thread().name
+        if thread_id not in self._thread_names:
+            self._thread_names[thread_id] = thread_name
+
+        self._events.append((name, category, start, duration, thread_id, sequence))
+
+    def get_current_sequence(self):
+        return getattr(self._local, 'sequence', None)
+
+    def set_current_sequence(self, sequence):
+        self._local.sequence = sequence
+
+    def get_event_count(self):
+        return len(self._events)
+
+    def clear(self):
+        self._events.clear()
+
+    def to_chrome_trace(self):
+        events = list(self._events)
+        process_id = os.getpid()
+
+        trace_events = [{"name": "thread_name", "ph": "M", "pid": process_id, "tid": thread_id,
+                         "args": {"name": thread_name}}
+                        for thread_id, thread_name in list(self._thread_names.items())]
+
+        for name, category, start, duration, thread_id, sequence in events:
+            event = {"name": name, "cat": category, "ph": "X", "pid": process_id, "tid": thread_id,
+                     "ts": (start - self._origin) * 1e6, "dur": duration * 1e6}
+            if sequence is not None:
+                event["args"] = {"frame": sequence}
+            trace_events.append(event)
+
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def dump(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        now = time.time()
+        timestamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        path = os.path.join(directory, 'vision-trace-{}-{:03d}.json'.format(timestamp, int(now * 1000) % 1000))
+
+        with open(path, 'w') as trace_file:
+            json.dump(self.to_chrome_trace(), trace_file)
+
+        return path
+
+
+NULL_TRACER = Tracer(0)
@@ -0,0 +1,143 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+import numpy as np
+from flask import g, request
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from infrastructure.tracer import NULL_TRACER
+
+try:
+    import waitress
+    from waitress.server import create_server as create_waitress_server
+except ImportError:
+    waitress = None
+
+REQUEST_TIMING_WINDOW = 1024
+RESPONSE_TIME_HEADER = 'X-Response-Time'
+
+
+class RequestTimer:
+    def __init__(self, window=REQUEST_TIMING_WINDOW):
+        self._window = window
+        self._durations = {}
+        self._lock = Lock()
+
+    def record(self, endpoint, duration):
+        with self._lock:
+            if endpoint not in self._durations:
+                self._durations[endpoint] = deque(maxlen=self._window)
+            self._durations[endpoint].append(duration)
+
+    def get_summary(self):
+        with self._lock:
+            durations = {endpoint: np.array(values) for endpoint, values in self._durations.items()}
+
+        return {endpoint: {
+            "count": len(values),
+            "p50_ms": float(np.percentile(values, 50) * 1000),
+            "p99_ms": float(np.percentile(values, 99) * 1000),
+            "max_ms": float(values.max() * 1000)
+        } for endpoint, values in durations.items()}
+
+
+def install_request_timing(api, request_timer, tracer=NULL_TRACER):
+    @api.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @api.after_request
+    def stop_request_timer(response):
+        duration = time.perf_counter() - g.request_start
+        request_timer.record(request.endpoint or request.path, duration)
+        tracer.add_complete_event(request.endpoint or request.path, 'api', g.request_start, duration)
+        response.headers[RESPONSE_TIME_HEADER] = '{:.3f}ms'.format(duration * 1000)
+        return response
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+class ThreadPoolWSGIServer(BaseWSGIServer):
+    def __init__(self, host, port, api, threads, keep_alive_timeout, max_pending_connections):
+        handler = type('TimedKeepAliveRequestHandler', (KeepAliveRequestHandler,), {"timeout": keep_alive_timeout})
+        super().__init__(host, port, api, handler=handler)
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._connection_slots = BoundedSemaphore(max_pending_connections)
+        self._refused_count = 0
+
+    # Connections beyond the bound are closed right away instead of queuing without limit behind busy threads
+    def process_request(self, request, client_address):
+        if not self._connection_slots.acquire(blocking=False):
+            self._refused_count += 1
+            self.shutdown_request(request)
+            return
+
+        try:
+            self._executor.submit(self._process_request, request, client_address)
+        except RuntimeError:
+            self._connection_slots.release()
+            self.shutdown_request(request)
+
+    def get_refused_count(self):
+        return self._refused_count
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self._connection_slots.release()
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False)
+
+
+class WebServer:
+    def __init__(self, api, host, port, backend='waitress', threads=8, keep_alive_timeout=5,
+                 output_buffer_size=16 * 1024 * 1024, max_pending_connections=32):
+        if backend == 'waitress' and waitress is None:
+            print("waitress is not installed, falling back to the werkzeug thread pool server")
+            backend = 'werkzeug'
+
+        self._backend = backend
+
+        if backend == 'waitress':
+            self._server = create_waitress_server(api, host=host, port=port, threads=threads,
+                                                  channel_timeout=keep_alive_timeout,
+                                                  outbuf_high_watermark=output_buffer_size,
+                                                  connection_limit=max_pending_connections)
+        elif backend == 'werkzeug':
+            self._server = ThreadPoolWSGIServer(host, port, api, threads, keep_alive_timeout, max_pending_connections)
+        else:
+            raise ValueError("Unknown web server backend {}".format(backend))
+
+    def get_backend(self):
+        return self._backend
+
+    def get_port(self):
+        if self._backend == 'waitress':
+            return int(self._server.effective_port)
+        return self._server.server_port
+
+    def serve_forever(self):
+        if self._backend == 'waitress':
+            self._server.run()
+        else:
+            self._server.serve_forever()
+
+    def shutdown(self):
+        if self._backend == 'waitress':
+            self._server.close()
+        else:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,241 @@
+import asyncio
+import time
+from collections import deque
+from threading import Lock
+
+import numpy as np
+from websocket import create_connection, WebSocketException
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+SEND_LATENCY_WINDOW = 256
+
+
+def create_websocket_publisher(url, event_loop_thread, on_resync=None, reconnect_delay=0.5,
+                               max_reconnect_delay=10.):
+    if websockets is None:
+        print("websockets is not installed, falling back to the blocking websocket publisher")
+        return BlockingWebSocketPublisher(url, on_resync, reconnect_delay, max_reconnect_delay)
+    return WebSocketPublisher(url, event_loop_thread, on_resync, reconnect_delay, max_reconnect_delay)
+
+
+class PublisherStatistics:
+    def __init__(self):
+        self.connected = False
+        self.sent_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+        self.reconnect_count = 0
+        self.send_latencies = deque(maxlen=SEND_LATENCY_WINDOW)
+        self._send_histogram = None
+
+    def record_send(self, duration):
+        self.send_latencies.append(duration)
+        self.sent_count += 1
+        if self._send_histogram is not None:
+            self._send_histogram.observe(duration)
+
+    def instrument(self, metrics_registry):
+        self._send_histogram = metrics_registry.histogram('vision_websocket_send_seconds',
+                                                          'Time spent sending a frame to the base station.').labels()
+        messages = metrics_registry.counter('vision_websocket_messages_total',
+                                            'Frames handed to the base station publisher.')
+        messages.labels(outcome='sent').set_function(lambda: self.sent_count)
+        messages.labels(outcome='dropped').set_function(lambda: self.dropped_count)
+        messages.labels(outcome='failed').set_function(lambda: self.failed_count)
+        metrics_registry.gauge('vision_websocket_connected', 'Whether the base station is connected.').labels() \
+            .set_function(lambda: self.connected)
+
+    def as_dict(self):
+        latencies = np.array(self.send_latencies) * 1000 if len(self.send_latencies) > 0 else np.zeros(1)
+        return {
+            "connected": self.connected,
+            "sent": self.sent_count,
+            "dropped": self.dropped_count,
+            "failed": self.failed_count,
+            "reconnects": self.reconnect_count,
+            "send_latency_p50_ms": float(np.percentile(latencies, 50)),
+            "send_latency_p99_ms": float(np.percentile(latencies, 99))
+        }
+
+
+class WebSocketPublisher:
+    def __init__(self, url, event_loop_thread, on_resync=None, reconnect_delay=0.5, max_reconnect_delay=10.):
+        self._url = url
+        self._event_loop_thread = event_loop_thread
+        self._on_resync = on_resync
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._statistics = PublisherStatistics()
+        self._pending_messages = None
+        self._published_index = 0
+        self._pending_index = 0
+        self._keyframe_index = None
+        self._keyframe_lost = False
+        self._lock = Lock()
+        self._wakeup = None
+        self._task = None
+
+    def start(self):
+        self._wakeup = self._event_loop_thread.submit(self._create_wakeup()).result()
+        self._task = self._event_loop_thread.submit(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # A dropped frame breaks the delta chain, a keyframe is requested once until it reaches the sender, and again
+    # only if that keyframe was dropped in turn, so a slow send does not make every following frame a keyframe
+    def publish(self, messages):
+        with self._lock:
+            dropped = self._pending_messages is not None
+            self._published_index += 1
+            self._pending_messages = messages
+            self._pending_index = self._published_index
+            if dropped:
+                self._statistics.dropped_count += 1
+
+            resync = self._keyframe_lost or (dropped and self._keyframe_index is None)
+            if resync:
+                self._keyframe_index = self._published_index + 1
+                self._keyframe_lost = False
+
+        if resync:
+            self._resync()
+        if self._wakeup is not None:
+            self._event_loop_thread.call_soon(self._wakeup.set)
+
+    def get_statistics(self):
+        return self._statistics.as_dict()
+
+    def instrument(self, metrics_registry):
+        self._statistics.instrument(metrics_registry)
+
+    async def _create_wakeup(self):
+        return asyncio.Event()
+
+    async def _run(self):
+        delay = self._reconnect_delay
+
+        while True:
+            try:
+                async with websockets.connect(self._url, max_size=None) as connection:
+                    print("Connection to web socket established at {}".format(self._url))
+                    self._statistics.connected = True
+                    delay = self._reconnect_delay
+                    self._resync()
+                    await self._send_pending_messages(connection)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                if self._statistics.connected:
+                    print("Connection to web socket {} lost: {}".format(self._url, e))
+                    self._statistics.failed_count += 1
+            # Anything else raised by a connection attempt must not end the publisher, it backs off and reconnects
+            except Exception as e:
+                print("Web socket publisher failure on {}: {}".format(self._url, type(e).__name__))
+                self._statistics.failed_count += 1
+            finally:
+                self._statistics.connected = False
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay)
+            self._statistics.reconnect_count += 1
+
+    async def _send_pending_messages(self, connection):
+        while True:
+            messages = self._take_pending_messages()
+            if messages is None:
+                await self._wakeup.wait()
+                continue
+
+            start = time.perf_counter()
+            for message in messages:
+                await connection.send(message)
+            self._statistics.record_send(time.perf_counter() - start)
+
+    def _take_pending_messages(self):
+        with self._lock:
+            messages, self._pending_messages = self._pending_messages, None
+            if self._wakeup is not None:
+                self._wakeup.clear()
+            if messages is not None and self._keyframe_index is not None \
+                    and self._pending_index >= self._keyframe_index:
+                self._keyframe_lost = self._pending_index > self._keyframe_index
+                self._keyframe_index = None
+            return messages
+
+    def _resync(self):
+        if self._on_resync is not None:
+            self._on_resync()
+
+
+class BlockingWebSocketPublisher:
+    def __init__(self, url, on_resync=None, reconnect_delay=0.5, max_reconnect_delay=10.):
+        self._url = url
+        self._on_resync = on_resync
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._delay = reconnect_delay
+        self._next_connection_attempt = 0.
+        self._statistics = PublisherStatistics()
+        self._connection = None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def publish(self, messages):
+        if self._connection is None and not self._connect():
+            self._statistics.dropped_count += 1
+            return
+
+        start = time.perf_counter()
+        try:
+            for message in messages:
+                if isinstance(message, bytes):
+                    self._connection.send_binary(message)
+                else:
+                    self._connection.send(message)
+        except (OSError, WebSocketException) as e:
+            print("Connection to web socket {} lost: {}".format(self._url, e))
+            self._statistics.failed_count += 1
+            self.stop()
+            self._statistics.connected = False
+            return
+
+        self._statistics.record_send(time.perf_counter() - start)
+
+    def get_statistics(self):
+        return self._statistics.as_dict()
+
+    def instrument(self, metrics_registry):
+        self._statistics.instrument(metrics_registry)
+
+    def _connect(self):
+        now = time.monotonic()
+        if now < self._next_connection_attempt:
+            return False
+
+        try:
+            self._connection = create_connection(self._url)
+        except (OSError, WebSocketException):
+            self._next_connection_attempt = now + self._delay
+            self._delay = min(self._delay * 2, self._max_reconnect_delay)
+            self._statistics.reconnect_count += 1
+            return False
+
+        print("Connection to web socket established at {}".format(self._url))
+        self._statistics.connected = True
+        self._delay = self._reconnect_delay
+        if self._on_resync is not None:
+            self._on_resync()
+        return True
@@ -0,0 +1,38 @@
+from service.image.worldsnapshot import ComponentVersions
+
+
+class WorldStateDeltaEncoder:
+    def __init__(self, message_assembler, keyframe_interval):
+        self._message_assembler = message_assembler
+        self._keyframe_interval = keyframe_interval
+        self._sequence = 0
+        self._frames_since_keyframe = 0
+        self._previous_versions = None
+        self._keyframe_requested = True
+
+    def request_keyframe(self):
+        self._keyframe_requested = True
+
+    def get_sequence(self):
+        return self._sequence
+
+    def encode(self, world_snapshot, original_shape, sent_shape, image_scale):
+        self._sequence += 1
+        versions = world_snapshot.versions
+
+        keyframe = self._keyframe_requested or self._frames_since_keyframe >= self._keyframe_interval
+        if keyframe:
+            self._keyframe_requested = False
+            self._frames_since_keyframe = 0
+            changed_components = ComponentVersions._fields
+        else:
+            changed_components = [component for component, version, previous_version
+                                  in zip(ComponentVersions._fields, versions, self._previous_versions)
+                                  if version != previous_version]
+
+        self._frames_since_keyframe += 1
+        self._previous_versions = versions
+
+        return self._message_assembler.create_world_state_delta_dto(self._sequence, keyframe, world_snapshot,
+                                                                    changed_components, original_shape, sent_shape,
+                                                                    image_scale)
@@ -1,121 +1,228 @@
-import json
+import argparse
+import signal
+
 import cv2
 
 from threading import Thread
-from websocket import create_connection
 
 import config
 from domain.camera.camerafactory import CameraFactory
-from domain.detector.worldelement.drawingareadetector import DrawingAreaDetector
-from domain.detector.worldelement.obstaclepositiondetector import ObstacleDetector, ShapeDetector
-from domain.detector.worldelement.robotdetector import RobotDetector
-from domain.detector.worldelement.shapefactory import ShapeFactory
-from domain.detector.worldelement.tabledetector import TableDetector
 from infrastructure.applicationfactory import ApplicationFactory
+from infrastructure.eventloopthread import EventLoopThread
+from infrastructure.framepublisher import FramePublisher
 from infrastructure.graphics.renderingengine import RenderingEngine
 from infrastructure.imagesource.savevideoimagesource import SaveVideoImageSource
 from infrastructure.imagesource.videostreamimagesource import VideoStreamImageSource
 from infrastructure.messageassembler import MessageAssembler
+from infrastructure.metrics import MetricsRegistry, RateMeter
+from infrastructure.mjpegbroadcaster import MjpegBroadcaster
 from infrastructure.persistance.datalogger import DataLogger
 from infrastructure.persistance.jsoncameramodelrepository import JSONCameraModelRepository
-from service.image.detectonceproxy import DetectOnceProxy
+from infrastructure.persistance.pixelworldmaprepository import PixelWorldMapRepository
+from infrastructure.pipeline.detectionworker import DetectionWorker, SharedElementDetection
+from infrastructure.pipeline.pipeline import Pipeline
+from infrastructure.pipeline.processpoolstage import ProcessPoolStage
+from infrastructure.processoffloader import ProcessOffloader
+from infrastructure.subscriptionserver import SubscriptionServer
+from infrastructure.tracer import Tracer
+from infrastructure.websocketpublisher import create_websocket_publisher
+from infrastructure.webserver import WebServer
+from infrastructure.worldstatedeltaencoder import WorldStateDeltaEncoder
+from service.image.imagepreprocessing import preprocess_image
 from service.image.imagestranslationservice import ImageToWorldTranslator
-
-
-def preprocess_image(image, camera_model):
-    image = camera_model.undistort_image(image)
-    image = cv2.medianBlur(image, ksize=5)
-    image = cv2.GaussianBlur(image, (5, 5), 1)
-    return image
+from service.image.worldsnapshot import WorldSnapshotStore
 
 
 class VisionApplication:
-    def __init__(self):
+    def __init__(self, video_file_path=None):
         self._started = False
+        self._web_socket = False
+        self._video_debug = not self._web_socket
+        self._video_write = False
+        self._verbose = False
+        self._frame_publisher = None
+        self._websocket_publisher = None
+        self._event_loop_thread = None
 
     def start(self):
         self._started = True
-        WEB_SOCKET = False
-        VIDEO_DEBUG = not WEB_SOCKET
-        VIDEO_WRITE = False
-        VERBOSE = False
-
-        message_assembler = MessageAssembler()
-        rendering_engine = RenderingEngine()
-        data_logger = DataLogger(verbose=VERBOSE)
+
+        self._metrics_registry = MetricsRegistry()
+        self._tracer = Tracer(config.TRACE_BUFFER_SIZE, config.TRACE_ENABLED)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, self._dump_trace)
+        self._message_assembler = MessageAssembler()
+        self._world_state_encoder = WorldStateDeltaEncoder(self._message_assembler,
+                                                           config.FRAME_PUBLISHER_KEYFRAME_INTERVAL)
+        self._rendering_engine = RenderingEngine()
+        self._data_logger = DataLogger(verbose=self._verbose)
         application_factory = ApplicationFactory()
 
         camera_factory = CameraFactory()
         camera_model_repository = JSONCameraModelRepository(config.CAMERA_MODELS_FILE_PATH, camera_factory)
-        camera_model = camera_model_repository.find_by_id(config.TABLE_CAMERA_MODEL_ID)
-
-        shape_factory = ShapeFactory()
-        shape_detector = ShapeDetector()
-        robot_detector = RobotDetector(shape_factory)
-        table_detector = TableDetector(shape_factory)
-        drawing_area_detector = DrawingAreaDetector(shape_factory)
-        obstacles_detector = ObstacleDetector(shape_detector)
-        table_detector = DetectOnceProxy(table_detector)
-        drawing_area_detector = DetectOnceProxy(drawing_area_detector)
-        obstacles_detector = DetectOnceProxy(obstacles_detector)
-
-        detection_service = application_factory.create_detection_service([
-            robot_detector,
-            table_detector,
-            drawing_area_detector,
-            obstacles_detector
-        ])
-
-        image_to_world_translator = ImageToWorldTranslator(camera_model)
-
-        api = application_factory.create_rest_api(data_logger, detection_service, image_to_world_translator,
-                                                  message_assembler)
-        api_thread = Thread(target=api.run, kwargs={"host": '0.0.0.0'})
+        self._camera_model = camera_model_repository.find_by_id(config.TABLE_CAMERA_MODEL_ID)
+
+        self._detection_service = application_factory.create_vision_detection_service()
+        self._detection_service.instrument(self._metrics_registry, self._tracer)
+
+        pixel_world_map_repository = None
+        if config.USE_PIXEL_WORLD_MAP:
+            pixel_world_map_repository = PixelWorldMapRepository(config.PIXEL_WORLD_MAP_DIRECTORY,
+                                                                 (config.CAP_HEIGHT, config.CAP_WIDTH),
+                                                                 config.TARGET_SIDE_LENGTH,
+                                                                 config.PIXEL_WORLD_MAP_CACHE_SIZE,
+                                                                 config.PIXEL_WORLD_MAP_STALE_DELAY)
+
+        self._image_to_world_translator = ImageToWorldTranslator(self._camera_model, pixel_world_map_repository)
+        self._world_snapshot_store = WorldSnapshotStore()
+
+        if video_file_path is not None:
+            image_source = SaveVideoImageSource(video_file_path)
+        else:
+            image_source = VideoStreamImageSource(config.CAMERA_ID, self._video_write)
+
+        pipeline = Pipeline(image_source, config.PIPELINE_QUEUE_SIZE)
+
+        if config.PIPELINE_BACKEND == 'process':
+            detection_stage = ProcessPoolStage("detection",
+                                               DetectionWorker(self._camera_model,
+                                                               application_factory.create_vision_detection_service),
+                                               config.PIPELINE_DETECTION_WORKERS,
+                                               config.PIPELINE_SHARED_FRAME_SLOTS,
+                                               config.PIPELINE_QUEUE_SIZE)
+            pipeline.add_stage("world-detection", SharedElementDetection(self._camera_model, self._detection_service,
+                                                                          detection_stage)) \
+                .add(detection_stage)
+        else:
+            pipeline.add_stage("preprocessing", self._preprocess) \
+                .add_stage("detection", self._detect)
+
+        pipeline.add_stage("translation", self._translate) \
+            .add_stage("rendering", self._render) \
+            .add_stage("publishing", self._publish)
+
+        self._event_loop_thread = EventLoopThread("network")
+        self._event_loop_thread.start()
+
+        if self._web_socket:
+            self._websocket_publisher = create_websocket_publisher(config.BASESTATION_WEBSOCKET_URL,
+                                                                   self._event_loop_thread,
+                                                                   self._world_state_encoder.request_keyframe,
+                                                                   config.WEBSOCKET_RECONNECT_DELAY,
+                                                                   config.WEBSOCKET_MAX_RECONNECT_DELAY)
+            self._websocket_publisher.start()
+            self._frame_publisher = FramePublisher(self._websocket_publisher, self._world_state_encoder,
+                                                   config.FRAME_PUBLISHER_JPEG_QUALITY,
+                                                   config.FRAME_PUBLISHER_IMAGE_SCALE)
+            self._frame_publisher.instrument(self._metrics_registry, self._tracer)
+            self._frame_publisher.start()
+
+        self._mjpeg_broadcaster = MjpegBroadcaster(config.DEBUG_STREAM_JPEG_QUALITY, config.DEBUG_STREAM_IMAGE_SCALE,
+                                                   config.DEBUG_STREAM_MAX_CLIENTS)
+        self._mjpeg_broadcaster.start()
+
+        self._subscription_server = SubscriptionServer(self._message_assembler, self._event_loop_thread,
+                                                       config.SUBSCRIPTION_SERVER_HOST,
+                                                       config.SUBSCRIPTION_SERVER_PORT,
+                                                       config.SUBSCRIPTION_DEFAULT_MAX_RATE,
+                                                       config.DEBUG_STREAM_JPEG_QUALITY,
+                                                       config.DEBUG_STREAM_IMAGE_SCALE)
+        self._subscription_server.start()
+
+        segmentation_offloader = ProcessOffloader(config.API_OFFLOAD_WORKERS, config.API_OFFLOAD_MAX_PENDING)
+        api = application_factory.create_rest_api(self._data_logger, self._detection_service,
+                                                  self._image_to_world_translator, self._message_assembler,
+                                                  self._world_snapshot_store, pipeline, segmentation_offloader,
+                                                  self._world_state_encoder, self._frame_publisher,
+                                                  self._mjpeg_broadcaster, self._subscription_server,
+                                                  self._metrics_registry, self._tracer)
+        web_server = WebServer(api, config.API_HOST, config.API_PORT, config.API_SERVER_BACKEND,
+                               config.API_SERVER_THREADS, config.API_KEEP_ALIVE_TIMEOUT,
+                               config.API_OUTPUT_BUFFER_SIZE_IN_BYTES, config.API_MAX_PENDING_CONNECTIONS)
+        api_thread = Thread(target=web_server.serve_forever, name="api-server", daemon=True)
         api_thread.start()
+        print("REST API served by {} on port {}".format(web_server.get_backend(), web_server.get_port()))
+
+        output_rate = RateMeter()
+        self._metrics_registry.gauge('vision_frames_per_second', 'Rate at which frames leave the pipeline.') \
+            .labels().set_function(output_rate.get_rate)
+        pipeline.instrument(self._metrics_registry, self._tracer)
+        pipeline.start()
+
+        while self._started and pipeline.is_running():
+            frame = pipeline.next_output(timeout=0.1)
+
+            if frame is not None:
+                output_rate.mark()
+                with self._tracer.span("output", 'stage', frame.get_sequence()):
+                    if self._video_debug:
+                        cv2.imshow("Image debug", frame.get_image())
+                        cv2.waitKey(1)
+                    frame.release()
+
+        pipeline.stop()
+        if self._frame_publisher is not None:
+            self._frame_publisher.stop()
+            self._websocket_publisher.stop()
+        self._subscription_server.stop()
+        self._event_loop_thread.stop()
+        self._mjpeg_broadcaster.stop()
+        web_server.shutdown()
+        segmentation_offloader.shutdown()
+
+    def stop(self):
+        self._started = False
+
+    def _dump_trace(self, signal_number, stack_frame):
+        print("Trace of {} events written to {}".format(self._tracer.get_event_count(),
+                                                        self._tracer.dump(config.TRACE_DIRECTORY)))
 
-        # image_source = VideoStreamImageSource(config.CAMERA_ID, VIDEO_WRITE)
-        image_source = SaveVideoImageSource('/Users/jeansebastien/Desktop/videos/video27.avi')
+    def _preprocess(self, frame):
+        frame.set_image(preprocess_image(frame.get_image(), self._camera_model))
+        return frame
 
-        if WEB_SOCKET:
-            try:
-                connection = create_connection(config.BASESTATION_WEBSOCKET_URL)
-                print("Connection to web socket established at {}\n".format(config.BASESTATION_WEBSOCKET_URL))
-            except ConnectionRefusedError:
-                print("Could not establish connection to web socket {}".format(config.BASESTATION_WEBSOCKET_URL))
-                print("Falling back to VIDEO DEBUG")
-                VIDEO_DEBUG = True
-                WEB_SOCKET = False
+    def _detect(self, frame):
+        frame.set_image_elements(self._detection_service.detect_all_world_elements(frame.get_image()))
+        return frame
 
-        while self._started:
-            if image_source.has_next_image():
-                image = image_source.next_image()
-                image = preprocess_image(image, camera_model)
+    def _translate(self, frame):
+        world_state = self._image_to_world_translator.translate_image_elements_to_world(frame.get_image_elements())
 
-                image_elements = detection_service.detect_all_world_elements(image)
-                world_state = image_to_world_translator.translate_image_elements_to_world(image_elements)
+        if world_state.robot_was_detected() and world_state.world_was_detected():
+            self._data_logger.log_robot_position(world_state.get_robot())
 
-                if world_state.robot_was_detected() and world_state.world_was_detected():
-                    data_logger.log_robot_position(world_state.get_robot())
+        frame.set_world_state(world_state)
+        frame.set_world_snapshot(self._world_snapshot_store.publish(world_state,
+                                                                    self._image_to_world_translator.get_obstacles(),
+                                                                    self._image_to_world_translator.get_drawing_area()))
+        return frame
 
-                if world_state.robot_was_detected():
-                    rendering_engine.render_planned_path(image, world_state.get_robot()._world_position,
-                                                         data_logger.get_path())
-                    rendering_engine.render_actual_path(image, data_logger.get_robot_positions())
+    def _render(self, frame):
+        image = frame.get_image()
+        world_state = frame.get_world_state()
 
-                rendering_engine.render_all_elements(image, world_state.get_image_elements())
+        if world_state.robot_was_detected():
+            self._rendering_engine.render_planned_path(image, world_state.get_robot()._world_position,
+                                                       self._data_logger.get_path())
+            self._rendering_engine.render_actual_path(image, self._data_logger.get_robot_positions())
 
-                if WEB_SOCKET:
-                    try:
-                        world_state_dto = message_assembler.create_world_state_dto(image, world_state)
-                        connection.send(json.dumps(world_state_dto))
-                    except NameError as e:
-                        print(e)
+        self._rendering_engine.render_all_elements(image, world_state.get_image_elements())
+        return frame
 
-                if VIDEO_DEBUG:
-                    cv2.imshow("Image debug", image)
-                    cv2.waitKey(1)
+    def _publish(self, frame):
+        self._mjpeg_broadcaster.publish(frame.get_image())
+        self._subscription_server.publish_snapshot(frame.get_world_snapshot())
+        self._subscription_server.publish_image(frame.get_image())
+        if self._frame_publisher is not None:
+            self._frame_publisher.publish(frame.get_image(), frame.get_world_snapshot())
+        return frame
 
 
 if __name__ == "__main__":
-    app = VisionApplication()
+    parser = argparse.ArgumentParser(description="Run the vision pipeline on the table camera or a recorded video")
+    parser.add_argument('--video', default=config.VIDEO_FILE_PATH,
+                        help="recorded video to replay instead of the camera")
+    arguments = parser.parse_args()
+
+    app = VisionApplication(arguments.video)
     app.start()
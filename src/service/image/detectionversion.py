@@ -0,0 +1,44 @@
+import os
+from collections import OrderedDict
+from itertools import count
+
+_versions = count(1)
+
+
+class DetectedElements(list):
+    pass
+
+
+def create_detection_version():
+    return os.getpid(), next(_versions)
+
+
+def set_detection_version(element, version):
+    if isinstance(element, list) and not isinstance(element, DetectedElements):
+        element = DetectedElements(element)
+    element._detection_version = version
+    return element
+
+
+def get_detection_version(element):
+    return getattr(element, '_detection_version', None)
+
+
+class VersionMemo:
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._entries = OrderedDict()
+
+    def get_or_compute(self, key, compute):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        value = compute()
+        self._entries[key] = value
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
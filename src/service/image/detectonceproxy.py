@@ -1,4 +1,5 @@
 from domain.detector.worldelement.iworldelementdetector import IWorldElementDetector
+from service.image.detectionversion import create_detection_version, set_detection_version
 
 
 class DetectOnceProxy(IWorldElementDetector):
@@ -11,7 +12,8 @@ class DetectOnceProxy(IWorldElementDetector):
         if self._has_detected:
             return self._detected_element
         else:
-            self._detected_element = self._detector.detect(image)
+            detected_element = self._detector.detect(image)
+            self._detected_element = set_detection_version(detected_element, create_detection_version())
             self._has_detected = True
             return self._detected_element
 
@@ -1,3 +1,5 @@
+import time
+
 from domain.detector.worldelement.iworldelementdetector import IWorldElementDetector
 from domain.detector.worldelement.obstaclepositiondetector import ObstacleDetector
 from service.image.detectonceproxy import DetectOnceProxy
@@ -6,18 +8,27 @@ from service.image.detectonceproxy import DetectOnceProxy
 class ImageDetectionService:
     def __init__(self):
         self._detectors = []
+        self._duration_histograms = None
+        self._tracer = None
 
     def detect_all_world_elements(self, image):
-        world_elements = []
+        return self._detect(image, self._detectors)
 
-        for detector in self._detectors:
-            try:
-                world_element = detector.detect(image)
-                world_elements.append(world_element)
-            except Exception as e:
-                print("World initialisation failure: {}".format(type(e).__name__))
+    def detect_per_frame_elements(self, image):
+        return self._detect(image, [detector for detector in self._detectors
+                                    if not isinstance(detector, DetectOnceProxy)])
 
-        return world_elements
+    # Elements of the detectors run once, detecting again only those not detected since the last reset
+    def detect_once_elements(self, image):
+        return self._detect(image, [detector for detector in self._detectors if isinstance(detector, DetectOnceProxy)])
+
+    def has_detected_once_elements(self):
+        return all(detector.has_detected() for detector in self._detectors if isinstance(detector, DetectOnceProxy))
+
+    def instrument(self, metrics_registry, tracer):
+        self._tracer = tracer
+        self._duration_histograms = metrics_registry.histogram('vision_detector_duration_seconds',
+                                                               'Time spent in a world element detector.')
 
     def register_detector(self, detector):
         if isinstance(detector, IWorldElementDetector):
@@ -41,3 +52,29 @@ class ImageDetectionService:
 
     def detector_is_registered(self, detector):
         return detector in self._detectors
+
+    def _get_detector_name(self, detector):
+        if isinstance(detector, DetectOnceProxy):
+            detector = detector._detector
+        return type(detector).__name__
+
+    def _detect(self, image, detectors):
+        world_elements = []
+
+        for detector in detectors:
+            start = time.perf_counter()
+
+            try:
+                world_element = detector.detect(image)
+                world_elements.append(world_element)
+            except Exception as e:
+                print("World initialisation failure: {}".format(type(e).__name__))
+
+            if self._duration_histograms is not None:
+                duration = time.perf_counter() - start
+                detector_name = self._get_detector_name(detector)
+                self._duration_histograms.labels(detector=detector_name).observe(duration)
+                self._tracer.add_complete_event(detector_name, 'detector', start, duration,
+                                                self._tracer.get_current_sequence())
+
+        return world_elements
@@ -0,0 +1,8 @@
+import cv2
+
+
+def preprocess_image(image, camera_model):
+    image = camera_model.undistort_image(image)
+    image = cv2.medianBlur(image, ksize=5)
+    image = cv2.GaussianBlur(image, (5, 5), 1)
+    return image
@@ -3,11 +3,20 @@ import numpy as np
 
 from config import LOWER_BACKGROUND, UPPER_BACKGROUND, LOWER_FIGURE_HSV, UPPER_FIGURE_HSV
 
+MORPHOLOGY_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, ksize=(3, 3))
+MIN_FIGURE_AREA = 9000
+MIN_SEGMENTS_AREA = 15000
+SEGMENTS_COLOR = (0, 85, 255)  # HSV (10, 255, 255) in BGR
+
 
 class NoSegmentsFound(Exception):
     pass
 
 
+class InvalidImage(Exception):
+    pass
+
+
 def extract_region_of_interest(image, contour):
     x, y, h, w = cv2.boundingRect(contour)
     return image[y:y + w + 20, x:x + h + 20]
@@ -58,62 +67,79 @@ def find_center_of_mass(contour):
 
 
 def threshold_green(image):
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    mask = cv2.inRange(image, LOWER_FIGURE_HSV, UPPER_FIGURE_HSV)
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, ksize=(3, 3))
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel=kernel, iterations=1)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel=kernel, iterations=1)
-    image = cv2.cvtColor(image, cv2.COLOR_HSV2BGR)
+    hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv_image, LOWER_FIGURE_HSV, UPPER_FIGURE_HSV)
+    cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel=MORPHOLOGY_KERNEL, dst=mask, iterations=1)
+    cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel=MORPHOLOGY_KERNEL, dst=mask, iterations=1)
     return mask
 
 
-def segment_image(image):
-    mask = threshold_green(image)
+# Candidates keep the contour order, segment_image picks the first one holding segments as the former loop did
+def find_figure_candidates(mask):
+    contours = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)[-2]
+    candidates = []
+
+    for contour in contours:
+        perimeter = cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, 0.045 * perimeter, True)
 
-    ret, contours, hierachy = cv2.findContours(mask.copy(), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        if len(approx) == 4 and cv2.contourArea(approx) > MIN_FIGURE_AREA and cv2.isContourConvex(approx):
+            candidates.append(approx)
 
-    figure_found = False
+    return candidates
 
+
+def find_figure_segments(inner_figure):
+    hsv_figure = cv2.cvtColor(inner_figure, cv2.COLOR_BGR2HSV)
+    figure_mask = cv2.inRange(hsv_figure, LOWER_BACKGROUND, UPPER_BACKGROUND)
+    cv2.morphologyEx(figure_mask, cv2.MORPH_CLOSE, MORPHOLOGY_KERNEL, dst=figure_mask, iterations=2)
+    cv2.bitwise_not(figure_mask, dst=figure_mask)
+
+    contours = cv2.findContours(figure_mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)[-2]
+
+    segments = []
     for contour in contours:
         perimeter = cv2.arcLength(contour, True)
-        approx = cv2.approxPolyDP(contour, 0.045 * perimeter, True)
+        approx = cv2.approxPolyDP(contour, 0.006 * perimeter, True)
 
-        if len(approx) == 4 and cv2.contourArea(approx) > 9000 and cv2.isContourConvex(approx) and not figure_found:
-            src_pts = np.array([x[0] for x in approx])
-            inner_figure = straigthen_figure(image, src_pts)
+        if len(approx) > 4 and cv2.contourArea(approx) > MIN_SEGMENTS_AREA:
+            segments.append(approx)
 
-            inner_figure = cv2.cvtColor(inner_figure, cv2.COLOR_BGR2HSV)
-            figure_mask = cv2.inRange(inner_figure, LOWER_BACKGROUND, UPPER_BACKGROUND)
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, ksize=(3, 3))
-            figure_mask = cv2.morphologyEx(figure_mask, cv2.MORPH_CLOSE, kernel, iterations=2)
-            figure_mask = (255 - figure_mask)
+    return segments, figure_mask
 
-            ret_2, contours_2, hierachy_2 = cv2.findContours(
-                figure_mask.copy(),
-                cv2.RETR_LIST,
-                cv2.CHAIN_APPROX_SIMPLE
-            )
 
-            found_segments = []
-            for contour_2 in contours_2:
-                peri_2 = cv2.arcLength(contour_2, True)
-                approx_2 = cv2.approxPolyDP(contour_2, 0.006 * peri_2, True)
+def segment_image(image, annotate=True):
+    mask = threshold_green(image)
 
-                if cv2.contourArea(approx_2) > 15000 and len(approx_2) > 4:
-                    found_segments = approx_2
-                    cv2.drawContours(inner_figure, [approx_2], -1, (10, 255, 255), 2)
+    for candidate in find_figure_candidates(mask):
+        inner_figure = straigthen_figure(image, candidate[:, 0])
+        if inner_figure is None:
+            continue
 
-            inner_figure = cv2.cvtColor(inner_figure, cv2.COLOR_HSV2BGR)
+        segments, figure_mask = find_figure_segments(inner_figure)
 
-            if len(found_segments) > 0:
-                center_of_mass = find_center_of_mass(found_segments)
+        if len(segments) > 0:
+            found_segments = segments[-1]
+            center_of_mass = find_center_of_mass(found_segments)
 
+            if annotate:
+                cv2.drawContours(inner_figure, segments, -1, SEGMENTS_COLOR, 2)
                 cv2.circle(inner_figure, tuple(center_of_mass), 12, (255, 255, 255), 2)
                 cv2.circle(inner_figure, tuple(center_of_mass), 2, (255, 255, 255), 1)
 
-                figure_found = True
+            return found_segments, inner_figure, center_of_mass, figure_mask
+
+    raise NoSegmentsFound
+
+
+def segment_encoded_image(image_data):
+    image = cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise InvalidImage
+
+    segments, segmented_image, center_of_mass, mask = segment_image(image)
+    success, segmented_image_encoded = cv2.imencode('.jpg', segmented_image)
+    success, mask_encoded = cv2.imencode('.jpg', mask)
 
-    if figure_found:
-        return found_segments, inner_figure, center_of_mass, figure_mask
-    else:
-        raise NoSegmentsFound
+    # Only the shape of the segmented image is needed once encoded, it may come back from a worker process
+    return segments, segmented_image.shape, segmented_image_encoded.tobytes(), mask_encoded.tobytes()
@@ -7,76 +7,77 @@ from numpy import dot
 
 import config
 from domain.geometry.coordinate import Coordinate
+from domain.geometry.polyline import simplify_polyline
 from domain.geometry.transformationmatrixbuilder import TransformationMatrixBuilder
 from domain.world.drawingarea import DrawingArea
 from domain.world.robot import Robot
 from domain.world.table import Table
 from domain.world.world import World
+from service.image.detectionversion import VersionMemo, get_detection_version
 from service.image.worldstate import WorldState
 
+MEMOIZED_VERSIONS = 8
+
 
 class ImageToWorldTranslator:
-    def __init__(self, camera_model):
+    def __init__(self, camera_model, pixel_world_map_repository=None):
         self._camera_model = camera_model
+        self._pixel_world_map_repository = pixel_world_map_repository
         self._world = None
         self._robot = None
         self._obstacles = None
         self._drawing_area = None
+        self._world_version = None
+        self._world_memo = VersionMemo(MEMOIZED_VERSIONS)
+        self._drawing_area_memo = VersionMemo(MEMOIZED_VERSIONS)
+        self._obstacles_memo = VersionMemo(MEMOIZED_VERSIONS)
 
     def translate_image_elements_to_world(self, image_elements):
+        translated_elements = []
+
         for image_element in image_elements:
             if isinstance(image_element, Table):
-                self._world = self._translate_table_element_to_world(image_element)
+                world_key = self._memo_key(image_element, None)
+                self._world = self._world_memo.get_or_compute(
+                    world_key,
+                    lambda: self._translate_table_element_to_world(image_element))
+                self._world_version = world_key
+                translated_elements.append(image_element)
 
             elif isinstance(image_element, DrawingArea):
-                inner_square_dimension = self._get_rectangle_dimension(image_element._inner_square)
-                image_element.set_inner_square_dimension(inner_square_dimension)
-
-                top_right = image_element._outer_square.as_contour_points()[1]
-
-                self._drawing_area = image_element
-
-                target_point = self._camera_model.image_to_target_coordinates(top_right[0], top_right[1], 0)
-
-                if self._world is not None:
-                    world_point = self._camera_model.transform_coordinates(self._world._target_to_world,
-                                                                           np.array(target_point))
-
-                    self._drawing_area._top_right = world_point
+                self._drawing_area = self._drawing_area_memo.get_or_compute(
+                    self._memo_key(image_element, self._world_version),
+                    lambda: self._translate_drawing_area(image_element))
+                translated_elements.append(self._drawing_area)
 
             elif isinstance(image_element, Robot):
                 self._robot = self._compute_and_set_projected_coordinates(image_element)
+                translated_elements.append(self._robot)
 
             elif isinstance(image_element, list):
-                self._obstacles = [self._adjust_obstacle_position(obstacle) for obstacle in image_element]
-
-        if self._robot and self._world is not None and self._was_detected(Robot, image_elements):
-            robot_target_to_world_in_mm = self._target_to_world_coordinate(self._world._target_to_world,
-                                                                           self._robot._world_position)
-            self._robot.set_world_position(robot_target_to_world_in_mm)
-
-        if self._obstacles and self._world is not None:
-            world_obstacles = []
+                self._obstacles = self._obstacles_memo.get_or_compute(
+                    self._memo_key(image_element, self._world_version),
+                    lambda: self._translate_obstacles(image_element))
+                translated_elements.append(self._obstacles)
 
-            for obstacle in self._obstacles:
-                obstacle_target_to_world_in_mm = self._target_to_world_coordinate(self._world._target_to_world,
-                                                                                  obstacle._world_position)
-                obstacle.set_world_position(obstacle_target_to_world_in_mm)
-                world_obstacles.append(obstacle)
+            else:
+                translated_elements.append(image_element)
 
-            self._obstacles = world_obstacles
-
-        return WorldState(self._world, self._robot, image_elements)
+        if self._robot and self._world is not None and self._was_detected(Robot, image_elements):
+            robot_world_position_in_mm = self._image_to_world_coordinate(self._robot._position,
+                                                                         config.ROBOT_HEIGHT_IN_TARGET_UNIT)
+            self._robot.set_world_position(robot_world_position_in_mm)
 
-    def transform_segments(self, segmented_image, segments, scaling_factor, orientation):
-        segmented_image_width = segmented_image.shape[0]
-        drawing_area = self._drawing_area
+        return WorldState(self._world, self._robot, translated_elements)
 
-        drawing_area_center = array(drawing_area._inner_square._center)
-        drawing_area_inner = drawing_area._inner_square.as_coordinates()
+    # The REST handlers run beside the pipeline, they pass the world of a snapshot rather than reading self._world
+    # Takes the drawing area from the same world snapshot as target_to_world, the live one may not be detected yet
+    def transform_segments(self, segmented_image_shape, segments, scaling_factor, orientation, target_to_world,
+                           drawing_area):
+        segmented_image_width = segmented_image_shape[0]
 
-        drawing_area_inner_width = drawing_area_inner[1].distance_from(drawing_area_inner[0])
-        scaling = drawing_area_inner_width / segmented_image_width * scaling_factor
+        drawing_area_center = array([drawing_area.image_center_x, drawing_area.image_center_y])
+        scaling = drawing_area.image_inner_width / segmented_image_width * scaling_factor
 
         segmented_image_center = array([segmented_image_width / 2 * scaling, segmented_image_width / 2 * scaling])
         translation = (drawing_area_center - segmented_image_center).tolist()
@@ -89,24 +90,56 @@ class ImageToWorldTranslator:
             .translate(translation[0], translation[1]) \
             .build()
 
-        segments = list(map(lambda p: dot(scale_matrix, array([p[0], p[1], 1])), segments[:, 0].tolist()))
-        segments = list(map(lambda p: p.astype('int').tolist()[0:2], segments))
+        points = np.asarray(segments, dtype=float).reshape(-1, 2)
+        homogeneous_points = np.column_stack((points, np.ones(len(points))))
+        segments = dot(homogeneous_points, scale_matrix.T)[:, 0:2].astype(int)
 
-        world_segments = self._image_to_target_list(segments, 0)
-        world_segments = self._target_to_world_list(world_segments)
+        world_segments = self._image_to_world_array(segments, 0, target_to_world)
 
-        return segments, world_segments
+        kept_points = simplify_polyline(world_segments, config.POLYLINE_TOLERANCE_IN_MM, config.POLYLINE_MAX_VERTICES,
+                                        closed=True)
 
-    def translate_path(self, world_path):
-        if self._world:
-            return self._world_to_image(world_path)
+        return segments[kept_points], world_segments[kept_points]
+
+    def translate_path(self, world_path, target_to_world):
+        if target_to_world is not None:
+            world_path = np.asarray(world_path, dtype=float).reshape(-1, 2)
+            kept_points = simplify_polyline(world_path, config.POLYLINE_TOLERANCE_IN_MM, config.POLYLINE_MAX_VERTICES)
+            return self._world_to_image(world_path[kept_points], target_to_world)
         else:
             return []
 
+    def _memo_key(self, image_element, world_version):
+        version = get_detection_version(image_element)
+        if version is None:
+            return object()
+        return version, world_version
+
+    def _translate_drawing_area(self, drawing_area):
+        inner_square_dimension = self._get_rectangle_dimension(drawing_area._inner_square)
+        drawing_area.set_inner_square_dimension(inner_square_dimension)
+
+        if self._world is not None:
+            top_right = drawing_area._outer_square.as_contour_points()[1]
+            image_to_world = self._camera_model.get_image_to_world_homography(0, self._world._target_to_world)
+            drawing_area._top_right = self._camera_model.transform_coordinates(image_to_world, top_right)
+
+        return drawing_area
+
+    def _translate_obstacles(self, obstacles):
+        obstacles = [self._adjust_obstacle_position(obstacle) for obstacle in obstacles]
+
+        if self._world is not None:
+            for obstacle in obstacles:
+                obstacle_world_position_in_mm = self._image_to_world_coordinate(obstacle._position,
+                                                                                config.OBSTACLE_HEIGHT_IN_TARGET_UNIT)
+                obstacle.set_world_position(obstacle_world_position_in_mm)
+
+        return obstacles
+
     def _compute_world_transform_matrix(self, table, world_origin):
         x_axis = np.array([world_origin, table._rectangle.as_contour_points().tolist()[1]])
-        x_axis = [np.array(self._camera_model.image_to_target_coordinates(point[0], point[1], 0)) for point in
-                  x_axis]
+        x_axis = self._camera_model.image_to_target_coordinates_array(x_axis, 0)
 
         v1 = x_axis[0]
         v2 = x_axis[1]
@@ -134,9 +167,7 @@ class ImageToWorldTranslator:
                                                                             config.ROBOT_HEIGHT_IN_TARGET_UNIT)
         robot.set_world_position(target_coordinates)
 
-        adjusted_image_coordinates = self._camera_model.target_to_image_coordinates(target_coordinates[0],
-                                                                                    target_coordinates[1],
-                                                                                    0)
+        adjusted_image_coordinates = self._project_on_floor(robot._position, config.ROBOT_HEIGHT_IN_TARGET_UNIT)
         robot.set_image_position(adjusted_image_coordinates)
         return robot
 
@@ -146,12 +177,36 @@ class ImageToWorldTranslator:
                                                                             config.OBSTACLE_HEIGHT_IN_TARGET_UNIT)
         obstacle.set_world_position(target_coordinates)
 
-        adjusted_position = self._camera_model.target_to_image_coordinates(target_coordinates[0],
-                                                                           target_coordinates[1],
-                                                                           0)
+        adjusted_position = self._project_on_floor(obstacle._position, config.OBSTACLE_HEIGHT_IN_TARGET_UNIT)
         obstacle.set_position(adjusted_position)
         return obstacle
 
+    def _project_on_floor(self, image_position, height):
+        image_to_floor_image = self._camera_model.get_image_to_floor_image_homography(height)
+        floor_position = self._camera_model.transform_coordinates(image_to_floor_image, image_position)
+        return np.array(floor_position).astype('int').tolist()
+
+    def _image_to_world_coordinate(self, image_position, height):
+        return self._image_to_world_array([image_position], height, self._world._target_to_world)[0].tolist()
+
+    def _image_to_world_array(self, image_positions, height, target_to_world):
+        image_positions = np.asarray(image_positions, dtype=float).reshape(-1, 2)
+        image_to_world = self._camera_model.get_image_to_world_homography(height, target_to_world,
+                                                                          config.TARGET_SIDE_LENGTH)
+
+        if self._pixel_world_map_repository is None:
+            return self._camera_model.transform_coordinates_array(image_to_world, image_positions)
+
+        pixel_world_map = self._pixel_world_map_repository.find_or_create(self._camera_model, height,
+                                                                          target_to_world)
+        in_map = pixel_world_map.contains(image_positions)
+
+        world_positions = np.empty((len(image_positions), 2))
+        world_positions[in_map] = pixel_world_map.lookup(image_positions[in_map])
+        world_positions[~in_map] = self._camera_model.transform_coordinates_array(image_to_world,
+                                                                                  image_positions[~in_map])
+        return world_positions
+
     def _translate_table_element_to_world(self, table):
         table_dimensions = self._get_rectangle_dimension(table._rectangle)
         world_origin = table._rectangle.as_contour_points().tolist()[0]
@@ -162,22 +217,7 @@ class ImageToWorldTranslator:
                      target_to_world)
 
     def _image_to_target_list(self, coordinates_list, height):
-        return [self._camera_model.image_to_target_coordinates(p[0], p[1], height)[0:2] for p in
-                coordinates_list]
-
-    def _target_to_world_list(self, coordinates_list):
-        return [self._target_to_world_coordinate(self._world._target_to_world, np.array(p)) for p in
-                coordinates_list]
-
-    def _target_to_world_coordinate(self, target_to_world_matrix, target_coordinates):
-        world_position = self._camera_model.transform_coordinates(target_to_world_matrix, target_coordinates)
-
-        world_position_in_mm = [
-            world_position[0] * config.TARGET_SIDE_LENGTH,
-            world_position[1] * config.TARGET_SIDE_LENGTH
-        ]
-
-        return world_position_in_mm
+        return self._camera_model.image_to_target_coordinates_array(coordinates_list, height)[:, 0:2].tolist()
 
     def _get_rectangle_dimension(self, square):
         square_corners = np.round(square.as_contour_points()).astype('int').tolist()
@@ -202,17 +242,15 @@ class ImageToWorldTranslator:
     def _to_coordinates_list(self, points):
         return [Coordinate(point[0], point[1]) for point in points]
 
-    def _world_to_image(self, world_path):
-        translate_matrix = np.linalg.inv(self._world._target_to_world)
+    def _world_to_image(self, world_path, target_to_world):
+        translate_matrix = np.linalg.inv(np.asarray(target_to_world, dtype=float))
 
-        target_path = [
-            self._camera_model.transform_coordinates(translate_matrix, np.array(point) / config.TARGET_SIDE_LENGTH)
-            for point in world_path]
+        target_path = self._camera_model.transform_coordinates_array(
+            translate_matrix, np.array(world_path, dtype=float) / config.TARGET_SIDE_LENGTH)
 
-        image_path = [self._camera_model.target_to_image_coordinates(point[0], point[1], 0) for point in
-                      target_path]
+        image_path = self._camera_model.target_to_image_coordinates_array(target_path, 0)
 
-        return image_path
+        return image_path.astype('int').tolist()
 
     def _was_detected(self, world_element, world_elements):
         return [isinstance(element, world_element) for element in world_elements].count(True) > 0
@@ -222,3 +260,6 @@ class ImageToWorldTranslator:
 
     def get_world(self):
         return self._world
+
+    def get_drawing_area(self):
+        return self._drawing_area
@@ -0,0 +1,67 @@
+import hashlib
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+import numpy as np
+
+SegmentationResult = namedtuple('SegmentationResult', ['segments', 'world_segments', 'image', 'thresholded_image'])
+
+POINT_SIZE_IN_BYTES = 16
+
+
+def create_segmentation_key(image_data, scaling_factor, orientation, world_snapshot):
+    image_hash = hashlib.blake2b(image_data, digest_size=16).digest()
+    return (image_hash, scaling_factor, orientation, world_snapshot.versions.world,
+            world_snapshot.versions.drawing_area)
+
+
+def estimate_result_size(result):
+    return len(result.image) + len(result.thresholded_image) + \
+           (np.size(result.segments) + np.size(result.world_segments)) * POINT_SIZE_IN_BYTES
+
+
+class SegmentationCache:
+    def __init__(self, max_size_in_bytes):
+        self._max_size_in_bytes = max_size_in_bytes
+        self._size_in_bytes = 0
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key, result):
+        size = estimate_result_size(result)
+        if size > self._max_size_in_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._size_in_bytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (result, size)
+            self._size_in_bytes += size
+
+            while self._size_in_bytes > self._max_size_in_bytes:
+                evicted_result, evicted_size = self._entries.popitem(last=False)[1]
+                self._size_in_bytes -= evicted_size
+
+    def get_hit_rate(self):
+        lookups = self._hits + self._misses
+        return self._hits / lookups if lookups > 0 else 0.
+
+    def get_size_in_bytes(self):
+        return self._size_in_bytes
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,284 @@
+import math
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+import config
+
+TABLE_SIZE_IN_MM = (2200, 1100)
+TABLE_BORDER_IN_MM = 25
+DRAWING_AREA_OUTER_SIDE_IN_MM = 700
+DRAWING_AREA_INNER_SIDE_IN_MM = 620
+DRAWING_AREA_MARGIN_IN_MM = 150
+ROBOT_SIDE_IN_MM = 200
+ROBOT_MARKER_RADIUS_IN_MM = 22
+ROBOT_MARKER_DISTANCE_IN_MM = 75
+ROBOT_MARKER_SPREAD_IN_DEGREES = 140
+OBSTACLE_RADIUS_IN_MM = 55
+OBSTACLE_RIM_IN_MM = 4
+OBSTACLE_TRIANGLE_BASE_IN_MM = 40
+OBSTACLE_TRIANGLE_HEIGHT_IN_MM = 65
+OBSTACLE_CIRCLE_RADIUS_IN_MM = 23
+OBSTACLE_MIN_SPACING_IN_MM = 250
+DISTRACTOR_SIZE_IN_MM = (20, 130)
+CIRCLE_VERTEX_COUNT = 72
+FLOOR_TEXTURE_AMPLITUDE = 35
+FLOOR_TEXTURE_GRAIN = 6  # in pixels at the calibration resolution
+PLACEMENT_MAX_ATTEMPTS = 1000
+
+FLOOR_COLOR = (70, 70, 75)
+TABLE_COLOR = (205, 205, 200)
+TABLE_BORDER_COLOR = (35, 35, 35)
+GREEN_COLOR = (60, 170, 40)
+ROBOT_COLOR = (225, 225, 220)
+FUCHSIA_COLOR = (190, 48, 219)
+OBSTACLE_COLOR = (245, 245, 245)
+OBSTACLE_RIM_COLOR = (60, 60, 60)
+GLYPH_COLOR = (20, 20, 20)
+
+OBSTACLE_SHAPES = (('Triangle', 'Left'), ('Triangle', 'Right'), ('Circle', ''))
+
+RobotPose = namedtuple('RobotPose', ['position', 'angle'])
+ObstaclePlacement = namedtuple('ObstaclePlacement', ['position', 'shape', 'orientation'])
+SceneLayout = namedtuple('SceneLayout', ['table_center', 'drawing_area_center', 'robot', 'obstacles'])
+
+RobotGroundTruth = namedtuple('RobotGroundTruth', ['position', 'angle', 'image_position', 'image_leading_marker',
+                                                   'image_angle'])
+ObstacleGroundTruth = namedtuple('ObstacleGroundTruth', ['position', 'shape', 'orientation', 'image_position',
+                                                         'image_radius'])
+PolygonGroundTruth = namedtuple('PolygonGroundTruth', ['corners', 'image_corners'])
+SceneGroundTruth = namedtuple('SceneGroundTruth', ['robot', 'obstacles', 'table', 'drawing_area_inner',
+                                                   'drawing_area_outer', 'distractor_count'])
+SyntheticScene = namedtuple('SyntheticScene', ['image', 'ground_truth'])
+
+
+def mm_to_target_unit(length):
+    return length / config.TARGET_SIDE_LENGTH
+
+
+class SyntheticSceneRenderer:
+    def __init__(self, camera_model, image_size=(config.CAP_WIDTH, config.CAP_HEIGHT), distortion=True,
+                 noise=3., blur=0.8):
+        self._image_size = tuple(image_size)
+        self._camera_model = camera_model.scale(float(image_size[0]) / config.CAP_WIDTH)
+        self._distortion = distortion
+        self._noise = noise
+        self._blur = blur
+        self._distortion_maps = None
+
+    def get_camera_model(self):
+        return self._camera_model
+
+    def get_image_size(self):
+        return self._image_size
+
+    def get_view_center(self):
+        width, height = self._image_size
+        return tuple(self._camera_model.image_to_target_coordinates_array([[width / 2., height / 2.]], 0)[0, 0:2])
+
+    def create_random_layout(self, random_state, obstacle_count=2):
+        table_center = np.array(self.get_view_center())
+        table_half_size = np.array([mm_to_target_unit(side) for side in TABLE_SIZE_IN_MM]) / 2
+        outer_half_side = mm_to_target_unit(DRAWING_AREA_OUTER_SIDE_IN_MM) / 2
+        margin = mm_to_target_unit(DRAWING_AREA_MARGIN_IN_MM)
+        drawing_area_center = table_center + [table_half_size[0] - outer_half_side - margin, 0]
+
+        free_area_low = table_center - table_half_size
+        free_area_high = np.array([drawing_area_center[0] - outer_half_side - margin,
+                                   table_center[1] + table_half_size[1]])
+        spacing = mm_to_target_unit(OBSTACLE_MIN_SPACING_IN_MM)
+
+        positions = []
+        for _ in range(PLACEMENT_MAX_ATTEMPTS):
+            candidate = random_state.uniform(free_area_low, free_area_high)
+            if self._is_on_table(candidate, table_center, table_half_size, margin) and \
+                    all(np.linalg.norm(candidate - position) > spacing for position in positions):
+                positions.append(candidate)
+                if len(positions) == obstacle_count + 1:
+                    break
+        else:
+            raise ValueError("could not place the robot and {} obstacles apart on the table".format(obstacle_count))
+
+        robot = RobotPose(tuple(positions[0]), float(random_state.uniform(-180, 180)))
+        obstacles = [ObstaclePlacement(tuple(position), *OBSTACLE_SHAPES[random_state.randint(len(OBSTACLE_SHAPES))])
+                     for position in positions[1:]]
+
+        return SceneLayout(tuple(table_center), tuple(drawing_area_center), robot, obstacles)
+
+    def render(self, layout, clutter=0, random_state=None):
+        if random_state is None:
+            random_state = np.random.RandomState()
+
+        image = self._draw_floor(random_state)
+        table = self._draw_table(image, layout.table_center)
+        drawing_area_inner, drawing_area_outer = self._draw_drawing_area(image, layout.drawing_area_center)
+        distractor_count = self._draw_distractors(image, layout, clutter, random_state)
+        obstacles = [self._draw_obstacle(image, obstacle) for obstacle in layout.obstacles]
+        robot = self._draw_robot(image, layout.robot)
+
+        image = self._apply_camera(image, random_state)
+
+        return SyntheticScene(image, SceneGroundTruth(robot, obstacles, table, drawing_area_inner,
+                                                      drawing_area_outer, distractor_count))
+
+    # Raised elements are seen off their footprint, keep their whole image inside the table so none hides its edges
+    def _is_on_table(self, position, table_center, table_half_size, margin):
+        table = self._project(self._rectangle(table_center, table_half_size - margin), 0).astype(np.float32)
+        half_size = mm_to_target_unit(max(ROBOT_SIDE_IN_MM / math.sqrt(2), OBSTACLE_RADIUS_IN_MM))
+        for d in (config.ROBOT_HEIGHT_IN_TARGET_UNIT, config.OBSTACLE_HEIGHT_IN_TARGET_UNIT):
+            for corner in self._project(self._rectangle(position, half_size), d):
+                if cv2.pointPolygonTest(table, tuple(float(value) for value in corner), False) < 0:
+                    return False
+        return True
+
+    def _draw_floor(self, random_state):
+        width, height = self._image_size
+        grain = FLOOR_TEXTURE_GRAIN * float(width) / config.CAP_WIDTH
+        texture = random_state.normal(0, FLOOR_TEXTURE_AMPLITUDE,
+                                      (int(math.ceil(height / grain)), int(math.ceil(width / grain)), 1))
+        texture = cv2.resize(texture, (width, height), interpolation=cv2.INTER_LINEAR)[:, :, np.newaxis]
+        return np.clip(np.array(FLOOR_COLOR) + texture, 0, 255).astype(np.uint8)
+
+    def _draw_table(self, image, table_center):
+        half_size = np.array([mm_to_target_unit(side) for side in TABLE_SIZE_IN_MM]) / 2
+        border = mm_to_target_unit(TABLE_BORDER_IN_MM)
+        corners = self._rectangle(table_center, half_size)
+
+        self._fill_polygon(image, self._rectangle(table_center, half_size + border), 0, TABLE_BORDER_COLOR)
+        self._fill_polygon(image, corners, 0, TABLE_COLOR)
+
+        return PolygonGroundTruth(corners, self._project(corners, 0))
+
+    def _draw_drawing_area(self, image, center):
+        outer = self._rectangle(center, mm_to_target_unit(DRAWING_AREA_OUTER_SIDE_IN_MM) / 2)
+        inner = self._rectangle(center, mm_to_target_unit(DRAWING_AREA_INNER_SIDE_IN_MM) / 2)
+
+        self._fill_polygon(image, outer, 0, GREEN_COLOR)
+        self._fill_polygon(image, inner, 0, TABLE_COLOR)
+
+        return PolygonGroundTruth(inner, self._project(inner, 0)), PolygonGroundTruth(outer, self._project(outer, 0))
+
+    def _draw_robot(self, image, robot):
+        d = config.ROBOT_HEIGHT_IN_TARGET_UNIT
+        center = np.array(robot.position)
+        angle = math.radians(robot.angle)
+        marker_distance = mm_to_target_unit(ROBOT_MARKER_DISTANCE_IN_MM)
+        spread = math.radians(ROBOT_MARKER_SPREAD_IN_DEGREES)
+
+        body = self._rotate(self._rectangle((0, 0), mm_to_target_unit(ROBOT_SIDE_IN_MM) / 2), angle) + center
+        self._fill_polygon(image, body, d, ROBOT_COLOR)
+
+        markers = [center + marker_distance * np.array([math.cos(angle + offset), math.sin(angle + offset)])
+                   for offset in (0, spread, -spread)]
+        for marker in markers:
+            self._fill_polygon(image, self._circle(marker, mm_to_target_unit(ROBOT_MARKER_RADIUS_IN_MM)), d,
+                               FUCHSIA_COLOR)
+
+        image_position, image_leading_marker = self._project([center, markers[0]], d)
+        image_direction = image_leading_marker - image_position
+        image_angle = math.degrees(math.atan2(-image_direction[1], image_direction[0]))
+
+        return RobotGroundTruth(tuple(center), robot.angle, image_position, image_leading_marker, image_angle)
+
+    def _draw_obstacle(self, image, obstacle):
+        d = config.OBSTACLE_HEIGHT_IN_TARGET_UNIT
+        center = np.array(obstacle.position)
+        radius = mm_to_target_unit(OBSTACLE_RADIUS_IN_MM)
+
+        self._fill_polygon(image, self._circle(center, radius), d, OBSTACLE_RIM_COLOR)
+        self._fill_polygon(image, self._circle(center, radius - mm_to_target_unit(OBSTACLE_RIM_IN_MM)), d,
+                           OBSTACLE_COLOR)
+
+        if obstacle.shape == 'Triangle':
+            half_base = mm_to_target_unit(OBSTACLE_TRIANGLE_BASE_IN_MM) / 2
+            half_height = mm_to_target_unit(OBSTACLE_TRIANGLE_HEIGHT_IN_MM) / 2
+            tip_direction = -1 if obstacle.orientation == 'Left' else 1
+            glyph = center + np.array([[0, tip_direction * half_height],
+                                       [-half_base, -tip_direction * half_height],
+                                       [half_base, -tip_direction * half_height]])
+            self._fill_polygon(image, glyph, d, GLYPH_COLOR)
+        elif obstacle.shape == 'Circle':
+            self._fill_polygon(image, self._circle(center, mm_to_target_unit(OBSTACLE_CIRCLE_RADIUS_IN_MM)), d,
+                               GLYPH_COLOR)
+
+        image_position, image_edge = self._project([center, center + [radius, 0]], d)
+
+        return ObstacleGroundTruth(tuple(center), obstacle.shape, obstacle.orientation, image_position,
+                                   float(np.linalg.norm(image_edge - image_position)))
+
+    def _draw_distractors(self, image, layout, clutter, random_state):
+        width, height = self._image_size
+        view = self._camera_model.image_to_target_coordinates_array([[0, 0], [width, height]], 0)[:, 0:2]
+        exclusions = [(np.array(layout.robot.position), mm_to_target_unit(ROBOT_SIDE_IN_MM))] + \
+                     [(np.array(obstacle.position), mm_to_target_unit(2 * OBSTACLE_RADIUS_IN_MM))
+                      for obstacle in layout.obstacles]
+        min_size, max_size = [mm_to_target_unit(size) for size in DISTRACTOR_SIZE_IN_MM]
+
+        distractor_count = 0
+        for _ in range(clutter):
+            for _ in range(PLACEMENT_MAX_ATTEMPTS):
+                center = random_state.uniform(view.min(axis=0), view.max(axis=0))
+                axes = random_state.uniform(min_size, max_size, 2) / 2
+                if all(np.linalg.norm(center - position) > clearance + axes.max()
+                       for position, clearance in exclusions):
+                    break
+            else:
+                continue
+
+            hsv = np.uint8([[[random_state.randint(180), random_state.randint(40, 256),
+                              random_state.randint(40, 256)]]])
+            color = tuple(int(channel) for channel in cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0])
+            ellipse = self._rotate(self._circle((0, 0), 1) * axes, random_state.uniform(0, math.pi)) + center
+            self._fill_polygon(image, ellipse, 0, color)
+            distractor_count += 1
+
+        return distractor_count
+
+    def _apply_camera(self, image, random_state):
+        if self._blur > 0:
+            image = cv2.GaussianBlur(image, (0, 0), self._blur)
+
+        if self._distortion:
+            map_x, map_y = self._get_distortion_maps()
+            image = cv2.remap(image, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+        if self._noise > 0:
+            noise = random_state.normal(0, self._noise, image.shape)
+            image = np.clip(image + noise, 0, 255).astype(np.uint8)
+
+        return image
+
+    # For every pixel of the distorted image, where to sample the ideal pinhole render, as cv2.undistort would invert
+    def _get_distortion_maps(self):
+        if self._distortion_maps is None:
+            width, height = self._image_size
+            intrinsic_parameters = self._camera_model.get_intrinsic_parameters()
+            grid = np.stack(np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32)),
+                            axis=-1).reshape(-1, 1, 2)
+            undistorted = cv2.undistortPoints(grid, intrinsic_parameters,
+                                              self._camera_model.get_distortion_coefficients(),
+                                              P=intrinsic_parameters).reshape(height, width, 2)
+            self._distortion_maps = (undistorted[:, :, 0].astype(np.float32), undistorted[:, :, 1].astype(np.float32))
+
+        return self._distortion_maps
+
+    def _project(self, points, d):
+        return self._camera_model.transform_coordinates_array(self._camera_model.get_plane_homography(d)[0], points)
+
+    def _fill_polygon(self, image, points, d, color):
+        image_points = np.round(self._project(points, d) * 16).astype(np.int32)
+        cv2.fillPoly(image, [image_points], color, lineType=cv2.LINE_AA, shift=4)
+
+    def _rectangle(self, center, half_size):
+        half_width, half_height = np.broadcast_to(half_size, 2)
+        return np.array(center) + np.array([[-half_width, -half_height], [half_width, -half_height],
+                                            [half_width, half_height], [-half_width, half_height]])
+
+    def _circle(self, center, radius):
+        angles = np.linspace(0, 2 * math.pi, CIRCLE_VERTEX_COUNT, endpoint=False)
+        return np.array(center) + radius * np.column_stack((np.cos(angles), np.sin(angles)))
+
+    def _rotate(self, points, angle):
+        rotation = np.array([[math.cos(angle), -math.sin(angle)], [math.sin(angle), math.cos(angle)]])
+        return np.dot(points, rotation.T)
@@ -0,0 +1,94 @@
+from collections import namedtuple
+from threading import Condition
+
+import config
+
+RobotPose = namedtuple('RobotPose', ['x', 'y', 'angle', 'image_x', 'image_y'])
+ObstacleState = namedtuple('ObstacleState', ['x', 'y', 'tag', 'radius'])
+TableGeometry = namedtuple('TableGeometry', ['width', 'length', 'origin_x', 'origin_y', 'target_to_world'])
+DrawingAreaGeometry = namedtuple('DrawingAreaGeometry', ['width', 'length', 'top_right_x', 'top_right_y',
+                                                         'image_center_x', 'image_center_y', 'image_inner_width'])
+ComponentVersions = namedtuple('ComponentVersions', ['robot', 'world', 'obstacles', 'drawing_area'])
+WorldSnapshot = namedtuple('WorldSnapshot', ['version', 'robot', 'world', 'obstacles', 'drawing_area', 'versions'])
+
+EMPTY_WORLD_SNAPSHOT = WorldSnapshot(0, None, None, (), None, ComponentVersions(0, 0, 0, 0))
+
+
+def get_target_to_world(world_snapshot):
+    return world_snapshot.world.target_to_world if world_snapshot.world is not None else None
+
+
+class WorldSnapshotStore:
+    def __init__(self):
+        self._latest = EMPTY_WORLD_SNAPSHOT
+        self._changed = Condition()
+
+    def get_latest(self):
+        return self._latest
+
+    def wait_for_change(self, get_version, known_version, timeout):
+        with self._changed:
+            self._changed.wait_for(lambda: get_version(self._latest) != known_version, timeout)
+            return self._latest
+
+    def publish(self, world_state, obstacles, drawing_area):
+        previous = self._latest
+
+        robot = self._to_robot_pose(world_state.get_robot())
+        world = self._to_table_geometry(world_state._world)
+        obstacles = self._to_obstacle_states(obstacles)
+        drawing_area = self._to_drawing_area_geometry(drawing_area)
+
+        versions = ComponentVersions(*[
+            version if component == previous_component else version + 1
+            for component, previous_component, version in zip(
+                (robot, world, obstacles, drawing_area),
+                (previous.robot, previous.world, previous.obstacles, previous.drawing_area),
+                previous.versions)
+        ])
+
+        snapshot = WorldSnapshot(previous.version + 1, robot, world, obstacles, drawing_area, versions)
+        self._latest = snapshot
+
+        if versions != previous.versions:
+            with self._changed:
+                self._changed.notify_all()
+        return snapshot
+
+    def _to_robot_pose(self, robot):
+        if robot is None or robot._world_position is None:
+            return None
+
+        return RobotPose(float(robot._world_position[0]), float(robot._world_position[1]), float(robot._angle),
+                         int(robot._image_position[0]), int(robot._image_position[1]))
+
+    def _to_table_geometry(self, world):
+        if world is None:
+            return None
+
+        return TableGeometry(world._width * 10, world._length * 10,
+                             world._image_origin._x, world._image_origin._y,
+                             tuple(tuple(float(value) for value in row) for row in world._target_to_world))
+
+    def _to_obstacle_states(self, obstacles):
+        if obstacles is None:
+            return ()
+
+        return tuple(ObstacleState(float(obstacle._world_position[0]), float(obstacle._world_position[1]),
+                                   obstacle._orientation.upper(), int(obstacle._radius))
+                     for obstacle in obstacles if obstacle._world_position is not None)
+
+    def _to_drawing_area_geometry(self, drawing_area):
+        if drawing_area is None or drawing_area._inner_square_dimension is None:
+            return None
+
+        top_right = getattr(drawing_area, '_top_right', None)
+        inner_corners = drawing_area._inner_square.as_coordinates()
+
+        return DrawingAreaGeometry(drawing_area._inner_square_dimension['width'] * 10,
+                                   drawing_area._inner_square_dimension['length'] * 10,
+                                   top_right[0] * config.TARGET_SIDE_LENGTH if top_right is not None else None,
+                                   top_right[1] * config.TARGET_SIDE_LENGTH if top_right is not None else None,
+                                   float(drawing_area._inner_square._center[0]),
+                                   float(drawing_area._inner_square._center[1]),
+                                   float(inner_corners[1].distance_from(inner_corners[0])))
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+import numpy as np
+
+from domain.camera.cameramodel import CameraModel
+
+
+def create_camera_model():
+    intrinsic_parameters = np.array([[800., 0., 640.], [0., 800., 400.], [0., 0., 1.]])
+    rotation_matrix = np.array([[1., 0., 0.], [0., -0.98, -0.2], [0., 0.2, -0.98]])
+    translation_vector = np.array([[-10.], [5.], [60.]])
+    extrinsic_parameters = np.concatenate((rotation_matrix, translation_vector), axis=1)
+    camera_matrix = np.dot(intrinsic_parameters, extrinsic_parameters)
+
+    return CameraModel(1, intrinsic_parameters, extrinsic_parameters, camera_matrix, np.zeros(5), rotation_matrix,
+                       translation_vector, [0, 0])
+
+
+class CameraModelTest(TestCase):
+    def setUp(self):
+        self.a_camera_model = create_camera_model()
+        self.image_points = np.array([[100., 120.], [640., 400.], [1200., 780.], [333., 555.]])
+
+    # Expected target points come from the ray and plane intersection the homographies replaced
+    def test_given_image_points_on_the_floor_when_projecting_them_then_returns_the_ray_and_plane_intersection(self):
+        target_points = self.a_camera_model.image_to_target_coordinates_array(self.image_points[0:3], 0.)
+
+        np.testing.assert_allclose([[-34.357143, 28.571429, 0.], [10., 5.102041, 0.], [48.939535, -21.860465, 0.]],
+                                   target_points, atol=1e-6)
+
+    def test_given_image_points_at_obstacle_height_when_projecting_them_then_returns_the_ray_and_plane_intersection(
+            self):
+        target_points = self.a_camera_model.image_to_target_coordinates_array(self.image_points[0:3], 10.)
+
+        np.testing.assert_allclose([[-41.777692, 34.538462, -10.], [10., 7.142857, -10.],
+                                    [55.453767, -24.330233, -10.]], target_points, atol=1e-6)
+
+    def test_given_image_points_at_robot_height_when_projecting_them_then_returns_the_ray_and_plane_intersection(self):
+        target_points = self.a_camera_model.image_to_target_coordinates_array(self.image_points[0:3], 270 / 44)
+
+        np.testing.assert_allclose([[-38.910662, 32.233017, -6.136364], [10., 6.35436, -6.136364],
+                                    [52.936905, -23.376004, -6.136364]], target_points, atol=1e-6)
+
+    def test_given_an_image_point_when_projecting_it_alone_then_returns_the_same_as_an_array_of_one_point(self):
+        self.assertEqual(self.a_camera_model.image_to_target_coordinates_array([[100., 120.]], 10.)[0].tolist(),
+                         self.a_camera_model.image_to_target_coordinates(100., 120., 10.))
+
+    def test_given_target_points_when_projecting_them_in_the_image_then_returns_the_original_image_points(self):
+        target_points = self.a_camera_model.image_to_target_coordinates_array(self.image_points, 0.)
+
+        image_points = self.a_camera_model.target_to_image_coordinates_array(target_points[:, 0:2], 0.)
+
+        np.testing.assert_allclose(self.image_points, image_points)
+
+    def test_given_coordinates_when_transforming_them_as_an_array_then_returns_the_same_as_one_at_a_time(self):
+        transform_matrix = np.array([[0., -1., 3.], [1., 0., -2.], [0., 0., 1.]])
+        expected_coordinates = [self.a_camera_model.transform_coordinates(transform_matrix, point)
+                                for point in self.image_points]
+
+        coordinates = self.a_camera_model.transform_coordinates_array(transform_matrix, self.image_points)
+
+        np.testing.assert_allclose(expected_coordinates, coordinates)
+
+    def test_given_an_image_point_projected_on_a_plane_when_projecting_it_back_then_returns_the_image_point(self):
+        x, y, z = self.a_camera_model.image_to_target_coordinates(333., 555., 6.)
+
+        image_point = self.a_camera_model.target_to_image_coordinates_array([x, y], z)
+
+        np.testing.assert_allclose([[333., 555.]], image_point)
+
+    def test_given_a_plane_when_asking_its_homographies_twice_then_returns_the_cached_homographies(self):
+        homographies = self.a_camera_model.get_plane_homography(6.)
+
+        self.assertIs(homographies, self.a_camera_model.get_plane_homography(6.))
+
+    def test_given_a_target_to_world_transform_when_projecting_with_the_world_homography_then_returns_the_world_point(
+            self):
+        target_to_world = np.array([[0., -1., 3.], [1., 0., -2.], [0., 0., 1.]])
+        target_point = self.a_camera_model.image_to_target_coordinates(333., 555., 6.)
+        expected_world_point = np.array(self.a_camera_model.transform_coordinates(target_to_world, target_point)) * 44
+
+        image_to_world = self.a_camera_model.get_image_to_world_homography(6., target_to_world, 44)
+
+        np.testing.assert_allclose(expected_world_point,
+                                   self.a_camera_model.transform_coordinates(image_to_world, [333., 555.]))
+
+    def test_given_a_scaled_camera_model_when_projecting_target_points_then_returns_the_scaled_image_points(self):
+        target_points = self.a_camera_model.image_to_target_coordinates_array(self.image_points, 6.)[:, 0:2]
+
+        scaled_camera_model = self.a_camera_model.scale(0.5)
+
+        np.testing.assert_allclose(self.image_points * 0.5,
+                                   scaled_camera_model.target_to_image_coordinates_array(target_points, -6.))
@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+import numpy as np
+
+from domain.camera.cameramodel import CameraModel
+from domain.camera.pixelworldmap import PixelWorldMap, generate_pixel_world_map
+
+
+class PixelWorldMapTest(TestCase):
+    def setUp(self):
+        grid_y, grid_x = np.mgrid[0:10, 0:20].astype(np.float32)
+        self.a_pixel_world_map = PixelWorldMap(np.stack((2 * grid_x + 1, 3 * grid_y - 4), axis=2))
+
+    def test_given_a_point_between_pixels_when_looking_it_up_then_returns_the_interpolated_world_point(self):
+        world_points = self.a_pixel_world_map.lookup([[4.5, 2.25], [19., 9.]])
+
+        np.testing.assert_allclose([[10., 2.75], [39., 23.]], world_points)
+
+    def test_given_points_outside_the_image_when_checking_if_the_map_contains_them_then_they_are_refused(self):
+        self.assertEqual([True, False, False], self.a_pixel_world_map.contains([[0, 0], [20, 5], [-1, 5]]).tolist())
+
+    def test_given_a_camera_model_when_generating_a_map_then_pixels_match_the_image_to_world_projection(self):
+        camera_matrix = np.array([[800., 0., 640., -900.], [0., -784., -400., 28000.], [0., 0.2, -0.98, 60.]])
+        camera_model = CameraModel(1, np.eye(3), np.eye(3, 4), camera_matrix, np.zeros(5), np.eye(3), np.zeros(3),
+                                   [0, 0])
+        target_to_world = np.array([[0., -1., 3.], [1., 0., -2.], [0., 0., 1.]])
+        image_to_world = camera_model.get_image_to_world_homography(6., target_to_world, 44)
+
+        pixel_world_map = generate_pixel_world_map(camera_model, 6., target_to_world, (100, 130), 44)
+
+        np.testing.assert_allclose(camera_model.transform_coordinates(image_to_world, [129, 70]),
+                                   pixel_world_map.lookup([[129, 70]])[0], rtol=1e-5)
@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+import numpy as np
+
+from domain.geometry.polyline import simplify_polyline
+
+A_TOLERANCE = 1.
+
+
+class PolylineTest(TestCase):
+    def test_given_collinear_points_when_simplifying_then_only_keeps_the_end_points(self):
+        points = [[0, 0], [10, 0], [20, 0.5], [30, 0]]
+
+        kept_points = simplify_polyline(points, A_TOLERANCE)
+
+        self.assertEqual([0, 3], kept_points.tolist())
+
+    def test_given_a_corner_when_simplifying_then_keeps_the_corner(self):
+        points = [[0, 0], [5, 0.2], [10, 0], [10, 5], [10, 10]]
+
+        kept_points = simplify_polyline(points, A_TOLERANCE)
+
+        self.assertEqual([0, 2, 4], kept_points.tolist())
+
+    def test_given_a_max_vertex_count_when_simplifying_then_keeps_the_most_significant_points(self):
+        points = [[0, 0], [10, 2], [20, 0], [30, 20], [40, 0]]
+
+        kept_points = simplify_polyline(points, A_TOLERANCE, max_vertex_count=3)
+
+        self.assertEqual([0, 3, 4], kept_points.tolist())
+
+    def test_given_a_closed_contour_when_simplifying_then_keeps_its_corners_without_repeating_the_first_point(self):
+        square = [[0, 0], [5, 0], [10, 0], [10, 5], [10, 10], [5, 10], [0, 10], [0, 5]]
+
+        kept_points = simplify_polyline(square, A_TOLERANCE, closed=True)
+
+        self.assertEqual([0, 2, 4, 6], kept_points.tolist())
+
+    def test_given_a_closed_contour_and_a_max_vertex_count_when_simplifying_then_keeps_at_most_that_many_points(self):
+        angles = np.linspace(0, 2 * np.pi, 100, endpoint=False)
+        circle = np.column_stack((np.cos(angles), np.sin(angles))) * 100
+
+        kept_points = simplify_polyline(circle, A_TOLERANCE, max_vertex_count=12, closed=True)
+
+        self.assertEqual(12, len(kept_points))
+
+    def test_given_two_points_when_simplifying_then_keeps_both(self):
+        self.assertEqual([0, 1], simplify_polyline([[0, 0], [1, 1]], A_TOLERANCE).tolist())
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+import numpy as np
+
+from domain.world.obstacle import Obstacle
+from domain.world.robot import Robot
+from domain.world.world import World
+from infrastructure.persistance.columnarworldstatelog import ColumnarWorldStateLog
+from service.image.worldstate import WorldState
+
+
+class ColumnarWorldStateLogTest(TestCase):
+    def setUp(self):
+        self.world = World(230, 110, 10, 20, np.eye(3))
+        self.robot = Robot((100, 100), [(100, 100), (120, 100)], None)
+        self.robot.set_world_position([500., 250.])
+        self.obstacle = Obstacle((300, 300), 35)
+        self.obstacle.set_orientation('Left')
+        self.obstacle.set_world_position([800., 400.])
+        self.a_log = ColumnarWorldStateLog()
+
+    def test_given_a_frame_with_a_robot_when_appending_it_then_the_robot_pose_is_in_the_columns(self):
+        self.a_log.append('video.avi', 3, WorldState(self.world, self.robot, [self.robot]), [])
+
+        columns = self.a_log.as_columns()
+
+        self.assertTrue(columns['robot_detected'][0])
+        self.assertEqual([500., 250.], [columns['robot_x'][0], columns['robot_y'][0]])
+        self.assertEqual([2300., 1100.], [columns['table_width'][0], columns['table_length'][0]])
+
+    def test_given_a_frame_where_the_robot_was_not_detected_when_appending_it_then_the_robot_pose_is_missing(self):
+        self.a_log.append('video.avi', 3, WorldState(self.world, self.robot, []), [])
+
+        columns = self.a_log.as_columns()
+
+        self.assertFalse(columns['robot_detected'][0])
+        self.assertTrue(np.isnan(columns['robot_x'][0]))
+
+    def test_given_two_logs_when_merging_them_then_obstacles_refer_to_the_merged_frame_rows(self):
+        self.a_log.append('video.avi', 0, WorldState(self.world, None, []), [])
+        another_log = ColumnarWorldStateLog()
+        another_log.append('video.avi', 1, WorldState(self.world, None, []), [self.obstacle])
+
+        self.a_log.merge(another_log)
+        columns = self.a_log.as_columns()
+
+        self.assertEqual(2, len(self.a_log))
+        self.assertEqual([1], columns['obstacle_row'].tolist())
+        self.assertEqual(['LEFT'], columns['obstacle_tag'].tolist())
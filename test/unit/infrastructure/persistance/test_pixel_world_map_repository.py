@@ -0,0 +1,79 @@
+import glob
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import mock
+import numpy as np
+
+from domain.camera.cameramodel import CameraModel
+from infrastructure.persistance import pixelworldmaprepository
+from infrastructure.persistance.pixelworldmaprepository import PixelWorldMapRepository
+
+A_PLANE_HEIGHT = 6.
+A_TARGET_TO_WORLD = np.eye(3)
+ANOTHER_TARGET_TO_WORLD = np.array([[0., -1., 3.], [1., 0., -2.], [0., 0., 1.]])
+
+
+class PixelWorldMapRepositoryTest(TestCase):
+    def setUp(self):
+        camera_matrix = np.array([[800., 0., 640., -900.], [0., -784., -400., 28000.], [0., 0.2, -0.98, 60.]])
+        self.camera_model = CameraModel(1, np.eye(3), np.eye(3, 4), camera_matrix, np.zeros(5), np.eye(3),
+                                        np.zeros(3), [0, 0])
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_repository(self, cache_size=4, stale_delay=60.):
+        return PixelWorldMapRepository(self.directory, (20, 30), 44, cache_size, stale_delay)
+
+    def list_map_files(self):
+        return glob.glob(os.path.join(self.directory, '*.npy'))
+
+    def test_given_a_loaded_map_when_finding_it_again_then_the_map_is_reused(self):
+        a_repository = self.create_repository()
+        pixel_world_map = a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, A_TARGET_TO_WORLD)
+
+        with mock.patch.object(pixelworldmaprepository, 'generate_pixel_world_map') as generate_pixel_world_map:
+            found_map = a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, A_TARGET_TO_WORLD.copy())
+
+        self.assertIs(pixel_world_map, found_map)
+        generate_pixel_world_map.assert_not_called()
+
+    def test_given_a_loaded_map_when_the_transform_changes_then_another_map_is_generated(self):
+        a_repository = self.create_repository()
+        pixel_world_map = a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, A_TARGET_TO_WORLD)
+
+        other_map = a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, ANOTHER_TARGET_TO_WORLD)
+
+        self.assertFalse(np.allclose(pixel_world_map.lookup([[10, 10]]), other_map.lookup([[10, 10]])))
+        self.assertEqual(2, len(self.list_map_files()))
+
+    def test_given_a_transform_going_back_and_forth_when_finding_maps_then_none_is_generated_twice(self):
+        a_repository = self.create_repository()
+        a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, A_TARGET_TO_WORLD)
+        a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, ANOTHER_TARGET_TO_WORLD)
+
+        with mock.patch.object(pixelworldmaprepository, 'generate_pixel_world_map') as generate_pixel_world_map:
+            a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, A_TARGET_TO_WORLD)
+
+        generate_pixel_world_map.assert_not_called()
+
+    def test_given_a_recent_transform_change_when_finding_the_map_then_stale_files_are_kept(self):
+        a_repository = self.create_repository(cache_size=1)
+        a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, A_TARGET_TO_WORLD)
+
+        a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, ANOTHER_TARGET_TO_WORLD)
+
+        self.assertEqual(2, len(self.list_map_files()))
+
+    def test_given_a_transform_that_stayed_put_when_finding_the_map_then_stale_files_are_deleted(self):
+        a_repository = self.create_repository(cache_size=1, stale_delay=0.)
+        a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, A_TARGET_TO_WORLD)
+        a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, ANOTHER_TARGET_TO_WORLD)
+
+        a_repository.find_or_create(self.camera_model, A_PLANE_HEIGHT, ANOTHER_TARGET_TO_WORLD)
+
+        self.assertEqual(1, len(self.list_map_files()))
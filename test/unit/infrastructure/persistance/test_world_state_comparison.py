@@ -0,0 +1,95 @@
+from unittest import TestCase
+
+import numpy as np
+
+from domain.world.obstacle import Obstacle
+from domain.world.robot import Robot
+from domain.world.world import World
+from infrastructure.persistance.columnarworldstatelog import ColumnarWorldStateLog
+from infrastructure.persistance.worldstatecomparison import AccuracyBudget, compare_world_state_logs, \
+    find_budget_violations
+from service.image.worldstate import WorldState
+
+
+def create_robot(world_position, leading_marker=(120, 100)):
+    robot = Robot((100, 100), [(100, 100), leading_marker], None)
+    robot.set_world_position(world_position)
+    return robot
+
+
+def create_obstacle(world_position, orientation):
+    obstacle = Obstacle((300, 300), 35)
+    obstacle.set_orientation(orientation)
+    obstacle.set_world_position(world_position)
+    return obstacle
+
+
+class WorldStateComparisonTest(TestCase):
+    def setUp(self):
+        self.world = World(230, 110, 10, 20, np.eye(3))
+        self.budget = AccuracyBudget(5., 2., 0.98, 10., 0.98, 10.)
+        self.reference = ColumnarWorldStateLog()
+        self.candidate = ColumnarWorldStateLog()
+
+    def append(self, a_log, frame_index, robot, obstacles):
+        a_log.append('video.avi', frame_index, WorldState(self.world, robot, [robot] if robot else []), obstacles)
+
+    def test_given_identical_logs_when_comparing_them_then_there_is_no_error_and_no_budget_violation(self):
+        for a_log in (self.reference, self.candidate):
+            self.append(a_log, 0, create_robot([500., 250.]), [create_obstacle([800., 400.], 'Left')])
+
+        comparison = compare_world_state_logs(self.reference.as_columns(), self.candidate.as_columns())
+
+        self.assertEqual(0., comparison["robot"]["position_error_mm"]["max"])
+        self.assertEqual(1, comparison["obstacles"]["matched"])
+        self.assertEqual([], find_budget_violations(comparison, self.budget))
+
+    def test_given_a_shifted_robot_when_comparing_the_logs_then_the_position_error_is_the_shift_distance(self):
+        self.append(self.reference, 0, create_robot([500., 250.]), [])
+        self.append(self.candidate, 0, create_robot([503., 254.]), [])
+
+        comparison = compare_world_state_logs(self.reference.as_columns(), self.candidate.as_columns())
+
+        self.assertAlmostEqual(5., comparison["robot"]["position_error_mm"]["p95"])
+
+    def test_given_a_robot_lost_by_the_candidate_when_comparing_the_logs_then_the_lost_detection_breaks_the_budget(
+            self):
+        self.append(self.reference, 0, create_robot([500., 250.]), [])
+        self.append(self.candidate, 0, None, [])
+
+        comparison = compare_world_state_logs(self.reference.as_columns(), self.candidate.as_columns())
+
+        self.assertEqual(1, comparison["robot"]["lost"])
+        self.assertEqual(["robot detections kept"], [name for name, value, limit in
+                                                     find_budget_violations(comparison, self.budget)])
+
+    def test_given_frames_logged_in_another_order_when_comparing_the_logs_then_frames_are_paired_by_index(self):
+        self.append(self.reference, 0, create_robot([500., 250.]), [])
+        self.append(self.reference, 1, create_robot([600., 250.]), [])
+        self.append(self.candidate, 1, create_robot([600., 250.]), [])
+        self.append(self.candidate, 0, create_robot([500., 250.]), [])
+
+        comparison = compare_world_state_logs(self.reference.as_columns(), self.candidate.as_columns())
+
+        self.assertEqual(2, comparison["frames"]["compared"])
+        self.assertEqual(0., comparison["robot"]["position_error_mm"]["max"])
+
+    def test_given_obstacles_detected_in_another_order_when_comparing_the_logs_then_each_is_paired_with_its_closest(
+            self):
+        self.append(self.reference, 0, None, [create_obstacle([800., 400.], 'Left'),
+                                              create_obstacle([1200., 300.], 'Right')])
+        self.append(self.candidate, 0, None, [create_obstacle([1201., 300.], 'Right'),
+                                              create_obstacle([800., 402.], 'Left')])
+
+        comparison = compare_world_state_logs(self.reference.as_columns(), self.candidate.as_columns())
+
+        self.assertEqual(0, comparison["obstacles"]["tag_mismatches"])
+        self.assertAlmostEqual(2., comparison["obstacles"]["position_error_mm"]["max"])
+
+    def test_given_headings_across_the_half_turn_when_comparing_the_logs_then_the_angle_error_wraps_around(self):
+        self.append(self.reference, 0, create_robot([500., 250.], (80, 101)), [])
+        self.append(self.candidate, 0, create_robot([500., 250.], (80, 99)), [])
+
+        comparison = compare_world_state_logs(self.reference.as_columns(), self.candidate.as_columns())
+
+        self.assertLess(comparison["robot"]["angle_error_deg"]["max"], 10.)
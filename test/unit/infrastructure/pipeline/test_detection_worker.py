@@ -0,0 +1,82 @@
+import os
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from domain.camera.cameramodel import CameraModel
+from domain.detector.worldelement.iworldelementdetector import IWorldElementDetector
+from infrastructure.pipeline.detectionworker import DetectionWorker, SharedElementDetection
+from infrastructure.pipeline.frame import Frame
+from infrastructure.pipeline.latestframequeue import LatestFrameQueue
+from infrastructure.pipeline.processpoolstage import ProcessPoolStage
+from infrastructure.pipeline.stage import Stage
+from service.image.detectionversion import get_detection_version
+from service.image.detectonceproxy import DetectOnceProxy
+from service.image.imagedetectionservice import ImageDetectionService
+
+OUTPUT_TIMEOUT = 10
+
+
+class FakeTable:
+    pass
+
+
+class FakeTableDetector(IWorldElementDetector):
+    def detect(self, image):
+        return FakeTable()
+
+
+class WorkerIdDetector(IWorldElementDetector):
+    def detect(self, image):
+        time.sleep(0.05)
+        return os.getpid()
+
+
+def create_detection_service():
+    detection_service = ImageDetectionService()
+    detection_service.register_detector(WorkerIdDetector())
+    detection_service.register_detector(DetectOnceProxy(FakeTableDetector()))
+    return detection_service
+
+
+def create_camera_model():
+    return CameraModel(1, np.eye(3), np.eye(3, 4), np.eye(3, 4), np.zeros(5), np.eye(3), np.zeros(3), np.zeros(3))
+
+
+class DetectionWorkerTest(TestCase):
+    def setUp(self):
+        camera_model = create_camera_model()
+        self.output = LatestFrameQueue(10)
+        self.detection_stage = ProcessPoolStage("detection", DetectionWorker(camera_model, create_detection_service),
+                                                2, 4, 10)
+        self.world_detection_stage = Stage("world-detection", SharedElementDetection(
+            camera_model, create_detection_service(), self.detection_stage), 10)
+        self.world_detection_stage.connect_to(self.detection_stage.get_input())
+        self.detection_stage.connect_to(self.output)
+        self.detection_stage.start()
+        self.world_detection_stage.start()
+
+    def tearDown(self):
+        self.world_detection_stage.stop()
+        self.output.clear()
+        self.detection_stage.stop()
+
+    def test_given_two_workers_when_detecting_frames_then_both_return_the_same_table_version(self):
+        for sequence in range(6):
+            self.world_detection_stage.get_input().put(Frame(sequence, np.zeros((8, 8, 3), np.uint8)))
+
+        frames = []
+        deadline = time.time() + OUTPUT_TIMEOUT
+        while len(frames) < 6 and time.time() < deadline:
+            frame = self.output.get(timeout=0.1)
+            if frame is not None:
+                frames.append(frame)
+                frame.release()
+
+        worker_ids = {frame.get_image_elements()[0] for frame in frames}
+        table_versions = {get_detection_version(frame.get_image_elements()[1]) for frame in frames}
+        self.assertEqual(6, len(frames))
+        self.assertEqual(2, len(worker_ids))
+        self.assertEqual(1, len(table_versions))
+        self.assertEqual(os.getpid(), table_versions.pop()[0])
@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+from mock import mock
+
+from infrastructure.pipeline.frame import Frame
+from infrastructure.pipeline.latestframequeue import LatestFrameQueue
+
+
+class LatestFrameQueueTest(TestCase):
+    def setUp(self):
+        self.a_queue = LatestFrameQueue(2)
+
+    def test_given_an_empty_queue_when_getting_a_frame_then_returns_none(self):
+        self.assertIsNone(self.a_queue.get(timeout=0))
+
+    def test_given_a_queue_with_frames_when_getting_frames_then_they_are_returned_in_order(self):
+        first_frame = Frame(0, mock.Mock())
+        second_frame = Frame(1, mock.Mock())
+        self.a_queue.put(first_frame)
+        self.a_queue.put(second_frame)
+
+        self.assertEqual(first_frame, self.a_queue.get(timeout=0))
+        self.assertEqual(second_frame, self.a_queue.get(timeout=0))
+
+    def test_given_a_full_queue_when_putting_a_frame_then_the_oldest_frame_is_dropped_and_released(self):
+        release_callback = mock.Mock()
+        oldest_frame = Frame(0, mock.Mock())
+        oldest_frame.on_release(release_callback)
+        self.a_queue.put(oldest_frame)
+        self.a_queue.put(Frame(1, mock.Mock()))
+
+        self.a_queue.put(Frame(2, mock.Mock()))
+
+        release_callback.assert_called_once_with(oldest_frame)
+        self.assertEqual(1, self.a_queue.dropped_count())
+        self.assertEqual(1, self.a_queue.get(timeout=0).get_sequence())
+
+    def test_when_creating_a_queue_without_capacity_then_an_error_is_thrown(self):
+        self.assertRaises(ValueError, LatestFrameQueue, 0)
@@ -0,0 +1,86 @@
+from unittest import TestCase
+
+from mock import mock
+
+from infrastructure.imagesource.imagesource import ImageSource
+from infrastructure.metrics import MetricsRegistry
+from infrastructure.pipeline.pipeline import Pipeline
+
+
+class PipelineTest(TestCase):
+    def setUp(self):
+        self.images = [mock.Mock(), mock.Mock(), mock.Mock()]
+        self.image_source = mock.create_autospec(ImageSource)
+        self.image_source.has_next_image.side_effect = lambda: len(self.images) > 0
+        self.image_source.next_image.side_effect = lambda: self.images.pop(0)
+
+    def test_given_a_pipeline_without_stages_when_starting_then_an_error_is_thrown(self):
+        a_pipeline = Pipeline(self.image_source)
+
+        self.assertRaises(ValueError, a_pipeline.start)
+
+    def test_given_a_started_pipeline_when_a_frame_goes_through_then_every_stage_has_processed_it(self):
+        first_image = self.images[0]
+        visited_stages = []
+        a_pipeline = Pipeline(self.image_source, queue_size=3) \
+            .add_stage("first", lambda frame: visited_stages.append("first") or frame) \
+            .add_stage("second", lambda frame: visited_stages.append("second") or frame)
+        self.images = self.images[:1]
+
+        a_pipeline.start()
+        frame = a_pipeline.next_output(timeout=2)
+        a_pipeline.stop()
+
+        self.assertEqual(first_image, frame.get_image())
+        self.assertEqual(["first", "second"], visited_stages)
+
+    def test_given_a_stage_dropping_a_frame_when_the_frame_goes_through_then_the_frame_is_released(self):
+        release_callback = mock.Mock()
+
+        def drop(frame):
+            frame.on_release(release_callback)
+            return None
+
+        a_pipeline = Pipeline(self.image_source, queue_size=3).add_stage("drop", drop)
+
+        a_pipeline.start()
+        output = a_pipeline.next_output(timeout=0.5)
+        a_pipeline.stop()
+
+        self.assertIsNone(output)
+        self.assertEqual(3, release_callback.call_count)
+
+    def test_given_a_pipeline_when_asking_occupancy_then_returns_the_occupancy_of_every_stage(self):
+        a_pipeline = Pipeline(self.image_source).add_stage("first", lambda frame: frame)
+
+        occupancy = a_pipeline.get_occupancy()
+
+        self.assertEqual(["first"], [stage["stage"] for stage in occupancy["stages"]])
+
+    def test_given_an_instrumented_pipeline_when_a_frame_goes_through_then_stage_durations_are_recorded(self):
+        metrics_registry = MetricsRegistry()
+        a_pipeline = Pipeline(self.image_source, queue_size=3).add_stage("first", lambda frame: frame)
+        self.images = self.images[:1]
+        a_pipeline.instrument(metrics_registry)
+
+        a_pipeline.start()
+        a_pipeline.next_output(timeout=2)
+        a_pipeline.stop()
+
+        exposition = metrics_registry.render()
+        self.assertIn('vision_stage_duration_seconds_count{stage="first"} 1', exposition)
+        self.assertIn('vision_frames_captured_total 1', exposition)
+
+    def test_given_a_failing_stage_when_frames_go_through_then_they_are_counted_as_failed_only(self):
+        def fail(frame):
+            raise ValueError
+
+        a_pipeline = Pipeline(self.image_source, queue_size=3).add_stage("fail", fail)
+
+        a_pipeline.start()
+        a_pipeline.next_output(timeout=0.5)
+        a_pipeline.stop()
+
+        stage_occupancy = a_pipeline.get_occupancy()["stages"][0]
+        self.assertEqual(0, stage_occupancy["processed"])
+        self.assertEqual(3, stage_occupancy["failed"])
@@ -0,0 +1,108 @@
+import os
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from infrastructure.pipeline.frame import Frame
+from infrastructure.pipeline.latestframequeue import LatestFrameQueue
+from infrastructure.pipeline.processpoolstage import ProcessPoolStage
+
+OUTPUT_TIMEOUT = 10
+
+
+class ValueFrameProcessor:
+    def __init__(self):
+        self._label = None
+
+    def __call__(self, image):
+        value = int(image[0, 0])
+        if value == FAILING_VALUE:
+            raise ValueError
+        if value == EXITING_VALUE:
+            os._exit(1)
+
+        time.sleep(value * 0.05)
+        return image, (value, self._label, os.getpid())
+
+    def set_label(self, label):
+        self._label = label
+
+
+FAILING_VALUE = 100
+EXITING_VALUE = 200
+
+
+class ProcessPoolStageTest(TestCase):
+    def setUp(self):
+        self.output = LatestFrameQueue(10)
+        self.a_process_pool_stage = ProcessPoolStage("detection", ValueFrameProcessor(), 2, 4, 10)
+        self.a_process_pool_stage.connect_to(self.output)
+        self.a_process_pool_stage.start()
+
+    def tearDown(self):
+        self.output.clear()
+        self.a_process_pool_stage.stop()
+
+    def submit(self, values):
+        for value in values:
+            self.a_process_pool_stage.get_input().put(Frame(value, np.full((4, 4), value, np.uint8)))
+
+    def collect(self, count):
+        frames = []
+        deadline = time.time() + OUTPUT_TIMEOUT
+        while len(frames) < count and time.time() < deadline:
+            frame = self.output.get(timeout=0.1)
+            if frame is not None:
+                frames.append(frame)
+                frame.release()
+        return frames
+
+    def wait_for_occupancy(self, key, value):
+        deadline = time.time() + OUTPUT_TIMEOUT
+        while self.a_process_pool_stage.get_occupancy()[key] != value and time.time() < deadline:
+            time.sleep(0.05)
+
+    def test_given_workers_finishing_out_of_order_when_collecting_results_then_frames_are_emitted_in_order(self):
+        self.submit([6, 0, 3, 1])
+
+        frames = self.collect(4)
+
+        self.assertEqual([6, 0, 3, 1], [frame.get_sequence() for frame in frames])
+        self.assertEqual([6, 0, 3, 1], [frame.get_image_elements()[0] for frame in frames])
+
+    def test_given_a_frame_processor_failure_when_collecting_results_then_the_frame_fails_and_its_slot_is_freed(self):
+        self.submit([1, FAILING_VALUE, 2])
+
+        frames = self.collect(2)
+        self.wait_for_occupancy("free_slots", 4)
+
+        self.assertEqual([1, 2], [frame.get_sequence() for frame in frames])
+        self.assertEqual(2, self.a_process_pool_stage.get_occupancy()["processed"])
+        self.assertEqual(1, self.a_process_pool_stage.get_occupancy()["failed"])
+        self.assertEqual(4, self.a_process_pool_stage.get_occupancy()["free_slots"])
+
+    def test_given_a_broadcast_command_when_workers_process_frames_then_every_worker_has_received_it(self):
+        self.submit([0])
+        self.collect(1)
+
+        self.a_process_pool_stage.broadcast('set_label', 'calibrated')
+        self.submit([2, 2, 2, 2])
+        frames = self.collect(4)
+
+        self.assertEqual({'calibrated'}, {frame.get_image_elements()[1] for frame in frames})
+        self.assertEqual(2, len({frame.get_image_elements()[2] for frame in frames}))
+
+    def test_given_a_worker_dying_with_a_frame_when_collecting_results_then_the_frame_fails_and_a_worker_restarts(
+            self):
+        self.a_process_pool_stage.broadcast('set_label', 'calibrated')
+        self.submit([EXITING_VALUE])
+        self.wait_for_occupancy("restarted", 1)
+        self.submit([1, 2, 3])
+
+        frames = self.collect(3)
+
+        self.assertEqual([1, 2, 3], [frame.get_sequence() for frame in frames])
+        self.assertEqual({'calibrated'}, {frame.get_image_elements()[1] for frame in frames})
+        self.assertEqual(1, self.a_process_pool_stage.get_occupancy()["failed"])
+        self.assertEqual(1, self.a_process_pool_stage.get_occupancy()["restarted"])
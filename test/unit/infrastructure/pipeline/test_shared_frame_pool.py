@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+import numpy as np
+
+from infrastructure.pipeline.sharedframepool import SharedFramePool, SharedFrameViews
+
+
+class SharedFramePoolTest(TestCase):
+    def setUp(self):
+        self.a_frame_pool = SharedFramePool(2, (4, 4, 3))
+
+    def tearDown(self):
+        self.a_frame_pool.close()
+
+    def test_given_a_pool_with_all_slots_acquired_when_acquiring_a_slot_then_returns_none(self):
+        self.a_frame_pool.acquire(timeout=0)
+        self.a_frame_pool.acquire(timeout=0)
+
+        self.assertIsNone(self.a_frame_pool.acquire(timeout=0))
+
+    def test_given_an_acquired_slot_when_releasing_it_then_it_can_be_acquired_again(self):
+        slot = self.a_frame_pool.acquire(timeout=0)
+        self.a_frame_pool.acquire(timeout=0)
+
+        self.a_frame_pool.release(slot)
+
+        self.assertEqual(slot, self.a_frame_pool.acquire(timeout=0))
+
+    def test_given_a_frame_written_in_a_slot_when_attaching_to_the_pool_then_the_frame_is_shared(self):
+        slot = self.a_frame_pool.acquire(timeout=0)
+        self.a_frame_pool.view(slot)[:] = 42
+        attached_views = SharedFrameViews(self.a_frame_pool.get_names(), (4, 4, 3), np.uint8)
+
+        shared_frame = attached_views.view(slot).copy()
+        attached_views.close()
+
+        self.assertTrue(np.all(shared_frame == 42))
+
+    def test_given_an_image_of_another_shape_when_checking_if_the_pool_accepts_it_then_it_is_refused(self):
+        self.assertFalse(self.a_frame_pool.accepts(np.zeros((8, 8, 3), np.uint8)))
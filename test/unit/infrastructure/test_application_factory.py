@@ -0,0 +1,138 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from infrastructure.applicationfactory import ApplicationFactory
+from infrastructure.messageassembler import MessageAssembler
+from infrastructure.processoffloader import OffloaderSaturated
+from service.image.worldsnapshot import ComponentVersions, DrawingAreaGeometry, EMPTY_WORLD_SNAPSHOT, TableGeometry
+
+SEGMENTATION_URL = '/image/segmentation?scaling=1&orientation=NORTH'
+A_TARGET_TO_WORLD = ((1., 0., 0.), (0., 1., 0.), (0., 0., 1.))
+A_DRAWING_AREA = DrawingAreaGeometry(660., 660., 1500., 200., 600., 400., 200.)
+
+
+class SegmentationEndpointTest(TestCase):
+    def setUp(self):
+        self.segmentation_offloader = MagicMock()
+        self.image_to_world_translation = MagicMock()
+        self.world_snapshot_store = MagicMock()
+        self.world_snapshot_store.get_latest.return_value = EMPTY_WORLD_SNAPSHOT._replace(
+            world=TableGeometry(2300., 1100., 0, 0, A_TARGET_TO_WORLD), drawing_area=A_DRAWING_AREA)
+        api = ApplicationFactory().create_rest_api(MagicMock(), MagicMock(), self.image_to_world_translation,
+                                                   MessageAssembler(), self.world_snapshot_store,
+                                                   segmentation_offloader=self.segmentation_offloader)
+        self.client = api.test_client()
+
+    def test_given_a_saturated_offloader_when_uploading_an_image_then_responds_service_unavailable(self):
+        self.segmentation_offloader.run.side_effect = OffloaderSaturated()
+
+        response = self.client.post(SEGMENTATION_URL, data=b'image', content_type='image/jpeg')
+
+        self.assertEqual(503, response.status_code)
+
+    def test_given_a_binary_upload_when_segmenting_then_the_raw_body_is_sent_to_the_offloader(self):
+        self.segmentation_offloader.run.return_value = ([], (340, 340, 3), b'segmented', b'mask')
+        self.image_to_world_translation.transform_segments.return_value = (np.zeros((0, 2)), np.array([[1., 2.]]))
+
+        response = self.client.post(SEGMENTATION_URL, data=b'image', content_type='image/jpeg')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(b'image', self.segmentation_offloader.run.call_args[0][1])
+        self.assertEqual([[1., 2.]], response.get_json()['segments'])
+        self.assertEqual(A_TARGET_TO_WORLD, self.image_to_world_translation.transform_segments.call_args[0][4])
+        self.assertEqual(A_DRAWING_AREA, self.image_to_world_translation.transform_segments.call_args[0][5])
+
+    def test_given_no_detected_world_when_uploading_an_image_then_responds_service_unavailable(self):
+        self.world_snapshot_store.get_latest.return_value = EMPTY_WORLD_SNAPSHOT
+
+        response = self.client.post(SEGMENTATION_URL, data=b'image', content_type='image/jpeg')
+
+        self.assertEqual(503, response.status_code)
+        self.segmentation_offloader.run.assert_not_called()
+
+    def test_given_no_detected_drawing_area_when_uploading_an_image_then_responds_conflict(self):
+        self.world_snapshot_store.get_latest.return_value = EMPTY_WORLD_SNAPSHOT._replace(
+            world=TableGeometry(2300., 1100., 0, 0, A_TARGET_TO_WORLD))
+
+        response = self.client.post(SEGMENTATION_URL, data=b'image', content_type='image/jpeg')
+
+        self.assertEqual(409, response.status_code)
+        self.assertEqual({"error": "Drawing area not detected"}, response.get_json())
+        self.segmentation_offloader.run.assert_not_called()
+
+    def test_given_a_body_that_is_not_json_when_uploading_it_then_responds_no_image(self):
+        response = self.client.post(SEGMENTATION_URL, data=b'image', content_type='text/plain')
+
+        self.assertEqual(404, response.status_code)
+        self.assertEqual({"error": "No image in request"}, response.get_json())
+
+    def test_given_a_binary_upload_without_orientation_when_segmenting_then_responds_bad_request(self):
+        response = self.client.post('/image/segmentation?scaling=1', data=b'image', content_type='image/jpeg')
+
+        self.assertEqual(400, response.status_code)
+
+    def test_given_an_already_segmented_image_when_uploading_it_again_then_responds_from_the_cache(self):
+        self.segmentation_offloader.run.return_value = ([], (340, 340, 3), b'segmented', b'mask')
+        self.image_to_world_translation.transform_segments.return_value = (np.zeros((0, 2)), np.array([[1., 2.]]))
+        self.client.post(SEGMENTATION_URL, data=b'image', content_type='image/jpeg')
+
+        response = self.client.post(SEGMENTATION_URL, data=b'image', content_type='image/jpeg')
+
+        self.assertEqual('HIT', response.headers['X-Cache'])
+        self.assertEqual('0.500', response.headers['X-Cache-Hit-Rate'])
+        self.assertEqual(1, self.segmentation_offloader.run.call_count)
+        self.assertEqual([[1., 2.]], response.get_json()['segments'])
+
+
+class VersionedResourceEndpointTest(TestCase):
+    def setUp(self):
+        self.world_snapshot_store = MagicMock()
+        self.world_snapshot_store.get_latest.return_value = self.a_snapshot_with_obstacles_version(1)
+        self.message_assembler = MagicMock()
+        self.message_assembler.get_obstacles.return_value = []
+        api = ApplicationFactory().create_rest_api(MagicMock(), MagicMock(), MagicMock(), self.message_assembler,
+                                                   self.world_snapshot_store)
+        self.client = api.test_client()
+
+    def a_snapshot_with_obstacles_version(self, version):
+        snapshot = MagicMock()
+        snapshot.versions = ComponentVersions(0, 0, version, 0)
+        return snapshot
+
+    def test_given_an_unchanged_version_when_getting_obstacles_again_then_serializes_them_once(self):
+        self.client.get('/obstacles')
+
+        response = self.client.get('/obstacles')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({"data": {"obstacles": []}}, response.get_json())
+        self.assertEqual(1, self.message_assembler.get_obstacles.call_count)
+
+    def test_given_the_current_etag_when_getting_obstacles_then_responds_not_modified(self):
+        etag = self.client.get('/obstacles').headers['ETag']
+
+        response = self.client.get('/obstacles', headers={'If-None-Match': etag})
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response.headers['ETag'])
+
+    def test_given_a_stale_etag_when_getting_obstacles_then_responds_with_the_new_version(self):
+        etag = self.client.get('/obstacles').headers['ETag']
+        self.world_snapshot_store.get_latest.return_value = self.a_snapshot_with_obstacles_version(2)
+
+        response = self.client.get('/obstacles', headers={'If-None-Match': etag})
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+    def test_given_the_current_etag_when_long_polling_obstacles_then_waits_for_the_next_version(self):
+        etag = self.client.get('/obstacles').headers['ETag']
+        self.world_snapshot_store.wait_for_change.return_value = self.a_snapshot_with_obstacles_version(2)
+
+        response = self.client.get('/obstacles?wait=5', headers={'If-None-Match': etag})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, self.world_snapshot_store.wait_for_change.call_args[0][1])
+        self.assertEqual(5, self.world_snapshot_store.wait_for_change.call_args[0][2])
@@ -0,0 +1,69 @@
+import json
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import cv2
+import numpy as np
+
+from infrastructure.framepublisher import FramePublisher
+from infrastructure.messageassembler import MessageAssembler
+from infrastructure.worldstatedeltaencoder import WorldStateDeltaEncoder
+from service.image.worldsnapshot import EMPTY_WORLD_SNAPSHOT
+
+SEND_TIMEOUT = 5
+
+
+class FramePublisherTest(TestCase):
+    def setUp(self):
+        self.websocket_publisher = MagicMock()
+        self.world_state_encoder = WorldStateDeltaEncoder(MessageAssembler(), 30)
+        self.a_frame_publisher = FramePublisher(self.websocket_publisher, self.world_state_encoder, jpeg_quality=80,
+                                                image_scale=0.5)
+        self.an_image = np.full((80, 120, 3), 128, np.uint8)
+
+    def tearDown(self):
+        self.a_frame_publisher.stop()
+
+    def wait_for_published_frames(self, count):
+        deadline = time.time() + SEND_TIMEOUT
+        while self.websocket_publisher.publish.call_count < count and time.time() < deadline:
+            time.sleep(0.01)
+
+    def get_last_published_frame(self):
+        metadata, image_data = self.websocket_publisher.publish.call_args[0][0]
+        return json.loads(metadata), cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+
+    def test_given_a_published_frame_when_sending_then_publishes_metadata_and_a_scaled_binary_jpeg(self):
+        self.a_frame_publisher.start()
+
+        self.a_frame_publisher.publish(self.an_image, EMPTY_WORLD_SNAPSHOT)
+        self.wait_for_published_frames(1)
+
+        metadata, sent_image = self.get_last_published_frame()
+        self.assertEqual("push_vision_keyframe", metadata["headers"])
+        self.assertEqual(1, metadata["sequence"])
+        self.assertEqual((40, 60, 3), sent_image.shape)
+
+    def test_given_frames_published_faster_than_sent_when_sending_then_only_the_latest_is_sent(self):
+        self.a_frame_publisher.publish(self.an_image, EMPTY_WORLD_SNAPSHOT)
+        self.a_frame_publisher.publish(np.zeros_like(self.an_image), EMPTY_WORLD_SNAPSHOT)
+        self.a_frame_publisher.start()
+
+        self.wait_for_published_frames(1)
+        time.sleep(0.05)
+
+        metadata, sent_image = self.get_last_published_frame()
+        self.assertEqual(1, self.websocket_publisher.publish.call_count)
+        self.assertEqual(1, self.a_frame_publisher.get_statistics()["dropped"])
+        self.assertLess(sent_image.max(), 10)
+
+    def test_given_a_published_frame_when_the_caller_reuses_its_image_then_the_sent_frame_is_unchanged(self):
+        self.a_frame_publisher.publish(self.an_image, EMPTY_WORLD_SNAPSHOT)
+        self.an_image[:] = 0
+        self.a_frame_publisher.start()
+
+        self.wait_for_published_frames(1)
+
+        metadata, sent_image = self.get_last_published_frame()
+        self.assertGreater(sent_image.min(), 100)
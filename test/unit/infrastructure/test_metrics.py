@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from infrastructure.metrics import Histogram, MetricsRegistry
+
+A_BUCKET_BOUNDS = (0.1, 1.)
+
+
+class MetricsRegistryTest(TestCase):
+    def setUp(self):
+        self.a_registry = MetricsRegistry()
+
+    def test_given_observations_when_rendering_a_histogram_then_buckets_are_cumulative(self):
+        histogram = self.a_registry.histogram('latency_seconds', 'Latency.', A_BUCKET_BOUNDS).labels(stage='a')
+        for value in (0.05, 0.1, 0.5, 3.):
+            histogram.observe(value)
+
+        exposition = self.a_registry.render()
+
+        self.assertIn('# TYPE latency_seconds histogram', exposition)
+        self.assertIn('latency_seconds_bucket{stage="a",le="0.1"} 2', exposition)
+        self.assertIn('latency_seconds_bucket{stage="a",le="1.0"} 3', exposition)
+        self.assertIn('latency_seconds_bucket{stage="a",le="+Inf"} 4', exposition)
+        self.assertIn('latency_seconds_sum{stage="a"} 3.65', exposition)
+        self.assertIn('latency_seconds_count{stage="a"} 4', exposition)
+
+    def test_given_the_same_labels_when_asking_a_metric_twice_then_returns_the_same_metric(self):
+        family = self.a_registry.counter('frames_total', 'Frames.')
+
+        self.assertIs(family.labels(outcome='dropped'), family.labels(outcome='dropped'))
+
+    def test_given_a_counter_function_when_rendering_then_reads_the_current_value(self):
+        frames = [1, 2, 3]
+        self.a_registry.counter('frames_total', 'Frames.').labels().set_function(lambda: len(frames))
+        frames.append(4)
+
+        exposition = self.a_registry.render()
+
+        self.assertIn('frames_total 4', exposition)
+
+    def test_given_a_label_value_with_special_characters_when_rendering_then_they_are_escaped(self):
+        self.a_registry.counter('errors_total', 'Errors.').labels(error='bad "value"\\\nline').inc()
+
+        exposition = self.a_registry.render()
+
+        self.assertIn('errors_total{error="bad \\"value\\"\\\\\\nline"} 1', exposition)
+
+    def test_given_many_observations_when_recording_then_memory_stays_fixed(self):
+        histogram = Histogram(A_BUCKET_BOUNDS)
+
+        for i in range(1000):
+            histogram.observe(i / 100.)
+
+        self.assertEqual(1000, histogram.get_count())
+        self.assertEqual(3, len(histogram._counts))
@@ -0,0 +1,72 @@
+import time
+from unittest import TestCase
+
+import cv2
+import numpy as np
+
+from infrastructure.mjpegbroadcaster import MjpegBroadcaster, TooManyViewers
+
+ENCODE_TIMEOUT = 5
+
+
+class MjpegBroadcasterTest(TestCase):
+    def setUp(self):
+        self.a_broadcaster = MjpegBroadcaster(jpeg_quality=80, image_scale=0.5, max_client_count=2)
+        self.a_broadcaster.start()
+        self.an_image = np.full((80, 120, 3), 128, np.uint8)
+
+    def tearDown(self):
+        self.a_broadcaster.stop()
+
+    def wait_for_encoded_frames(self, count):
+        deadline = time.time() + ENCODE_TIMEOUT
+        while self.a_broadcaster.get_statistics()["encoded"] < count and time.time() < deadline:
+            time.sleep(0.01)
+
+    def decode_part(self, part):
+        header, image_data = part.split(b'\r\n\r\n', 1)
+        return cv2.imdecode(np.frombuffer(image_data[:-2], np.uint8), cv2.IMREAD_COLOR)
+
+    def test_given_no_viewer_when_publishing_then_nothing_is_encoded(self):
+        self.a_broadcaster.publish(self.an_image)
+        time.sleep(0.05)
+
+        self.assertEqual(0, self.a_broadcaster.get_statistics()["encoded"])
+
+    def test_given_two_viewers_when_publishing_then_both_receive_the_same_encoded_frame(self):
+        first_stream = self.a_broadcaster.open_stream()
+        second_stream = self.a_broadcaster.open_stream()
+
+        self.a_broadcaster.publish(self.an_image)
+        first_part = next(first_stream)
+        second_part = next(second_stream)
+
+        self.assertIs(first_part, second_part)
+        self.assertEqual(1, self.a_broadcaster.get_statistics()["encoded"])
+        self.assertEqual((40, 60, 3), self.decode_part(first_part).shape)
+
+    def test_given_a_slow_viewer_when_frames_are_encoded_then_it_skips_to_the_latest(self):
+        stream = self.a_broadcaster.open_stream()
+        self.a_broadcaster.publish(self.an_image)
+        next(stream)
+
+        for i in range(3):
+            self.a_broadcaster.publish(self.an_image)
+            self.wait_for_encoded_frames(i + 2)
+        next(stream)
+
+        self.assertEqual(2, self.a_broadcaster.get_statistics()["skipped"])
+
+    def test_given_the_maximum_viewer_count_when_opening_a_stream_then_raises_too_many_viewers(self):
+        self.a_broadcaster.open_stream()
+        self.a_broadcaster.open_stream()
+
+        self.assertRaises(TooManyViewers, self.a_broadcaster.open_stream)
+
+    def test_given_a_closed_stream_when_counting_viewers_then_it_is_no_longer_counted(self):
+        stream = self.a_broadcaster.open_stream()
+
+        stream.close()
+        stream.close()
+
+        self.assertEqual(0, self.a_broadcaster.get_statistics()["clients"])
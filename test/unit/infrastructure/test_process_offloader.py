@@ -0,0 +1,28 @@
+import time
+from unittest import TestCase
+
+from infrastructure.processoffloader import ProcessOffloader, OffloaderSaturated
+
+
+class ProcessOffloaderTest(TestCase):
+    def setUp(self):
+        self.an_offloader = ProcessOffloader(worker_count=1, max_pending=1)
+
+    def tearDown(self):
+        self.an_offloader.shutdown()
+
+    def test_given_a_function_when_running_it_then_returns_its_result_computed_in_another_process(self):
+        result = self.an_offloader.run(divmod, 7, 2, timeout=30)
+
+        self.assertEqual((3, 1), result)
+
+    def test_given_a_full_offloader_when_submitting_then_an_error_is_thrown(self):
+        self.an_offloader.submit(time.sleep, 1)
+
+        self.assertRaises(OffloaderSaturated, self.an_offloader.submit, time.sleep, 0)
+
+    def test_given_a_completed_task_when_submitting_then_the_pending_slot_was_released(self):
+        self.an_offloader.run(time.sleep, 0, timeout=30)
+
+        self.assertEqual(0, self.an_offloader.get_pending_count())
+        self.assertEqual(0, self.an_offloader.run(abs, 0, timeout=30))
@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+from flask import Flask
+
+from infrastructure.webserver import RequestTimer, install_request_timing, RESPONSE_TIME_HEADER
+
+
+class RequestTimerTest(TestCase):
+    def setUp(self):
+        self.a_request_timer = RequestTimer(window=4)
+
+    def test_given_recorded_durations_when_getting_summary_then_returns_percentiles_in_milliseconds(self):
+        for duration in [0.001, 0.002, 0.003]:
+            self.a_request_timer.record('obstacles', duration)
+
+        summary = self.a_request_timer.get_summary()
+
+        self.assertEqual(3, summary['obstacles']['count'])
+        self.assertAlmostEqual(2., summary['obstacles']['p50_ms'])
+        self.assertAlmostEqual(3., summary['obstacles']['max_ms'])
+
+    def test_given_more_durations_than_the_window_when_getting_summary_then_only_keeps_the_latest(self):
+        for duration in [1., 0.001, 0.001, 0.001, 0.001]:
+            self.a_request_timer.record('obstacles', duration)
+
+        summary = self.a_request_timer.get_summary()
+
+        self.assertEqual(4, summary['obstacles']['count'])
+        self.assertAlmostEqual(1., summary['obstacles']['max_ms'])
+
+    def test_given_a_timed_api_when_requesting_then_the_response_has_a_timing_header(self):
+        api = Flask(__name__)
+        install_request_timing(api, self.a_request_timer)
+        api.add_url_rule('/ping', 'ping', lambda: 'pong')
+
+        response = api.test_client().get('/ping')
+
+        self.assertIn(RESPONSE_TIME_HEADER, response.headers)
+        self.assertEqual(1, self.a_request_timer.get_summary()['ping']['count'])
@@ -0,0 +1,208 @@
+import asyncio
+import json
+from unittest import TestCase, mock
+
+import numpy as np
+import websockets
+
+from infrastructure.eventloopthread import EventLoopThread
+from infrastructure.messageassembler import MessageAssembler
+from infrastructure.subscriptionserver import SubscriptionServer
+from service.image.worldsnapshot import EMPTY_WORLD_SNAPSHOT, ComponentVersions, RobotPose, ObstacleState
+
+RECEIVE_TIMEOUT = 5
+
+
+def a_snapshot(version, robot_version, obstacles_version):
+    return EMPTY_WORLD_SNAPSHOT._replace(version=version,
+                                         robot=RobotPose(float(version), 2., 90., 0, 0),
+                                         obstacles=(ObstacleState(10., 20., 'N', 5),),
+                                         versions=ComponentVersions(robot_version, 0, obstacles_version, 0))
+
+
+class SubscriptionServerTest(TestCase):
+    def setUp(self):
+        self.event_loop_thread = EventLoopThread()
+        self.event_loop_thread.start()
+        self.a_server = SubscriptionServer(MessageAssembler(), self.event_loop_thread, '127.0.0.1', 0,
+                                           default_max_rate=1000, jpeg_quality=80, image_scale=0.5)
+        self.a_server.start()
+
+    def tearDown(self):
+        self.a_server.stop()
+        self.event_loop_thread.stop()
+
+    def run_client(self, client):
+        return self.event_loop_thread.submit(client).result(RECEIVE_TIMEOUT)
+
+    async def connect(self, subscriptions):
+        connection = await websockets.connect('ws://127.0.0.1:{}'.format(self.a_server.get_port()))
+        await connection.send(json.dumps({"subscribe": subscriptions}))
+        return connection
+
+    async def send_request(self, request):
+        connection = await websockets.connect('ws://127.0.0.1:{}'.format(self.a_server.get_port()))
+        await connection.send(request)
+        message = await self.receive_json(connection)
+        await connection.close()
+        return message
+
+    async def receive_json(self, connection):
+        return json.loads(await asyncio.wait_for(connection.recv(), RECEIVE_TIMEOUT))
+
+    async def wait_for_subscriptions(self, count):
+        while sum(topic["subscribers"] for topic in self.a_server.get_statistics()["topics"].values()) < count:
+            await asyncio.sleep(0.01)
+
+    def test_given_a_new_subscriber_when_subscribing_then_receives_the_current_topic_state(self):
+        self.a_server.publish_snapshot(a_snapshot(1, 1, 1))
+
+        async def client():
+            connection = await self.connect({"obstacles": None})
+            message = await self.receive_json(connection)
+            await connection.close()
+            return message
+
+        message = self.run_client(client())
+
+        self.assertEqual("obstacles", message["topic"])
+        self.assertEqual([10., 20.], [message["data"][0]["position"]["x"], message["data"][0]["position"]["y"]])
+
+    def test_given_several_subscribers_when_a_topic_changes_then_it_is_serialized_once(self):
+        async def client():
+            connections = [await self.connect(["robot"]) for i in range(3)]
+            await self.wait_for_subscriptions(3)
+            for connection in connections:
+                await self.receive_json(connection)
+
+            self.a_server.publish_snapshot(a_snapshot(2, 1, 0))
+            messages = [await self.receive_json(connection) for connection in connections]
+            for connection in connections:
+                await connection.close()
+            return messages
+
+        messages = self.run_client(client())
+
+        self.assertEqual([2., 2., 2.], [message["data"]["position"]["x"] for message in messages])
+        self.assertEqual(2, self.a_server.get_statistics()["topics"]["robot"]["serializations"])
+
+    def test_given_an_unchanged_component_when_publishing_a_snapshot_then_its_topic_is_not_sent(self):
+        async def client():
+            connection = await self.connect({"robot": None, "obstacles": None})
+            await self.wait_for_subscriptions(2)
+            await self.receive_json(connection)
+            await self.receive_json(connection)
+
+            self.a_server.publish_snapshot(a_snapshot(2, 1, 0))
+            message = await self.receive_json(connection)
+            await connection.close()
+            return message
+
+        message = self.run_client(client())
+
+        self.assertEqual("robot", message["topic"])
+        self.assertEqual(1, self.a_server.get_statistics()["topics"]["obstacles"]["serializations"])
+
+    def test_given_a_low_rate_subscriber_when_the_topic_changes_quickly_then_only_the_latest_is_sent(self):
+        async def client():
+            connection = await self.connect({"robot": 5})
+            await self.wait_for_subscriptions(1)
+            await self.receive_json(connection)
+
+            for version in range(2, 6):
+                self.a_server.publish_snapshot(a_snapshot(version, version, 0))
+                await asyncio.sleep(0.01)
+            message = await self.receive_json(connection)
+            await connection.close()
+            return message
+
+        message = self.run_client(client())
+
+        self.assertEqual(5., message["data"]["position"]["x"])
+
+    def test_given_a_debug_image_subscriber_when_publishing_an_image_then_receives_a_scaled_jpeg(self):
+        async def client():
+            connection = await self.connect(["debug_image"])
+            await self.wait_for_subscriptions(1)
+
+            self.a_server.publish_image(np.full((80, 120, 3), 128, np.uint8))
+            image_data = await asyncio.wait_for(connection.recv(), RECEIVE_TIMEOUT)
+            await connection.close()
+            return image_data
+
+        image_data = self.run_client(client())
+
+        self.assertEqual(b'\xff\xd8', image_data[:2])
+
+    def test_given_a_failed_image_encoding_when_publishing_another_image_then_it_is_encoded_and_sent(self):
+        a_jpeg_image = self.a_server._jpeg_encoder.encode(np.zeros((80, 120, 3), np.uint8))
+        self.a_server._jpeg_encoder.encode = mock.Mock(side_effect=[RuntimeError(), a_jpeg_image])
+
+        async def client():
+            connection = await self.connect(["debug_image"])
+            await self.wait_for_subscriptions(1)
+
+            self.a_server.publish_image(np.full((80, 120, 3), 128, np.uint8))
+            while self.a_server._jpeg_encoder.encode.call_count < 1 or self.a_server._image_encoding_scheduled:
+                await asyncio.sleep(0.01)
+            self.a_server.publish_image(np.full((80, 120, 3), 128, np.uint8))
+            image_data = await asyncio.wait_for(connection.recv(), RECEIVE_TIMEOUT)
+            await connection.close()
+            return image_data
+
+        image_data = self.run_client(client())
+
+        self.assertEqual(b'\xff\xd8', image_data[:2])
+
+    def test_given_an_unknown_topic_when_subscribing_then_responds_with_an_error(self):
+        async def client():
+            connection = await self.connect(["unknown"])
+            message = await self.receive_json(connection)
+            await connection.close()
+            return message
+
+        message = self.run_client(client())
+
+        self.assertIn("error", message)
+
+    def test_given_a_request_that_is_not_json_when_sending_it_then_responds_with_an_invalid_request_error(self):
+        message = self.run_client(self.send_request('subscribe'))
+
+        self.assertEqual({"error": "Invalid subscription request"}, message)
+
+    def test_given_a_request_that_is_not_an_object_when_sending_it_then_responds_with_an_invalid_request_error(self):
+        message = self.run_client(self.send_request(json.dumps(["obstacles"])))
+
+        self.assertEqual({"error": "Invalid subscription request"}, message)
+
+    def test_given_subscriptions_that_are_not_a_list_or_object_when_sending_them_then_responds_with_an_error(self):
+        message = self.run_client(self.send_request(json.dumps({"subscribe": "obstacles"})))
+
+        self.assertEqual({"error": "Invalid subscription request"}, message)
+
+    def test_given_unsubscriptions_that_are_not_a_list_when_sending_them_then_responds_with_an_error(self):
+        message = self.run_client(self.send_request(json.dumps({"unsubscribe": {"obstacles": None}})))
+
+        self.assertEqual({"error": "Invalid subscription request"}, message)
+
+    def test_given_a_topic_name_that_is_not_a_string_when_subscribing_then_responds_with_an_error(self):
+        message = self.run_client(self.send_request(json.dumps({"subscribe": [["obstacles"]]})))
+
+        self.assertEqual({"error": "Invalid subscription request"}, message)
+
+    def test_given_a_malformed_request_when_sending_a_valid_one_then_the_connection_still_subscribes(self):
+        self.a_server.publish_snapshot(a_snapshot(1, 1, 1))
+
+        async def client():
+            connection = await websockets.connect('ws://127.0.0.1:{}'.format(self.a_server.get_port()))
+            await connection.send(json.dumps({"unsubscribe": "obstacles"}))
+            error = await self.receive_json(connection)
+            await connection.send(json.dumps({"subscribe": ["obstacles"]}))
+            message = await self.receive_json(connection)
+            await connection.close()
+            return error, message
+
+        error, message = self.run_client(client())
+
+        self.assertEqual({"error": "Invalid subscription request"}, error)
+        self.assertEqual("obstacles", message["topic"])
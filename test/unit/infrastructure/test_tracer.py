@@ -0,0 +1,63 @@
+import json
+import tempfile
+from threading import Thread
+from unittest import TestCase
+
+from infrastructure.tracer import Tracer
+
+
+class TracerTest(TestCase):
+    def setUp(self):
+        self.a_tracer = Tracer(capacity=3, enabled=True)
+
+    def test_given_a_disabled_tracer_when_tracing_a_span_then_nothing_is_recorded(self):
+        self.a_tracer.disable()
+
+        with self.a_tracer.span("detection", sequence=1):
+            pass
+
+        self.assertEqual(0, self.a_tracer.get_event_count())
+
+    def test_given_more_events_than_the_capacity_when_tracing_then_only_the_latest_are_kept(self):
+        for sequence in range(5):
+            with self.a_tracer.span("detection", sequence=sequence):
+                pass
+
+        trace = self.a_tracer.to_chrome_trace()
+
+        frames = [event["args"]["frame"] for event in trace["traceEvents"] if event["ph"] == "X"]
+        self.assertEqual([2, 3, 4], frames)
+
+    def test_given_a_nested_span_without_sequence_when_tracing_then_it_inherits_the_frame_sequence(self):
+        with self.a_tracer.span("detection", sequence=7):
+            with self.a_tracer.span("RobotDetector", 'detector'):
+                pass
+
+        trace = self.a_tracer.to_chrome_trace()
+
+        self.assertEqual([7, 7], [event["args"]["frame"] for event in trace["traceEvents"] if event["ph"] == "X"])
+
+    def test_given_spans_on_several_threads_when_exporting_then_each_thread_is_named(self):
+        def trace_on_thread():
+            with self.a_tracer.span("capture", sequence=1):
+                pass
+
+        thread = Thread(target=trace_on_thread, name="stage-capture")
+        thread.start()
+        thread.join()
+
+        trace = self.a_tracer.to_chrome_trace()
+
+        thread_names = [event["args"]["name"] for event in trace["traceEvents"] if event["ph"] == "M"]
+        self.assertEqual(["stage-capture"], thread_names)
+
+    def test_given_recorded_spans_when_dumping_then_writes_a_chrome_trace_file(self):
+        with self.a_tracer.span("rendering", sequence=1):
+            pass
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(self.a_tracer.dump(directory)) as trace_file:
+                trace = json.load(trace_file)
+
+        self.assertEqual("rendering", trace["traceEvents"][-1]["name"])
+        self.assertGreaterEqual(trace["traceEvents"][-1]["dur"], 0)
@@ -0,0 +1,68 @@
+import socket
+from threading import Event, Thread
+from unittest import TestCase
+
+from flask import Flask
+
+from infrastructure.webserver import ThreadPoolWSGIServer
+
+RECEIVE_TIMEOUT = 5
+
+
+class ThreadPoolWSGIServerTest(TestCase):
+    def setUp(self):
+        self.request_started = Event()
+        self.request_released = Event()
+        api = Flask(__name__)
+
+        @api.route('/slow')
+        def slow():
+            self.request_started.set()
+            self.request_released.wait(RECEIVE_TIMEOUT)
+            return 'done'
+
+        self.a_server = ThreadPoolWSGIServer('127.0.0.1', 0, api, 1, 1, 1)
+        self.server_thread = Thread(target=self.a_server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.request_released.set()
+        self.a_server.shutdown()
+        self.a_server.server_close()
+
+    def send_request(self):
+        connection = socket.create_connection(('127.0.0.1', self.a_server.server_port), RECEIVE_TIMEOUT)
+        connection.sendall(b'GET /slow HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+        return connection
+
+    def receive_all(self, connection):
+        data = b''
+        try:
+            chunk = connection.recv(4096)
+            while chunk:
+                data += chunk
+                chunk = connection.recv(4096)
+        except ConnectionResetError:
+            pass
+        connection.close()
+        return data
+
+    def test_given_all_connection_slots_taken_when_a_client_connects_then_the_connection_is_closed(self):
+        busy_connection = self.send_request()
+        self.request_started.wait(RECEIVE_TIMEOUT)
+
+        refused_data = self.receive_all(self.send_request())
+        self.request_released.set()
+        busy_data = self.receive_all(busy_connection)
+
+        self.assertEqual(b'', refused_data)
+        self.assertEqual(1, self.a_server.get_refused_count())
+        self.assertTrue(busy_data.endswith(b'done'))
+
+    def test_given_a_finished_request_when_a_client_connects_then_it_is_served(self):
+        self.request_released.set()
+        self.receive_all(self.send_request())
+
+        data = self.receive_all(self.send_request())
+
+        self.assertTrue(data.endswith(b'done'))
@@ -0,0 +1,113 @@
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import websockets
+
+from infrastructure.eventloopthread import EventLoopThread
+from infrastructure.websocketpublisher import WebSocketPublisher
+
+RECEIVE_TIMEOUT = 5
+
+
+class WebSocketPublisherTest(TestCase):
+    def setUp(self):
+        self.event_loop_thread = EventLoopThread()
+        self.event_loop_thread.start()
+        self.received_messages = []
+        self.server = self.event_loop_thread.submit(self.start_server()).result()
+        self.on_resync = MagicMock()
+        url = 'ws://127.0.0.1:{}'.format(self.server.sockets[0].getsockname()[1])
+        self.a_publisher = WebSocketPublisher(url, self.event_loop_thread, self.on_resync, reconnect_delay=0.01)
+
+    def tearDown(self):
+        self.a_publisher.stop()
+        self.server.close()
+        self.event_loop_thread.stop()
+
+    async def start_server(self):
+        return await websockets.serve(self.receive, '127.0.0.1', 0)
+
+    async def receive(self, connection, *args):
+        async for message in connection:
+            self.received_messages.append(message)
+
+    def wait_until(self, condition):
+        deadline = time.time() + RECEIVE_TIMEOUT
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_given_a_connected_publisher_when_publishing_then_sends_text_and_binary_messages_in_order(self):
+        self.a_publisher.start()
+        self.wait_until(lambda: self.a_publisher.get_statistics()["connected"])
+
+        self.a_publisher.publish(['metadata', b'image'])
+        self.wait_until(lambda: len(self.received_messages) == 2)
+
+        self.assertEqual(['metadata', b'image'], self.received_messages)
+        self.assertEqual(1, self.a_publisher.get_statistics()["sent"])
+
+    def test_given_a_pending_message_when_publishing_another_then_only_the_latest_is_sent(self):
+        self.a_publisher.publish(['first'])
+        self.a_publisher.publish(['second'])
+        self.a_publisher.start()
+
+        self.wait_until(lambda: len(self.received_messages) == 1)
+        time.sleep(0.05)
+
+        self.assertEqual(['second'], self.received_messages)
+        self.assertEqual(1, self.a_publisher.get_statistics()["dropped"])
+
+    def test_given_a_pending_send_when_publishing_several_frames_then_requests_a_single_keyframe(self):
+        for sequence in range(5):
+            self.a_publisher.publish([str(sequence)])
+
+        self.assertEqual(1, self.on_resync.call_count)
+        self.assertEqual(4, self.a_publisher.get_statistics()["dropped"])
+
+    def test_given_the_keyframe_dropped_before_sending_when_publishing_again_then_requests_another_keyframe(self):
+        for sequence in range(4):
+            self.a_publisher.publish([str(sequence)])
+        self.a_publisher._take_pending_messages()
+
+        self.a_publisher.publish(['4'])
+
+        self.assertEqual(2, self.on_resync.call_count)
+
+    def test_given_the_keyframe_sent_when_publishing_again_then_no_keyframe_is_requested(self):
+        for sequence in range(3):
+            self.a_publisher.publish([str(sequence)])
+        self.a_publisher._take_pending_messages()
+
+        self.a_publisher.publish(['3'])
+
+        self.assertEqual(1, self.on_resync.call_count)
+
+    def test_given_a_new_connection_when_connected_then_requests_a_resync(self):
+        self.a_publisher.start()
+
+        self.wait_until(lambda: self.a_publisher.get_statistics()["connected"])
+
+        self.on_resync.assert_called_with()
+
+    def test_given_an_unreachable_server_when_publishing_then_does_not_block_and_keeps_reconnecting(self):
+        self.server.close()
+        self.event_loop_thread.submit(self.server.wait_closed()).result()
+        self.a_publisher.start()
+
+        start = time.perf_counter()
+        self.a_publisher.publish(['metadata'])
+        publish_time = time.perf_counter() - start
+        self.wait_until(lambda: self.a_publisher.get_statistics()["reconnects"] >= 2)
+
+        self.assertLess(publish_time, 0.05)
+        self.assertGreaterEqual(self.a_publisher.get_statistics()["reconnects"], 2)
+
+    def test_given_an_unexpected_error_on_connection_when_running_then_counts_it_and_keeps_reconnecting(self):
+        self.on_resync.side_effect = RuntimeError
+        self.a_publisher.start()
+
+        self.wait_until(lambda: self.a_publisher.get_statistics()["reconnects"] >= 2)
+
+        self.assertGreaterEqual(self.a_publisher.get_statistics()["failed"], 2)
+        self.assertGreaterEqual(self.a_publisher.get_statistics()["reconnects"], 2)
@@ -0,0 +1,77 @@
+import json
+from unittest import TestCase
+
+import numpy as np
+
+from domain.world.robot import Robot
+from domain.world.world import World
+from infrastructure.messageassembler import MessageAssembler
+from infrastructure.worldstatedeltaencoder import WorldStateDeltaEncoder
+from service.image.worldsnapshot import WorldSnapshotStore
+from service.image.worldstate import WorldState
+
+IMAGE_SHAPE = (800, 1280, 3)
+SENT_SHAPE = (400, 640, 3)
+IMAGE_SCALE = 0.5
+KEYFRAME_INTERVAL = 3
+
+
+class WorldStateDeltaEncoderTest(TestCase):
+    def setUp(self):
+        self.world = World(230, 110, 10, 20, np.eye(3))
+        self.snapshot_store = WorldSnapshotStore()
+        self.an_encoder = WorldStateDeltaEncoder(MessageAssembler(), KEYFRAME_INTERVAL)
+
+    def publish_robot_at(self, x):
+        robot = Robot((100, 100), [(100, 100), (120, 100)], None)
+        robot.set_world_position([x, 250.])
+        return self.snapshot_store.publish(WorldState(self.world, robot, []), [], None)
+
+    def encode(self, snapshot):
+        return self.an_encoder.encode(snapshot, IMAGE_SHAPE, SENT_SHAPE, IMAGE_SCALE)
+
+    def test_given_a_first_snapshot_when_encoding_then_sends_a_keyframe_with_every_component(self):
+        message = self.encode(self.publish_robot_at(500.))
+
+        self.assertEqual("push_vision_keyframe", message["headers"])
+        self.assertEqual({"unit", "robot", "base_table", "obstacles", "drawing_area"},
+                         set(message["data"]["world"].keys()))
+        self.assertEqual(2300, message["data"]["world"]["base_table"]["dimension"]["width"])
+        self.assertEqual(640, message["data"]["image"]["sent_dimension"]["width"])
+
+    def test_given_only_a_moving_robot_when_encoding_then_sends_a_delta_with_only_the_robot(self):
+        self.encode(self.publish_robot_at(500.))
+
+        message = self.encode(self.publish_robot_at(510.))
+
+        self.assertEqual("push_vision_delta", message["headers"])
+        self.assertEqual({"robot": {"position": {"x": 510., "y": 250.}, "orientation": 0.}},
+                         message["data"]["world"])
+
+    def test_given_consecutive_messages_when_encoding_then_sequence_numbers_increase_by_one(self):
+        sequences = [self.encode(self.publish_robot_at(500. + x))["sequence"] for x in range(3)]
+
+        self.assertEqual([1, 2, 3], sequences)
+
+    def test_given_the_keyframe_interval_elapsed_when_encoding_then_sends_a_keyframe(self):
+        headers = [self.encode(self.publish_robot_at(500. + x))["headers"] for x in range(KEYFRAME_INTERVAL + 1)]
+
+        self.assertEqual(["push_vision_keyframe", "push_vision_delta", "push_vision_delta",
+                          "push_vision_keyframe"], headers)
+
+    def test_given_a_requested_keyframe_when_encoding_then_sends_a_keyframe(self):
+        snapshot = self.publish_robot_at(500.)
+        self.encode(snapshot)
+
+        self.an_encoder.request_keyframe()
+
+        self.assertEqual("push_vision_keyframe", self.encode(snapshot)["headers"])
+
+    def test_given_an_unchanged_snapshot_when_encoding_a_delta_then_the_payload_is_small(self):
+        snapshot = self.publish_robot_at(500.)
+        self.encode(snapshot)
+
+        message = self.encode(snapshot)
+
+        self.assertEqual({}, message["data"]["world"])
+        self.assertLess(len(json.dumps(message)), 80)
@@ -3,6 +3,7 @@ from unittest import TestCase
 
 from domain.detector.worldelement.iworldelementdetector import IWorldElementDetector
 from domain.world.worldelement import WorldElement
+from service.image.detectionversion import get_detection_version
 from service.image.detectonceproxy import DetectOnceProxy
 
 
@@ -35,3 +36,30 @@ class DetectOnceProxyTest(TestCase):
         self.detect_once_proxy.reset_detection()
 
         self.assertFalse(self.detect_once_proxy.has_detected())
+
+    def test_given_a_detector_that_has_detected_when_detecting_again_then_the_element_keeps_its_version(self):
+        self.mock_detector.detect.return_value = mock.create_autospec(WorldElement)
+        first_version = get_detection_version(self.detect_once_proxy.detect(self.mock_image))
+
+        second_version = get_detection_version(self.detect_once_proxy.detect(self.mock_image))
+
+        self.assertIsNotNone(first_version)
+        self.assertEqual(first_version, second_version)
+
+    def test_given_a_reset_detector_when_detecting_again_then_the_element_has_a_new_version(self):
+        self.mock_detector.detect.side_effect = lambda image: mock.create_autospec(WorldElement)
+        first_version = get_detection_version(self.detect_once_proxy.detect(self.mock_image))
+        self.detect_once_proxy.reset_detection()
+
+        second_version = get_detection_version(self.detect_once_proxy.detect(self.mock_image))
+
+        self.assertNotEqual(first_version, second_version)
+
+    def test_given_a_detector_returning_a_list_when_detecting_then_a_versioned_list_is_returned(self):
+        self.mock_detector.detect.return_value = [mock.Mock(), mock.Mock()]
+
+        detected_elements = self.detect_once_proxy.detect(self.mock_image)
+
+        self.assertIsInstance(detected_elements, list)
+        self.assertEqual(2, len(detected_elements))
+        self.assertIsNotNone(get_detection_version(detected_elements))
@@ -47,3 +47,13 @@ class ImageDetectionServiceTest(TestCase):
         self.mock_detector.detect.assert_called_once()
         for element in world_elements:
             self.assertIsInstance(element, WorldElement)
+
+    def test_given_a_detect_once_proxy_when_detecting_per_frame_elements_then_the_proxy_is_not_run(self):
+        detect_once_proxy_detector = mock.create_autospec(DetectOnceProxy)
+        self.an_image_detection_service.register_detector(self.mock_detector)
+        self.an_image_detection_service.register_detector(detect_once_proxy_detector)
+
+        self.an_image_detection_service.detect_per_frame_elements(mock.Mock())
+
+        self.mock_detector.detect.assert_called_once()
+        detect_once_proxy_detector.detect.assert_not_called()
@@ -0,0 +1,64 @@
+import os
+from unittest import TestCase
+
+import cv2
+import numpy as np
+
+from service.image.imagesegmentation import segment_encoded_image, segment_image, NoSegmentsFound
+
+RAW_IMAGES_DIRECTORY = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'data', 'images', 'raw')
+# Segment count and centre of mass of the figure the original segmentation loop picked
+RAW_IMAGE_FIGURES = {
+    'image19.jpg': (7, [106, 107]),
+    'image50.jpg': (33, [131, 129]),
+    'image62.jpg': (20, [155, 124]),
+    'image114.jpg': (12, [105, 107])
+}
+FIGURE = np.array([[200, 200], [400, 210], [380, 400], [300, 330], [210, 390]])
+
+
+class ImageSegmentationTest(TestCase):
+    def setUp(self):
+        self.an_image = np.full((600, 600, 3), 255, np.uint8)
+
+    def draw_framed_figure(self):
+        cv2.rectangle(self.an_image, (100, 100), (500, 500), (0, 160, 0), -1)
+        cv2.rectangle(self.an_image, (130, 130), (470, 470), (255, 255, 255), -1)
+        cv2.fillPoly(self.an_image, [FIGURE], (0, 0, 0))
+
+    def test_given_a_framed_figure_when_segmenting_then_returns_the_figure_inside_the_inner_frame(self):
+        self.draw_framed_figure()
+
+        segments, segmented_image, center_of_mass, mask = segment_image(self.an_image)
+
+        self.assertEqual(len(FIGURE), len(segments))
+        self.assertAlmostEqual(340, segmented_image.shape[0], delta=2)
+        self.assertEqual(segmented_image.shape[0:2], mask.shape)
+
+    def test_given_annotation_disabled_when_segmenting_then_the_segmented_image_is_not_drawn_on(self):
+        self.draw_framed_figure()
+
+        annotated_image = segment_image(self.an_image)[1]
+        plain_image = segment_image(self.an_image, annotate=False)[1]
+
+        self.assertTrue(np.any(annotated_image != plain_image))
+        self.assertEqual(0, np.sum(np.all(plain_image == (0, 85, 255), axis=2)))
+
+    def test_given_an_encoded_framed_figure_when_segmenting_it_then_returns_the_segmented_image_shape_only(self):
+        self.draw_framed_figure()
+        image_data = cv2.imencode('.png', self.an_image)[1].tobytes()
+
+        segments, segmented_image_shape, segmented_image_encoded, mask_encoded = segment_encoded_image(image_data)
+
+        self.assertEqual(segment_image(self.an_image)[1].shape, segmented_image_shape)
+
+    def test_given_an_image_without_figure_when_segmenting_then_an_error_is_thrown(self):
+        self.assertRaises(NoSegmentsFound, segment_image, self.an_image)
+
+    def test_given_raw_images_with_several_quads_when_segmenting_then_picks_the_same_figure_as_before(self):
+        for filename, (segment_count, center_of_mass) in RAW_IMAGE_FIGURES.items():
+            image = cv2.imread(os.path.join(RAW_IMAGES_DIRECTORY, filename))
+
+            segments, segmented_image, found_center_of_mass, mask = segment_image(image)
+
+            self.assertEqual((segment_count, center_of_mass), (len(segments), found_center_of_mass), filename)
@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+import numpy as np
+from mock import mock
+
+from domain.camera.cameramodel import CameraModel
+from domain.geometry.transformationmatrixbuilder import TransformationMatrixBuilder
+from domain.shape.rectangle import Rectangle
+from domain.world.obstacle import Obstacle
+from domain.world.table import Table
+from service.image.detectionversion import create_detection_version, set_detection_version
+from service.image.imagestranslationservice import ImageToWorldTranslator
+from service.image.worldsnapshot import DrawingAreaGeometry
+
+
+class ImageToWorldTranslatorTest(TestCase):
+    def setUp(self):
+        camera_matrix = np.array([[800., 0., 640., -900.], [0., -784., -400., 28000.], [0., 0.2, -0.98, 60.]])
+        camera_model = CameraModel(1, np.eye(3), np.eye(3, 4), camera_matrix, np.zeros(5), np.eye(3), np.zeros(3),
+                                   [0, 0])
+        self.a_translator = ImageToWorldTranslator(camera_model)
+        self.table = Table(Rectangle(np.array([[100, 80], [1150, 90], [1140, 700], [110, 690]])))
+        self.obstacles = [Obstacle((900, 400), 35)]
+
+    def test_given_the_same_detected_table_twice_when_translating_then_the_world_is_computed_once(self):
+        table = set_detection_version(self.table, create_detection_version())
+
+        with mock.patch.object(self.a_translator, '_translate_table_element_to_world',
+                               wraps=self.a_translator._translate_table_element_to_world) as translate_table:
+            first_world = self.a_translator.translate_image_elements_to_world([table])._world
+            second_world = self.a_translator.translate_image_elements_to_world([table])._world
+
+        translate_table.assert_called_once_with(table)
+        self.assertIs(first_world, second_world)
+
+    def test_given_a_newly_detected_table_when_translating_the_same_obstacles_then_they_are_translated_again(self):
+        obstacles = set_detection_version(self.obstacles, create_detection_version())
+        self.a_translator.translate_image_elements_to_world([obstacles])
+        table = set_detection_version(self.table, create_detection_version())
+
+        with mock.patch.object(self.a_translator, '_translate_obstacles',
+                               wraps=self.a_translator._translate_obstacles) as translate_obstacles:
+            self.a_translator.translate_image_elements_to_world([table, obstacles])
+            self.a_translator.translate_image_elements_to_world([table, obstacles])
+
+        translate_obstacles.assert_called_once_with(obstacles)
+
+    def test_given_elements_without_version_when_translating_twice_then_they_are_translated_every_time(self):
+        with mock.patch.object(self.a_translator, '_translate_obstacles',
+                               wraps=self.a_translator._translate_obstacles) as translate_obstacles:
+            self.a_translator.translate_image_elements_to_world([self.table, self.obstacles])
+            self.a_translator.translate_image_elements_to_world([self.table, self.obstacles])
+
+        self.assertEqual(2, translate_obstacles.call_count)
+
+    def test_given_figure_segments_when_transforming_them_then_each_point_is_scaled_rotated_and_centered(self):
+        drawing_area = DrawingAreaGeometry(660., 660., None, None, 600., 400., 200.)
+        world = self.a_translator.translate_image_elements_to_world([self.table])._world
+        segments = np.array([[[10, 20]], [[300, 40]], [[250, 380]]])
+        scale_matrix = TransformationMatrixBuilder().scale(0.5).translate(-100, -100).rotate(90) \
+            .translate(100, 100).translate(500, 300).build()
+
+        image_segments, world_segments = self.a_translator.transform_segments((400, 400, 3), segments,
+                                                                              1., 90, world._target_to_world,
+                                                                              drawing_area)
+
+        expected_segments = [np.dot(scale_matrix, [x, y, 1])[0:2].astype(int).tolist() for x, y in segments[:, 0]]
+        self.assertEqual(expected_segments, image_segments.tolist())
+        self.assertEqual((3, 2), world_segments.shape)
+
+    def test_given_a_path_with_collinear_points_when_translating_it_then_only_its_corners_are_projected(self):
+        world = self.a_translator.translate_image_elements_to_world([self.table])._world
+        world_path = [[0, 0], [100, 0], [200, 0], [300, 0], [300, 100], [300, 200]]
+
+        image_path = self.a_translator.translate_path(world_path, world._target_to_world)
+
+        self.assertEqual(3, len(image_path))
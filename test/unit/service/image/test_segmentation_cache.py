@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from service.image.segmentationcache import SegmentationCache, SegmentationResult, create_segmentation_key
+from service.image.worldsnapshot import EMPTY_WORLD_SNAPSHOT, ComponentVersions
+
+AN_IMAGE = b'image'
+
+
+class SegmentationCacheTest(TestCase):
+    def setUp(self):
+        self.a_segmentation_cache = SegmentationCache(max_size_in_bytes=100)
+
+    def create_result(self, encoded_image):
+        return SegmentationResult([], [], encoded_image, '')
+
+    def test_given_a_cached_result_when_getting_it_then_returns_it_and_counts_a_hit(self):
+        result = self.create_result('a')
+        self.a_segmentation_cache.put('key', result)
+
+        self.assertIs(result, self.a_segmentation_cache.get('key'))
+        self.assertEqual(1., self.a_segmentation_cache.get_hit_rate())
+
+    def test_given_an_unknown_key_when_getting_it_then_returns_none_and_counts_a_miss(self):
+        self.assertIsNone(self.a_segmentation_cache.get('key'))
+        self.assertEqual(0., self.a_segmentation_cache.get_hit_rate())
+
+    def test_given_a_full_cache_when_putting_a_result_then_evicts_the_least_recently_used(self):
+        self.a_segmentation_cache.put('first', self.create_result('a' * 40))
+        self.a_segmentation_cache.put('second', self.create_result('b' * 40))
+        self.a_segmentation_cache.get('first')
+
+        self.a_segmentation_cache.put('third', self.create_result('c' * 40))
+
+        self.assertIsNotNone(self.a_segmentation_cache.get('first'))
+        self.assertIsNone(self.a_segmentation_cache.get('second'))
+        self.assertLessEqual(self.a_segmentation_cache.get_size_in_bytes(), 100)
+
+    def test_given_a_result_larger_than_the_cache_when_putting_it_then_it_is_not_cached(self):
+        self.a_segmentation_cache.put('key', self.create_result('a' * 200))
+
+        self.assertEqual(0, len(self.a_segmentation_cache))
+
+    def test_given_a_new_drawing_area_version_when_creating_a_key_then_the_key_changes(self):
+        snapshot = EMPTY_WORLD_SNAPSHOT
+        moved_snapshot = snapshot._replace(versions=ComponentVersions(0, 0, 0, 1))
+
+        self.assertEqual(create_segmentation_key(AN_IMAGE, 1., 0., snapshot),
+                         create_segmentation_key(AN_IMAGE, 1., 0., snapshot))
+        self.assertNotEqual(create_segmentation_key(AN_IMAGE, 1., 0., snapshot),
+                            create_segmentation_key(AN_IMAGE, 1., 0., moved_snapshot))
@@ -0,0 +1,86 @@
+from unittest import TestCase
+
+import numpy as np
+
+import config
+from domain.camera.cameramodel import CameraModel
+from domain.detector.worldelement.robotdetector import RobotDetector
+from domain.detector.worldelement.shapefactory import ShapeFactory
+from domain.detector.worldelement.tabledetector import TableDetector
+from service.image.imagepreprocessing import preprocess_image
+from service.image.syntheticscene import SyntheticSceneRenderer
+
+
+def create_camera_model():
+    intrinsic_parameters = np.array([[1110., 0., 635.], [0., 1110., 362.], [0., 0., 1.]])
+    rotation_matrix = np.eye(3)
+    translation_vector = np.array([[-22.], [-9.], [47.]])
+    extrinsic_parameters = np.concatenate((rotation_matrix, translation_vector), axis=1)
+    camera_matrix = np.dot(intrinsic_parameters, extrinsic_parameters)
+
+    return CameraModel(2, intrinsic_parameters, extrinsic_parameters, camera_matrix,
+                       np.array([[0.05, -0.18, 0., 0., 0.1]]), rotation_matrix, translation_vector, [0, 0])
+
+
+class SyntheticSceneRendererTest(TestCase):
+    def setUp(self):
+        self.camera_model = create_camera_model()
+
+    def test_given_a_resolution_when_rendering_a_scene_then_the_image_has_this_resolution(self):
+        renderer = SyntheticSceneRenderer(self.camera_model, (640, 400))
+        random_state = np.random.RandomState(0)
+
+        scene = renderer.render(renderer.create_random_layout(random_state), random_state=random_state)
+
+        self.assertEqual((400, 640, 3), scene.image.shape)
+
+    def test_given_a_rendered_robot_when_projecting_its_image_position_back_then_returns_its_layout_position(self):
+        renderer = SyntheticSceneRenderer(self.camera_model, (640, 400))
+        random_state = np.random.RandomState(1)
+        layout = renderer.create_random_layout(random_state)
+
+        scene = renderer.render(layout, random_state=random_state)
+
+        position = renderer.get_camera_model().image_to_target_coordinates_array(
+            [scene.ground_truth.robot.image_position], config.ROBOT_HEIGHT_IN_TARGET_UNIT)[0, 0:2]
+        np.testing.assert_allclose(layout.robot.position, position)
+
+    def test_given_more_obstacles_than_the_table_holds_when_creating_a_layout_then_an_error_is_raised(self):
+        renderer = SyntheticSceneRenderer(self.camera_model, (640, 400))
+
+        self.assertRaises(ValueError, renderer.create_random_layout, np.random.RandomState(3), 50)
+
+    def test_given_a_clutter_level_when_rendering_a_scene_then_the_ground_truth_counts_the_distractors(self):
+        renderer = SyntheticSceneRenderer(self.camera_model, (640, 400))
+        random_state = np.random.RandomState(2)
+
+        scene = renderer.render(renderer.create_random_layout(random_state), clutter=15, random_state=random_state)
+
+        self.assertEqual(15, scene.ground_truth.distractor_count)
+
+    def test_given_a_distorted_scene_when_detecting_the_robot_then_it_is_found_at_its_ground_truth_pose(self):
+        renderer = SyntheticSceneRenderer(self.camera_model)
+        random_state = np.random.RandomState(3)
+        scene = renderer.render(renderer.create_random_layout(random_state), random_state=random_state)
+
+        robot = RobotDetector(ShapeFactory()).detect(preprocess_image(scene.image, renderer.get_camera_model()))
+
+        np.testing.assert_allclose(scene.ground_truth.robot.image_position, robot._position, atol=3)
+        self.assertAlmostEqual(scene.ground_truth.robot.image_angle, robot._angle, delta=3)
+
+    def test_given_a_scene_at_the_capture_resolution_when_detecting_the_table_then_its_corners_match_the_ground_truth(
+            self):
+        renderer = SyntheticSceneRenderer(self.camera_model)
+        camera_model = renderer.get_camera_model()
+
+        for seed in range(3):
+            random_state = np.random.RandomState(seed)
+            scene = renderer.render(renderer.create_random_layout(random_state), random_state=random_state)
+
+            table = TableDetector(ShapeFactory()).detect(preprocess_image(scene.image, camera_model))
+
+            detected_corners = camera_model.image_to_target_coordinates_array(
+                np.array(table._rectangle.as_contour_points(), dtype=float).reshape(-1, 2), 0)[:, 0:2]
+            for corner in scene.ground_truth.table.corners:
+                corner_error = np.min(np.linalg.norm(detected_corners - corner, axis=1)) * config.TARGET_SIDE_LENGTH
+                self.assertLess(corner_error, 5., seed)
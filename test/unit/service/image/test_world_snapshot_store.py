@@ -0,0 +1,84 @@
+from threading import Timer
+from unittest import TestCase
+
+import numpy as np
+
+from domain.shape.square import Square
+from domain.world.drawingarea import DrawingArea
+from domain.world.obstacle import Obstacle
+from domain.world.robot import Robot
+from domain.world.world import World
+from service.image.worldsnapshot import WorldSnapshotStore
+from service.image.worldstate import WorldState
+
+
+class WorldSnapshotStoreTest(TestCase):
+    def setUp(self):
+        self.world = World(230, 110, 10, 20, np.eye(3))
+        self.obstacle = Obstacle((300, 300), 35)
+        self.obstacle.set_orientation('Left')
+        self.obstacle.set_world_position([800., 400.])
+        self.a_snapshot_store = WorldSnapshotStore()
+
+    def create_robot_at(self, x, y):
+        robot = Robot((100, 100), [(100, 100), (120, 100)], None)
+        robot.set_world_position([x, y])
+        return robot
+
+    def test_given_a_new_store_when_getting_the_latest_snapshot_then_returns_an_empty_snapshot(self):
+        snapshot = self.a_snapshot_store.get_latest()
+
+        self.assertEqual(0, snapshot.version)
+        self.assertIsNone(snapshot.world)
+
+    def test_given_a_world_state_when_publishing_it_then_it_is_the_latest_snapshot(self):
+        published_snapshot = self.a_snapshot_store.publish(
+            WorldState(self.world, self.create_robot_at(500., 250.), []), [self.obstacle], None)
+
+        snapshot = self.a_snapshot_store.get_latest()
+
+        self.assertIs(published_snapshot, snapshot)
+        self.assertEqual(1, snapshot.version)
+        self.assertEqual((500., 250.), (snapshot.robot.x, snapshot.robot.y))
+        self.assertEqual((2300, 1100), (snapshot.world.width, snapshot.world.length))
+        self.assertEqual('LEFT', snapshot.obstacles[0].tag)
+
+    def test_given_a_published_snapshot_when_only_the_robot_moves_then_only_the_robot_version_changes(self):
+        first_snapshot = self.a_snapshot_store.publish(
+            WorldState(self.world, self.create_robot_at(500., 250.), []), [self.obstacle], None)
+
+        second_snapshot = self.a_snapshot_store.publish(
+            WorldState(self.world, self.create_robot_at(510., 250.), []), [self.obstacle], None)
+
+        self.assertEqual(first_snapshot.versions.robot + 1, second_snapshot.versions.robot)
+        self.assertEqual(first_snapshot.versions.world, second_snapshot.versions.world)
+        self.assertEqual(first_snapshot.versions.obstacles, second_snapshot.versions.obstacles)
+
+    def test_given_a_drawing_area_when_publishing_it_then_the_snapshot_holds_its_image_placement(self):
+        inner_square = Square(np.array([[500, 300], [700, 300], [700, 500], [500, 500]]), (600, 400))
+        drawing_area = DrawingArea(inner_square, inner_square)
+        drawing_area.set_inner_square_dimension({'width': 66., 'length': 66.})
+
+        snapshot = self.a_snapshot_store.publish(WorldState(self.world, None, []), [], drawing_area)
+
+        self.assertEqual((600., 400., 200.), snapshot.drawing_area[4:])
+
+    def test_given_a_published_snapshot_when_modifying_it_then_an_error_is_thrown(self):
+        snapshot = self.a_snapshot_store.publish(WorldState(self.world, None, []), [], None)
+
+        self.assertRaises(AttributeError, setattr, snapshot, 'version', 42)
+
+    def test_given_an_unchanged_component_when_waiting_for_a_change_then_returns_after_the_timeout(self):
+        snapshot = self.a_snapshot_store.wait_for_change(lambda snapshot: snapshot.versions.world, 0, 0.01)
+
+        self.assertEqual(0, snapshot.versions.world)
+
+    def test_given_a_waiting_reader_when_a_component_changes_then_returns_the_new_snapshot(self):
+        publisher = Timer(0.01, self.a_snapshot_store.publish,
+                          (WorldState(self.world, self.create_robot_at(500., 250.), []), [], None))
+        publisher.start()
+
+        snapshot = self.a_snapshot_store.wait_for_change(lambda snapshot: snapshot.versions.world, 0, 5)
+        publisher.join()
+
+        self.assertEqual(1, snapshot.versions.world)